@@ -21,11 +21,15 @@ Usage:
 Functions:
 - load_dotenv: Loads environment variables from a .env file.
 - create_line_plot: Generates a line plot using Plotly Express and returns the figure as a dictionary.
+- tool_node: Runs every tool call of the caller's message concurrently and collects the figures.
 
 Variables:
 - logger: A logger instance for logging messages.
+- CONFIGURATIONS: A dictionary containing the configuration of the tool node.
+- tools_by_name: The tools, by name.
 """
 import plotly.express as px
+import plotly.graph_objects as go
 from typing import Dict, Optional,List
 from typing_extensions import TypedDict
 import pandas as pd
@@ -38,14 +42,35 @@ from io import StringIO
 from langchain_core.tools import tool
 from langchain_core.messages import ToolMessage
 import json
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 from Agents import loggerModule
+from Agents.codeGeneration import plotReducers
 
 from Database import mainDatabase
+from Database import correlationEngine
 
 logger=loggerModule.setup_logging()
 
+CONFIGURATIONS={
+    'MAX_TOOL_WORKERS': int(os.getenv('TOOL_NODE_WORKERS', 4)),  # tool calls of one caller message run concurrently
+}
+
+# (project_id, frame) loaded once by tool_node for all the tool calls of a message
+_shared_dataset=contextvars.ContextVar('_shared_dataset', default=None)
+
+def _fetch_dataset(project_id, columns=None):
+    # Serves the requested columns from the frame tool_node loaded, when it has them all
+    shared = _shared_dataset.get()
+    if shared is not None and shared[0] == project_id and columns is not None:
+        frame = shared[1]
+        selected = [col for col in dict.fromkeys(columns) if col is not None]
+        if all(col in frame.columns for col in selected):
+            return frame[selected]
+    return mainDatabase.fetch_dataset(project_id, columns=columns)
+
 
 @tool
 def create_line_plot(x: str, y: str, color: str = None,x_label: str=None,y_label: str=None, title: Optional[str] = None, project_id: Optional[str] = None) -> Dict:
@@ -63,7 +88,7 @@ def create_line_plot(x: str, y: str, color: str = None,x_label: str=None,y_label
     - dict: The generated line plot as a dictionary.
     """
     try:
-        df = mainDatabase.fetch_dataset(project_id)
+        df = _fetch_dataset(project_id, columns=[x, y, color])
         # Check if provided column names exist in the dataset
         for col in [x, y, color]:
             if col and col not in df.columns:
@@ -76,6 +101,9 @@ def create_line_plot(x: str, y: str, color: str = None,x_label: str=None,y_label
         # Drop rows with missing values in the relevant columns
         relevant_columns = [col for col in [x, y, color] if col is not None]
         df = df.dropna(subset=relevant_columns)
+        total = len(df)
+        # Sorted by x and reduced to a few thousand points per series that draw the same line
+        df = plotReducers.downsample_series(df, x, y, color)
 
         fig = px.line(
             data_frame=df,
@@ -88,12 +116,13 @@ def create_line_plot(x: str, y: str, color: str = None,x_label: str=None,y_label
             title=title,
             template="plotly_dark",
         )
+        fig.update_layout(meta=plotReducers.sampling_meta(total, len(df)))
         return fig.to_dict()
     except Exception as e:
         print(f"Error creating line plot: {e}")
 
 @tool
-def create_scatter_plot(x: str, y: str, color: Optional[str] = None,x_label: str=None,y_label: str=None, marginal_x: Optional[str] = None, marginal_y: Optional[str] = None, trendline: Optional[str] = None, trendline_scope: Optional[str] = None, title: Optional[str] = None, project_id: Optional[str] = None) -> Dict:
+def create_scatter_plot(x: str, y: str, color: Optional[str] = None,x_label: str=None,y_label: str=None, marginal_x: Optional[str] = None, marginal_y: Optional[str] = None, trendline: Optional[str] = None, trendline_scope: Optional[str] = None, render: Literal['auto', 'points', 'density'] = 'auto', density_style: Literal['heatmap', 'contour'] = 'heatmap', title: Optional[str] = None, project_id: Optional[str] = None) -> Dict:
     """
     Generates a scatter plot using Plotly Express and returns the figure as a dictionary.
 
@@ -106,13 +135,17 @@ def create_scatter_plot(x: str, y: str, color: Optional[str] = None,x_label: str
     - marginal_y (str, optional): Type of marginal plot for y (e.g., 'box', 'violin').
     - trendline (str, optional): Type of trendline to draw (e.g., 'ols', 'lowess').
     - trendline_scope (str, optional): Whether trendlines are fit per trace or across traces (default: 'trace').
+    - render (str, optional): 'points', 'density' (counts on a 2D grid, for millions of rows; marginals and
+      trendlines are not drawn), or 'auto' (density above a few million rows). Default is 'auto'.
+    - density_style (str, optional): 'heatmap' or 'contour' for the density rendering; with a color column
+      the largest groups are drawn as their own contours and the rest as one "Other" contour. Default is 'heatmap'.
     - title (str, optional): The title of the plot.
 
     Returns:
     - dict: The generated scatter plot as a dictionary.
     """
     try:
-        data = mainDatabase.fetch_dataset(project_id)
+        data = _fetch_dataset(project_id, columns=[x, y, color])
         # Check if provided column names exist in the dataset
         for col in [x, y, color]:
             if col and col not in data.columns:
@@ -125,6 +158,12 @@ def create_scatter_plot(x: str, y: str, color: Optional[str] = None,x_label: str
         # Drop rows with missing values in the relevant columns 
         relevant_columns = [col for col in [x, y, color] if col is not None]
         data = data.dropna(subset=relevant_columns)
+        total = len(data)
+
+        numeric = all(pd.api.types.is_numeric_dtype(data[col]) for col in [x, y])
+        if numeric and (render == 'density' or (render == 'auto' and total > plotReducers.CONFIGURATIONS['DENSITY_ABOVE_POINTS'])):
+            return _density_figure(data, x, y, color, density_style, x_label, y_label, title).to_dict()
+        data = plotReducers.sample_points(data, [x, y], color)
 
         fig = px.scatter(
             data_frame=data,
@@ -138,13 +177,35 @@ def create_scatter_plot(x: str, y: str, color: Optional[str] = None,x_label: str
             marginal_y=marginal_y,
             trendline=trendline,
             trendline_scope=trendline_scope,
+            render_mode='webgl' if len(data) > plotReducers.CONFIGURATIONS['WEBGL_THRESHOLD'] else 'svg',
             title=title,
             template='plotly_dark',
         )
+        fig.update_layout(meta=plotReducers.sampling_meta(total, len(data)))
         return fig.to_dict()
     except Exception as e:
         print(f"Error creating scatter plot: {e}")
 
+def _density_figure(data, x, y, color, style, x_label, y_label, title):
+    # Counts per grid cell instead of points: the payload depends on the grid size only
+    x_centers, y_centers, groups, counts = plotReducers.density_grid(data, x, y, color)
+    fig = go.Figure()
+    if color is None:
+        z = np.where(counts[0] > 0, counts[0], np.nan)
+        if style == 'contour':
+            fig.add_trace(go.Contour(x=x_centers, y=y_centers, z=z, colorscale='Viridis', colorbar=dict(title='count')))
+        else:
+            fig.add_trace(go.Heatmap(x=x_centers, y=y_centers, z=z, colorscale='Viridis', colorbar=dict(title='count')))
+    else:
+        palette = px.colors.qualitative.Set1
+        for position, (group, grid) in enumerate(zip(groups, counts)):
+            fig.add_trace(go.Contour(x=x_centers, y=y_centers, z=np.where(grid > 0, grid, np.nan), name=str(group),
+                                     showscale=False, showlegend=True, contours_coloring='lines',
+                                     line=dict(color=palette[position % len(palette)], width=1.5)))
+    fig.update_layout(title=title, xaxis_title=x_label or x, yaxis_title=y_label or y, template='plotly_dark',
+                      meta={'total_points': int(len(data)), 'rendering': 'density', 'grid': len(x_centers), 'groups': len(groups)})
+    return fig
+
 @tool
 def create_bubble_plot(x: str, y: str, color: Optional[str] = None, size: Optional[str] = None, x_label: str=None,y_label: str=None, title: Optional[str] = None, project_id: Optional[str] = None) -> Dict:
     """
@@ -162,7 +223,7 @@ def create_bubble_plot(x: str, y: str, color: Optional[str] = None, size: Option
     - dict: The generated bubble plot as a dictionary.
     """
     try:
-        df = mainDatabase.fetch_dataset(project_id)
+        df = _fetch_dataset(project_id, columns=[x, y, color, size])
 
         # Check if provided column names exist in the dataset
         for col in [x, y, color, size]:
@@ -176,6 +237,8 @@ def create_bubble_plot(x: str, y: str, color: Optional[str] = None, size: Option
         # Drop rows with missing values in the relevant columns
         relevant_columns = [col for col in [x, y, color, size] if col is not None]
         df = df.dropna(subset=relevant_columns)
+        total = len(df)
+        df = plotReducers.sample_points(df, [x, y, size], color)
 
         fig = px.scatter(
             data_frame=df,
@@ -186,31 +249,50 @@ def create_bubble_plot(x: str, y: str, color: Optional[str] = None, size: Option
             size=size,
             labels={'x':x_label,'y':y_label},
             color_discrete_sequence=px.colors.qualitative.Set1,
+            render_mode='webgl' if len(df) > plotReducers.CONFIGURATIONS['WEBGL_THRESHOLD'] else 'svg',
             title=title,
             template="plotly_dark",
         )
+        fig.update_layout(meta=plotReducers.sampling_meta(total, len(df)))
         return fig.to_dict()
     except Exception as e:
         print(f"Error creating bubble plot: {e}")
 
+def _add_density_strips(fig, strips, x, name, color):
+    # Swarms over the point budget are drawn as density strips, scaled to the width of their slot; all the
+    # strips of a group are one trace, with a gap between strips so that every strip is filled on its own
+    if not len(strips):
+        return
+    xs, ys, texts = [], [], []
+    for strip in strips.itertuples():
+        half = strip.density/strip.density.max()*strip.width*0.45
+        xs += [strip.position+half, strip.position-half[::-1], [np.nan]]
+        ys += [strip.grid, strip.grid[::-1], [np.nan]]
+        texts.append(np.full(2*len(strip.grid)+1, f'{x}={strip.category}<br>{strip.count} points', dtype=object))
+    fig.add_trace(go.Scatter(x=np.concatenate(xs), y=np.concatenate(ys), text=np.concatenate(texts), mode='lines', fill='toself',
+                             name=name, legendgroup=name, showlegend=False, line=dict(color=color, width=1),
+                             hovertemplate='%{text}<extra></extra>'))
+
 @tool
 def create_swarm_plot(x: str, y: str, color: Optional[str] = None,  x_label: str=None,y_label: str=None, stripmode: Optional[str] = "group", title: Optional[str] = None, project_id: Optional[str] = None) -> Dict:
     """
-    Creates a swarm plot (approximated using scatter plot) using Plotly Express and returns the figure as a dictionary.
+    Creates a beeswarm plot (points of a category spread sideways so they do not overlap) and returns the figure as a dictionary.
+    Categories with too many points to draw are shown as density strips instead, and the smallest categories and
+    color groups past a cap are drawn together as "Other".
 
     Parameters:
-        x (str): Column name for the x-axis.
-        y (str): Column name for the y-axis.
+        x (str): Column name for the x-axis (the categories).
+        y (str): Column name for the y-axis (a numeric column).
         color (str, optional): Column name to group points by color.
         labels (dict, optional): Dictionary of axis or legend labels.
-        stripmode (str, optional): Mode for strip plot, e.g., "group".
+        stripmode (str, optional): "group" (every color has its own swarm) or "overlay" (colors share one swarm per category).
         title (str, optional): Title of the plot.
 
     Returns:
         dict: The generated swarm plot as a dictionary.
     """
     try:
-        df = mainDatabase.fetch_dataset(project_id)
+        df = _fetch_dataset(project_id, columns=[x, y, color])
         # Check if provided column names exist in the dataset
         for col in [x, y, color]:
             if col and col not in df.columns:
@@ -223,26 +305,37 @@ def create_swarm_plot(x: str, y: str, color: Optional[str] = None,  x_label: str
         # Drop rows with missing values in the relevant columns
         relevant_columns = [col for col in [x, y, color] if col is not None]
         df = df.dropna(subset=relevant_columns)
-
-        fig = px.strip(
-            data_frame=df,
-            x=x, 
-            y=y, 
-            color=color,
-            # symbol=color, 
-            labels={'x':x_label,'y':y_label},
-            color_discrete_sequence=px.colors.qualitative.Set1, 
-            orientation="v", 
-            stripmode=stripmode, 
-            title=title, 
-            template="plotly_dark", 
-        )
+        if color:
+            codes, groups = plotReducers.fold_groups(df[color], plotReducers.CONFIGURATIONS['SWARM_MAX_COLORS'])
+            df = df.assign(**{color: np.asarray(groups, dtype=object)[codes]})
+        categories, points, strips = plotReducers.swarm_layout(df, x, y, color, stripmode=stripmode)
+
+        palette = px.colors.qualitative.Set1
+        grouped = color is not None and stripmode == 'group'
+        fig = go.Figure()
+        for position, group in enumerate(pd.unique(df[color]) if color else [None]):
+            name = str(group) if color else y
+            group_points = points[points[color] == group] if color else points
+            fig.add_trace(go.Scatter(x=group_points['position'], y=group_points[y], mode='markers', name=name, legendgroup=name,
+                                     showlegend=color is not None, text=group_points[x].astype(str),
+                                     hovertemplate=f'{x}=%{{text}}<br>{y}=%{{y}}',
+                                     marker=dict(color=palette[position % len(palette)], size=plotReducers.CONFIGURATIONS['SWARM_MARKER_SIZE'])))
+            if grouped:
+                _add_density_strips(fig, strips[strips['group'] == group], x, name, palette[position % len(palette)])
+        if not grouped:
+            _add_density_strips(fig, strips, x, y, palette[0] if color is None else 'lightgrey')
+        fig.update_layout(title=title, template="plotly_dark", xaxis_title=x_label or x, yaxis_title=y_label or y,
+                          xaxis=dict(tickvals=list(range(len(categories))), ticktext=categories),
+                          # Every row is drawn, as a point or within a density strip
+                          meta={'total_points': int(len(df)), 'drawn_points': int(len(points)),
+                                'strip_points': int(strips['count'].sum()), 'density_strips': int(len(strips)),
+                                'categories': len(categories), 'color_groups': int(df[color].nunique()) if color else 1})
         return fig.to_dict()
     except Exception as e:
         print(f"Error creating swarm plot: {e}")
 
 @tool
-def grouped_bar_plot(x: str, y: str, color: Optional[str] = None, title: Optional[str] = "Grouped Bar Plot", project_id: Optional[str] = None) -> Dict:
+def grouped_bar_plot(x: str, y: str, color: Optional[str] = None, agg: Literal['sum', 'mean', 'count'] = 'sum', title: Optional[str] = "Grouped Bar Plot", project_id: Optional[str] = None) -> Dict:
     """
     Creates a grouped bar plot using Plotly Express and returns the plot as a dictionary.
 
@@ -250,13 +343,14 @@ def grouped_bar_plot(x: str, y: str, color: Optional[str] = None, title: Optiona
         x (str): Column name for the x-axis.
         y (str): Column name for the y-axis.
         color (str, optional): Column name to group bars by color.
+        agg (str, optional): How the y values of a bar are combined: 'sum', 'mean' or 'count' (default is 'sum').
         title (str, optional): Title of the plot (default is "Grouped Bar Plot").
 
     Returns:
         dict: The generated grouped bar plot as a dictionary.
     """
     try:
-        df=mainDatabase.fetch_dataset(project_id)
+        df=_fetch_dataset(project_id, columns=[x, y, color])
 
         # Check if provided column names exist in the dataset
         for col in [x, y, color]:
@@ -270,6 +364,8 @@ def grouped_bar_plot(x: str, y: str, color: Optional[str] = None, title: Optiona
         # drop rows with missing values in the relevant columns
         relevant_columns = [col for col in [x, y, color] if col is not None]
         df = df.dropna(subset=relevant_columns)
+        # One row per bar instead of one per record
+        df = plotReducers.aggregate(df, [x, color], y, agg)
 
         fig = px.bar(
             df, 
@@ -288,31 +384,47 @@ def create_pairplot(color: Optional[str] = None, dimensions: List[str] = None, d
     """
     Create a pairplot using Plotly and returns the plot as a dictionary.
 
+    At most a few dimensions are drawn and the rows are sampled so that every panel together stays
+    within the point budget; the panels are drawn with WebGL (splom).
+
     Parameters:
     color (str): Column name to be used for color encoding.
     dimensions (list): List of column names to be used as dimensions for the pairplot.
+                       Default is None (the numeric columns most correlated with the others).
     diagonal_visible (bool): Whether to show the diagonal plots.
 
     Returns:
     dict: The generated pairplot as a dictionary.
     """
     try:
-        df=mainDatabase.fetch_dataset(project_id)
+        if dimensions is None:
+            # Rank the numeric columns with the cached correlation matrix, then only read the best candidates
+            numeric_columns, matrix = mainDatabase.fetch_correlation(project_id)
+            limit = plotReducers.CONFIGURATIONS['MAX_DIMENSIONS']
+            candidates = [numeric_columns[i] for i in correlationEngine.rank_columns(matrix)[:2*limit]]
+        else:
+            candidates = list(dict.fromkeys(dimensions))
+        df=_fetch_dataset(project_id, columns=candidates+[color])
+        candidates = [col for col in candidates if col in df.columns and col != color]
+        dimensions = plotReducers.pick_dimensions(df, candidates)
 
         # Check if DataFrame has more than one column
-        if df.shape[1] < 2:
-            raise ValueError("DataFrame must have at least two columns for a pairplot.")
-        
-        # Create the pairplot using Plotly
-        if dimensions is not None:
-            fig = px.scatter_matrix(df, color=color,symbol=color, dimensions=dimensions,title=title)
-        else:
-            fig = px.scatter_matrix(df, color=color,symbol=color,title=title)
+        if len(dimensions) < 2:
+            raise ValueError("DataFrame must have at least two numeric columns for a pairplot.")
+
+        df = df.dropna(subset=dimensions+([color] if color else []))
+        total = len(df)
+        # Every row is drawn once per panel
+        df = plotReducers.sample_points(df, dimensions, color, budget=max(plotReducers.CONFIGURATIONS['POINT_BUDGET']//len(dimensions)**2, 1))
+
+        # Create the pairplot using Plotly (splom traces are drawn with WebGL)
+        fig = px.scatter_matrix(df, color=color,symbol=color, dimensions=dimensions,title=title)
 
         fig.update_traces(diagonal_visible=diagonal_visible)
         logger.info(f"Pair Plot Created Successfully")
         fig.update_layout(
-                template="plotly_dark",)
+                template="plotly_dark",
+                meta={**plotReducers.sampling_meta(total, len(df)), 'dimensions': dimensions},)
         return fig.to_dict()
         
     except ValueError as e:
@@ -321,7 +433,7 @@ def create_pairplot(color: Optional[str] = None, dimensions: List[str] = None, d
         logger.error(f"An error occurred: {e}")
 
 @tool
-def create_radar_chart(category_column: str, value_columns: List[str] = None, title: Optional[str] = "Radar Chart", color_column: Optional[str] = None, project_id: Optional[str] = None) -> Dict:
+def create_radar_chart(category_column: str, value_columns: List[str] = None, title: Optional[str] = "Radar Chart", color_column: Optional[str] = None, agg: Literal['mean', 'median', 'normalized'] = 'mean', project_id: Optional[str] = None) -> Dict:
     """
     Generates a radar chart using Plotly Express and returns the plot as a dictionary.
 
@@ -332,12 +444,14 @@ def create_radar_chart(category_column: str, value_columns: List[str] = None, ti
         title (str, optional): The title of the radar chart. Default is "Radar Chart".
         color_column (str, optional): Column name for grouping different lines (optional).
                                        If None, no grouping is applied.
+        agg (str, optional): How each category summarizes a metric: 'mean', 'median', or 'normalized'
+                             (the mean rescaled to 0-1 across categories, for metrics on different scales). Default is 'mean'.
 
     Returns:
-        dict: The generated radar chart as a dictionary.
+        dict: The generated radar chart as a dictionary, with one polygon per category (and color group).
     """
     # Example dataset
-    df=mainDatabase.fetch_dataset(project_id)
+    df=_fetch_dataset(project_id, columns=[category_column]+value_columns+[color_column] if value_columns is not None else None)
 
     try:
         if category_column not in df.columns:
@@ -355,20 +469,17 @@ def create_radar_chart(category_column: str, value_columns: List[str] = None, ti
         if color_column and color_column not in df.columns:
             raise ValueError(f"Color column '{color_column}' is not in the DataFrame.")
         
-        # Melt the data for radar chart format
-        melted_data = df.melt(
-            id_vars=[category_column] + ([color_column] if color_column else []),
-            value_vars=value_columns,
-            var_name="Metric",
-            value_name="Value"
-        )
+        # Summarize every metric per category (and color group), then melt for radar chart format
+        melted_data = plotReducers.radar_profiles(df, [category_column, color_column], value_columns, agg=agg)
         
         # Create the radar chart
         fig = px.line_polar(
             melted_data,
             r="Value",
             theta="Metric",
-            color=color_column,
+            color=color_column or category_column,
+            line_group=category_column if color_column and color_column != category_column else None,
+            hover_data=[category_column],
             line_close=True,
             title=title,
         )
@@ -384,7 +495,7 @@ def create_radar_chart(category_column: str, value_columns: List[str] = None, ti
         return None
 
 @tool
-def create_treemap(path_columns: List[str], value_column: Optional[str] = None, color_column: Optional[str] = None, title: Optional[str] = "Treemap", color_scale: Optional[str] = "Viridis", project_id: Optional[str] = None) -> Dict:
+def create_treemap(path_columns: List[str], value_column: Optional[str] = None, color_column: Optional[str] = None, title: Optional[str] = "Treemap", color_scale: Optional[str] = "Viridis", max_leaves: Optional[int] = 500, project_id: Optional[str] = None) -> Dict:
     """
     Generates a treemap using Plotly Express and returns the plot as a dictionary.
 
@@ -394,12 +505,13 @@ def create_treemap(path_columns: List[str], value_column: Optional[str] = None,
         color_column (str, optional): The column to determine the color of the segments. If None, no color mapping is applied.
         title (str, optional): Title of the treemap. Default is "Treemap".
         color_scale (str, optional): Color scale to use for the treemap. Default is "Viridis".
+        max_leaves (int, optional): About how many leaves to draw; the smallest segments of each level are grouped into "Other". Default is 500.
 
     Returns:
         dict: The generated treemap as a dictionary.
     """
     try:  
-        df=mainDatabase.fetch_dataset(project_id)
+        df=_fetch_dataset(project_id, columns=path_columns+[value_column, color_column])
 
         valid_path_columns = [col for col in path_columns if col in df.columns]
         if len(valid_path_columns) < len(path_columns):
@@ -419,22 +531,19 @@ def create_treemap(path_columns: List[str], value_column: Optional[str] = None,
         if color_column and color_column not in df.columns:
             print(f"Warning: Color column '{color_column}' is not in the DataFrame. Ignoring it.")
             color_column = None
-        
-        # Handle missing values in relevant columns
-        all_columns = valid_path_columns + [value_column, color_column]
-        for col in filter(None, all_columns):  # Skip None columns
-            if col in df.columns:
-                df[col] = df[col].fillna(None)
-        
 
-        df["all"] = "all" # in order to have a single root node
+        # Build the hierarchy once instead of letting Plotly aggregate every row
+        nodes = plotReducers.hierarchy_nodes(df, valid_path_columns, value=value_column, color=color_column, max_leaves=max_leaves)
 
         # Create the treemap
         fig = px.treemap(
-            df,
-            path=valid_path_columns,
-            values=value_column,
+            nodes,
+            ids='id',
+            names='label',
+            parents='parent',
+            values='value',
             color=color_column,
+            branchvalues='total',
             title=title,
             color_continuous_scale=color_scale
         )
@@ -444,7 +553,8 @@ def create_treemap(path_columns: List[str], value_column: Optional[str] = None,
         logger.info(f"Tree Map Plot Created Successfully")
 
         fig.update_layout(
-                template="plotly_dark",)
+                template="plotly_dark",
+                meta={'total_rows': int(len(df)), 'nodes': int(len(nodes))},)
         return fig.to_dict()
 
     except Exception as e:
@@ -452,7 +562,7 @@ def create_treemap(path_columns: List[str], value_column: Optional[str] = None,
         return None
 
 @tool
-def create_correlation_heatmap(columns: List[str] = None, color_scale: Optional[str] = "Viridis", title: Optional[str] = "Correlation Heatmap", show_values: Optional[bool] = True, project_id: Optional[str] = None) -> Dict:
+def create_correlation_heatmap(columns: List[str] = None, color_scale: Optional[str] = "Viridis", title: Optional[str] = "Correlation Heatmap", show_values: Optional[bool] = True, max_columns: Optional[int] = 30, top_k: Optional[int] = None, order: Literal['cluster', 'original'] = 'cluster', project_id: Optional[str] = None) -> Dict:
     """
     Generates a heatmap of correlations between numerical columns in the dataset and returns it as a dictionary.
 
@@ -461,21 +571,35 @@ def create_correlation_heatmap(columns: List[str] = None, color_scale: Optional[
         color_scale (str, optional): Color scale to use for the heatmap. Default is "Viridis".
         title (str, optional): Title of the heatmap. Default is "Correlation Heatmap".
         show_values (bool, optional): Whether to overlay correlation values on the heatmap. Default is True.
+        max_columns (int, optional): Most columns drawn; beyond it the columns most correlated with the others are kept. Default is 30.
+        top_k (int, optional): Only draw the columns of the k most strongly correlated pairs. Default is None.
+        order (str, optional): 'cluster' to place correlated columns next to each other, 'original' to keep the dataset order. Default is 'cluster'.
         project_id (str, optional): Project ID to fetch the dataset.
 
     Returns:
         dict: The generated correlation heatmap in dictionary format.
     """
     try:
-        df = mainDatabase.fetch_dataset(project_id)
-        numerical_data = df.select_dtypes(include=["number"])
-
-        if columns:
-            numerical_data = numerical_data[columns]
-
-        correlation_matrix = numerical_data.corr()
-        correlation_matrix = correlation_matrix.applymap(lambda x: None if pd.isna(x) else x)
+        # The full matrix is computed once per dataset version; only the drawn slice is picked here
+        all_columns, matrix = mainDatabase.fetch_correlation(project_id)
+        positions = {col: i for i, col in enumerate(all_columns)}
+        selected = np.array([positions[col] for col in dict.fromkeys(columns) if col in positions] if columns else range(len(all_columns)), dtype=int)
+        if len(selected) == 0:
+            raise ValueError("No numerical columns found for the correlation heatmap.")
+        sub_columns, sub_matrix = [all_columns[i] for i in selected], matrix[np.ix_(selected, selected)]
+
+        if top_k:
+            pairs = correlationEngine.top_pairs(sub_columns, sub_matrix, top_k)
+            keep = list(dict.fromkeys(col for a, b, _ in pairs for col in (a, b)))[:max_columns]
+            keep = [i for i, col in enumerate(sub_columns) if col in keep]
+        else:
+            keep = correlationEngine.select_columns(sub_matrix, max_columns)
+        sub_columns, sub_matrix = [sub_columns[i] for i in keep], sub_matrix[np.ix_(keep, keep)]
+        if order == 'cluster':
+            ordering = correlationEngine.seriation_order(sub_matrix)
+            sub_columns, sub_matrix = [sub_columns[i] for i in ordering], sub_matrix[np.ix_(ordering, ordering)]
 
+        correlation_matrix = pd.DataFrame(sub_matrix, index=sub_columns, columns=sub_columns)
         fig = px.imshow(
             correlation_matrix,
             labels=dict(x="Features", y="Features", color="Correlation"),
@@ -486,16 +610,16 @@ def create_correlation_heatmap(columns: List[str] = None, color_scale: Optional[
         )
 
         if show_values:
-            fig.update_traces(text=correlation_matrix.values, texttemplate="%{text:.2f}", textfont_size=12)
+            fig.update_traces(text=np.where(np.isnan(sub_matrix), None, sub_matrix), texttemplate="%{text:.2f}", textfont_size=12)
 
-        fig.update_layout(template="plotly_dark")
+        fig.update_layout(template="plotly_dark", meta={'total_columns': len(selected), 'shown_columns': len(sub_columns)})
         return fig.to_dict()
     except Exception as e:
         logger.error(f"An error occurred: {e}")
         return None
 
 @tool
-def create_faceted_bar_chart(x: str, y: str, color: Optional[str] = None, barmode: Optional[str] = "group", facet_row: Optional[str] = None, facet_col: Optional[str] = None, title: Optional[str] = "Faceted Bar Chart", project_id: Optional[str] = None) -> Dict:
+def create_faceted_bar_chart(x: str, y: str, color: Optional[str] = None, barmode: Optional[str] = "group", facet_row: Optional[str] = None, facet_col: Optional[str] = None, agg: Literal['sum', 'mean', 'count'] = 'sum', title: Optional[str] = "Faceted Bar Chart", project_id: Optional[str] = None) -> Dict:
     """
     Generates a faceted bar chart using Plotly Express and returns it as a dictionary.
 
@@ -506,6 +630,7 @@ def create_faceted_bar_chart(x: str, y: str, color: Optional[str] = None, barmod
         barmode (str, optional): Bar mode. Options: 'group', 'overlay', 'relative'. Default is 'group'.
         facet_row (str, optional): Column name for facet rows. Default is None.
         facet_col (str, optional): Column name for facet columns. Default is None.
+        agg (str, optional): How the y values of a bar are combined: 'sum', 'mean' or 'count'. Default is 'sum'.
         title (str, optional): Title of the chart. Default is "Faceted Bar Chart".
         project_id (str): Project ID to fetch the dataset.
 
@@ -513,9 +638,10 @@ def create_faceted_bar_chart(x: str, y: str, color: Optional[str] = None, barmod
         dict: The generated faceted bar chart in dictionary format.
     """
     try:
-        df = mainDatabase.fetch_dataset(project_id)
+        df = _fetch_dataset(project_id, columns=[x, y, color, facet_row, facet_col])
         relevant_columns = [col for col in [x, y, color, facet_row, facet_col] if col]
         df = df.dropna(subset=relevant_columns)
+        df = plotReducers.aggregate(df, [x, color, facet_row, facet_col], y, agg)
 
         fig = px.bar(
             df,
@@ -540,13 +666,16 @@ def create_faceted_bar_chart(x: str, y: str, color: Optional[str] = None, barmod
         return None
 
 @tool
-def create_histogram(x: str, color: Optional[str] = None, x_label: Optional[str] = None, y_label: Optional[str] = None, project_id: str = None) -> Dict:
+def create_histogram(x: str, color: Optional[str] = None, bins: Optional[str] = 'fd', x_label: Optional[str] = None, y_label: Optional[str] = None, project_id: str = None) -> Dict:
     """
     Creates a histogram using Plotly Express and returns it as a dictionary.
 
+    The bins are counted on the server, so the figure holds one bar per bin (and color group), not the raw values.
+
     Args:
         x (str): The column name for the x-axis.
         color (str, optional): The column name to be used for color encoding. Default is None.
+        bins (str, optional): Bin rule: 'fd' (Freedman-Diaconis), 'sturges', or a number of bins such as '30'. Default is 'fd'.
         x_label (str, optional): Label for the x-axis. Default is None.
         y_label (str, optional): Label for the y-axis. Default is None.
         project_id (str, optional): Project ID to fetch the dataset.
@@ -555,18 +684,35 @@ def create_histogram(x: str, color: Optional[str] = None, x_label: Optional[str]
         dict: The generated histogram in dictionary format.
     """
     try:
-        df = mainDatabase.fetch_dataset(1)
-        if x not in df.columns:
-            raise ValueError(f"Column '{x}' not found in the dataset.")
-
-        fig = px.histogram(df, x=x, color=color)
+        df = _fetch_dataset(project_id, columns=[x, color])
+        for col in [x, color]:
+            if col and col not in df.columns:
+                raise ValueError(f"Column '{col}' not found in the dataset.")
+        df = df.dropna(subset=[col for col in [x, color] if col])
+
+        datetimes = pd.api.types.is_datetime64_any_dtype(df[x])
+        if datetimes or (pd.api.types.is_numeric_dtype(df[x]) and not pd.api.types.is_bool_dtype(df[x])):
+            binned = plotReducers.histogram(df, x, color, bins)
+            fig = px.bar(binned, x=x, y='count', color=color, hover_data=['bin_start', 'bin_end'],
+                         labels={x: x_label or x, 'count': y_label or 'count'})
+            width = binned['bin_end'].iloc[0]-binned['bin_start'].iloc[0] if len(binned) else None
+            # Bar widths on a date axis are in milliseconds
+            fig.update_traces(width=width/pd.Timedelta(milliseconds=1) if datetimes and width is not None else width and float(width))
+            fig.update_layout(bargap=0, barmode='relative')
+        else:
+            # A categorical x has one bar per category (and kept color group)
+            if color:
+                codes, groups = plotReducers.fold_groups(df[color])
+                df = df.assign(**{color: np.asarray(groups, dtype=object)[codes]})
+            counted = plotReducers.aggregate(df.assign(count=1), [x, color], 'count', 'sum')
+            fig = px.bar(counted, x=x, y='count', color=color, labels={x: x_label or x, 'count': y_label or 'count'})
         return fig.to_dict()
     except Exception as e:
         logger.error(f"An error occurred: {e}")
         return None
 
 @tool
-def create_pie_chart(values: str, names: str, color: Optional[str] = None, title: Optional[str] = None, project_id: Optional[str] = None) -> Dict:
+def create_pie_chart(values: str, names: str, color: Optional[str] = None, agg: Literal['sum', 'mean', 'count'] = 'sum', title: Optional[str] = None, project_id: Optional[str] = None) -> Dict:
     """
     Creates a pie chart using Plotly Express and returns it as a dictionary.
 
@@ -574,6 +720,7 @@ def create_pie_chart(values: str, names: str, color: Optional[str] = None, title
         values (str): The column name for the values.
         names (str): The column name for the names (labels).
         color (str, optional): The column name to be used for color encoding. Default is None.
+        agg (str, optional): How the values of a slice are combined: 'sum', 'mean' or 'count'. Default is 'sum'.
         title (str, optional): The title of the pie chart. Default is None.
         project_id (str, optional): Project ID to fetch the dataset.
 
@@ -581,11 +728,13 @@ def create_pie_chart(values: str, names: str, color: Optional[str] = None, title
         dict: The generated pie chart in dictionary format.
     """
     try:
-        df = mainDatabase.fetch_dataset(project_id)
+        df = _fetch_dataset(project_id, columns=[values, names, color])
 
         if values not in df.columns or names not in df.columns:
             raise ValueError("Specified columns not found in the dataset.")
 
+        df = df.dropna(subset=[col for col in [values, names, color] if col])
+        df = plotReducers.aggregate(df, [names, color], values, agg)
         fig = px.pie(df, values=values, names=names, color=color, title=title)
         return fig.to_dict()
     except Exception as e:
@@ -610,19 +759,26 @@ def create_area_chart(x: str, y: str, color: Optional[str] = None, x_label: Opti
         dict: The generated area chart in dictionary format.
     """
     try:
-        df = mainDatabase.fetch_dataset(project_id)
+        df = _fetch_dataset(project_id, columns=[x, y, color])
 
         if x not in df.columns or y not in df.columns:
             raise ValueError("Specified columns not found in the dataset.")
 
+        df = df.dropna(subset=[col for col in [x, y, color] if col])
+        total = len(df)
+        df = plotReducers.downsample_series(df, x, y, color)
+
         fig = px.area(df, x=x, y=y, color=color, title=title, labels={'x': x_label, 'y': y_label})
+        # Series keep different x values; stacking interpolates between them instead of dropping to zero
+        fig.update_traces(stackgaps='interpolate')
+        fig.update_layout(meta=plotReducers.sampling_meta(total, len(df)))
         return fig.to_dict()
     except Exception as e:
         logger.error(f"An error occurred: {e}")
         return None
 
 @tool
-def create_boxplot(x: Optional[str] = None, y: Optional[str] = None, color: Optional[str] = None, x_label: Optional[str] = None, y_label: Optional[str] = None, project_id: Optional[str] = None) -> Dict:
+def create_boxplot(x: Optional[str] = None, y: Optional[str] = None, color: Optional[str] = None, x_label: Optional[str] = None, y_label: Optional[str] = None, mode: Literal['auto', 'raw', 'summary'] = 'auto', project_id: Optional[str] = None) -> Dict:
     """
     Creates a box plot using Plotly Express and returns it as a dictionary.
 
@@ -632,18 +788,24 @@ def create_boxplot(x: Optional[str] = None, y: Optional[str] = None, color: Opti
         color (Optional[str], optional): The column name to be used for color encoding. Default is None.
         x_label (Optional[str], optional): Label for the x-axis. Default is None.
         y_label (Optional[str], optional): Label for the y-axis. Default is None.
+        mode (str, optional): 'raw' (every value is sent to the browser), 'summary' (quartiles, fences and the most
+            extreme outliers of every box are computed here), or 'auto' (summary for large datasets). Default is 'auto'.
         project_id (Optional[str], optional): Project ID to fetch the dataset.
 
     Returns:
         dict: The generated box plot in dictionary format.
     """
     try:
-        df = mainDatabase.fetch_dataset(project_id)
+        df = _fetch_dataset(project_id, columns=[x, y, color])
 
         if y not in df.columns or (x and x not in df.columns) or (color and color not in df.columns):
             raise ValueError("Specified columns not found in the dataset.")
 
-        fig = px.box(df, x=x, y=y, color=color)
+        if mode == 'summary' or (mode == 'auto' and len(df) > plotReducers.CONFIGURATIONS['SUMMARY_ABOVE_ROWS']):
+            fig = _box_summary_figure(plotReducers.box_summaries(df, y, [x, color]), x, y, color)
+            fig.update_layout(meta={'total_rows': int(len(df)), 'rendering': 'summary'})
+        else:
+            fig = px.box(df, x=x, y=y, color=color)
 
         if x_label:
             fig.update_xaxes(title_text=x_label)
@@ -654,8 +816,71 @@ def create_boxplot(x: Optional[str] = None, y: Optional[str] = None, color: Opti
         logger.error(f"An error occurred: {e}")
         return None
 
+def _summary_groups(summaries, x, y, color):
+    # Splits per-group summaries into traces (one per color group) and gives every box its x label
+    labels = summaries[x].astype(str) if x else pd.Series(y, index=summaries.index)
+    if not color or color in (x, y):
+        return [(None, summaries, labels)]
+    return [(str(group), part, labels[part.index]) for group, part in summaries.groupby(color, sort=False, observed=True)]
+
+def _box_summary_figure(summaries, x, y, color):
+    # Boxes from precomputed statistics, with the capped outliers as a marker trace in the same offset group
+    palette = px.colors.qualitative.Plotly
+    fig = go.Figure()
+    for position, (group, part, labels) in enumerate(_summary_groups(summaries, x, y, color)):
+        trace_color = palette[position % len(palette)]
+        offset = group if group is not None else y
+        fig.add_trace(go.Box(x=labels, q1=part['q1'], median=part['median'], q3=part['q3'], mean=part['mean'],
+                             lowerfence=part['lowerfence'], upperfence=part['upperfence'], name=group or y,
+                             offsetgroup=offset, legendgroup=offset, showlegend=group is not None, boxpoints=False,
+                             marker_color=trace_color))
+        outlier_labels = np.repeat(labels.to_numpy(), part['outliers'].map(len).to_numpy())
+        outliers = np.concatenate([np.asarray(values, dtype=float) for values in part['outliers']] or [np.empty(0)])
+        if len(outliers):
+            fig.add_trace(go.Scatter(x=outlier_labels, y=outliers, mode='markers', name=group or y, offsetgroup=offset,
+                                     legendgroup=offset, showlegend=False, marker=dict(color=trace_color, size=4)))
+    fig.update_layout(boxmode='group', scattermode='group', xaxis_title=x, yaxis_title=y, legend_title_text=color)
+    return fig
+
+def _violin_summary_figure(curves, summaries, x, y, color, points):
+    # Violins drawn as filled shapes from precomputed densities; every violin is scaled to the same maximum width
+    palette = px.colors.qualitative.Plotly
+    groups = _summary_groups(summaries, x, y, color)
+    categories = list(dict.fromkeys(summaries[x].astype(str))) if x else [y]
+    width = 0.8/len(groups)
+    fig = go.Figure()
+    for position, (group, part, labels) in enumerate(groups):
+        trace_color = palette[position % len(palette)]
+        centers = np.array([categories.index(label) for label in labels])-0.4+width*(position+0.5)
+        shapes_x, shapes_y, box_x, box_y = [], [], [], []
+        for center, index in zip(centers, part.index):
+            grid, density = curves.at[index, 'grid'], curves.at[index, 'density']
+            half = density/density.max()*width*0.45
+            shapes_x += list(center+half)+list(center-half[::-1])+[None]
+            shapes_y += list(grid)+list(grid[::-1])+[None]
+            box_x += [center, center, None]
+            box_y += [summaries.at[index, 'q1'], summaries.at[index, 'q3'], None]
+        name = group or y
+        fig.add_trace(go.Scatter(x=shapes_x, y=shapes_y, mode='lines', fill='toself', name=name, legendgroup=name,
+                                 line=dict(color=trace_color, width=1), hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=box_x, y=box_y, mode='lines', legendgroup=name, showlegend=False,
+                                 line=dict(color=trace_color, width=6), hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=centers, y=part['median'], mode='markers', legendgroup=name, showlegend=False, name=name,
+                                 marker=dict(color='white', size=6, line=dict(color=trace_color, width=1)),
+                                 customdata=part[['q1', 'q3', 'count']].to_numpy(),
+                                 hovertemplate='median %{y}<br>q1 %{customdata[0]}<br>q3 %{customdata[1]}<br>n %{customdata[2]}'))
+        if points not in (None, False, 'false'):
+            counts = part['outliers'].map(len).to_numpy()
+            outliers = np.concatenate([np.asarray(values, dtype=float) for values in part['outliers']] or [np.empty(0)])
+            if len(outliers):
+                fig.add_trace(go.Scatter(x=np.repeat(centers, counts), y=outliers, mode='markers', legendgroup=name,
+                                         showlegend=False, name=name, marker=dict(color=trace_color, size=4)))
+    fig.update_layout(xaxis=dict(tickvals=list(range(len(categories))), ticktext=categories, title=x),
+                      yaxis_title=y, legend_title_text=color, showlegend=len(groups) > 1)
+    return fig
+
 @tool
-def create_violin_plot(x: Optional[str] = None, y: Optional[str] = None, color: Optional[str] = None, points: Optional[str] = None, hover_data: List[str] = None, x_label: Optional[str] = None, y_label: Optional[str] = None, project_id: Optional[str] = None) -> Dict:
+def create_violin_plot(x: Optional[str] = None, y: Optional[str] = None, color: Optional[str] = None, points: Optional[str] = None, hover_data: List[str] = None, x_label: Optional[str] = None, y_label: Optional[str] = None, mode: Literal['auto', 'raw', 'summary'] = 'auto', project_id: Optional[str] = None) -> Dict:
     """
     Creates a violin plot using Plotly Express and returns it as a dictionary.
 
@@ -667,18 +892,26 @@ def create_violin_plot(x: Optional[str] = None, y: Optional[str] = None, color:
         hover_data (Optional[list], optional): Additional data to display when hovering over points. Default is None.
         x_label (Optional[str], optional): Label for the x-axis. Default is None.
         y_label (Optional[str], optional): Label for the y-axis. Default is None.
+        mode (str, optional): 'raw' (every value is sent to the browser), 'summary' (densities on a fixed grid,
+            quartiles and the most extreme outliers are computed here; any points option shows only those outliers
+            and hover_data is ignored), or 'auto' (summary for large datasets). Default is 'auto'.
         project_id (Optional[str]): Project ID to fetch the dataset.
 
     Returns:
         dict: The generated violin plot in dictionary format.
     """
     try:
-        df = mainDatabase.fetch_dataset(project_id)
+        df = _fetch_dataset(project_id, columns=[x, y, color]+(hover_data or []))
 
         if y not in df.columns or (x and x not in df.columns) or (color and color not in df.columns):
             raise ValueError("Specified columns not found in the dataset.")
 
-        fig = px.violin(df, x=x, y=y, color=color, points=points, hover_data=hover_data)
+        if mode == 'summary' or (mode == 'auto' and len(df) > plotReducers.CONFIGURATIONS['SUMMARY_ABOVE_ROWS']):
+            summaries = plotReducers.box_summaries(df, y, [x, color])
+            fig = _violin_summary_figure(plotReducers.kde_curves(df, y, [x, color]), summaries, x, y, color, points)
+            fig.update_layout(meta={'total_rows': int(len(df)), 'rendering': 'summary'})
+        else:
+            fig = px.violin(df, x=x, y=y, color=color, points=points, hover_data=hover_data)
 
         if x_label:
             fig.update_xaxes(title_text=x_label)
@@ -689,7 +922,6 @@ def create_violin_plot(x: Optional[str] = None, y: Optional[str] = None, color:
         logger.error(f"An error occurred: {e}")
         return None
 
-
 tools = [create_line_plot,
         create_scatter_plot,
         create_bubble_plot,
@@ -706,42 +938,66 @@ tools = [create_line_plot,
         create_boxplot,
         create_violin_plot]
 
+tools_by_name = {tool.name: tool for tool in tools}
+
+def _referenced_columns(tool_calls):
+    # Every string argument may name a column; the dataset read skips those that do not
+    columns = []
+    for tool_call in tool_calls:
+        for value in tool_call["args"].values():
+            for item in value if isinstance(value, list) else [value]:
+                if isinstance(item, str):
+                    columns.append(item)
+    return columns
+
+def _run_tool_call(tool_call, project_id):
+    # Returns (figure or None, ToolMessage) for one tool call, never raising
+    try:
+        # Invoke the tool based on the tool call
+        tool_call["args"]["project_id"] = project_id
+        tool_result = tools_by_name[tool_call["name"]].invoke(tool_call["args"])
+        if tool_result is None:
+            raise ValueError("the tool did not return a figure")
+        return tool_result, ToolMessage(content="the visualization was created", name=tool_call["name"], tool_call_id=tool_call["id"])
+    except Exception as e:
+        # Return the error if the tool call fails
+        logger.error(f"Tool call {tool_call['name']} failed: {e}")
+        return None, ToolMessage(
+            content="an error occurred while running the tool",
+            name=tool_call["name"],
+            tool_call_id=tool_call["id"],
+            additional_kwargs={"error": e},
+        )
+
 def tool_node(state)->Literal["caller", "__end__"]:
-    tools_by_name = {create_line_plot.name: create_line_plot,
-                    create_scatter_plot.name: create_scatter_plot,
-                    create_bubble_plot.name: create_bubble_plot,
-                    create_swarm_plot.name: create_swarm_plot,
-                    grouped_bar_plot.name: grouped_bar_plot,
-                    create_pairplot.name: create_pairplot,
-                    create_radar_chart.name: create_radar_chart,
-                    create_treemap.name: create_treemap,
-                    create_correlation_heatmap.name: create_correlation_heatmap,
-                    create_faceted_bar_chart.name: create_faceted_bar_chart,
-                    create_histogram.name: create_histogram,
-                    create_pie_chart.name: create_pie_chart,
-                    create_area_chart.name: create_area_chart,
-                    create_boxplot.name: create_boxplot,
-                    create_violin_plot.name: create_violin_plot}
-    
+    """
+    Runs every tool call of the last message concurrently, sharing one read of the columns they name.
+
+    Returns:
+        dict: 'visualization' (every figure created), 'messages' (one ToolMessage per call) and 'next':
+              "__end__" if any figure was created, else "caller" so that the caller can retry.
+    """
     messages = state["messages"]
     # get the last message of this state
     last_message = messages[-1]
-    output_messages = []
-    for tool_call in last_message.tool_calls:
-        try:
-            # Invoke the tool based on the tool call
-            tool_call["args"]["project_id"] = state["project_id"]
-            tool_result = tools_by_name[tool_call["name"]].invoke(tool_call["args"])
-            return {"next": "__end__",'visualization':tool_result}
-        except Exception as e:
-            # Return the error if the tool call fails
-            output_messages.append(
-                ToolMessage(
-                    content="an error occurred while running the tool",
-                    name=tool_call["name"],
-                    tool_call_id=tool_call["id"],
-                    additional_kwargs={"error": e},
-                )
-            )
-            return {'next':'caller','messages':output_messages}
-
+    tool_calls = last_message.tool_calls
+    project_id = state["project_id"]
+    try:
+        shared = (project_id, mainDatabase.fetch_dataset(project_id, columns=_referenced_columns(tool_calls)))
+    except Exception as e:
+        logger.error(f"Could not load the dataset for the tool calls: {e}")
+        shared = None
+    if shared is not None and shared[1] is None:
+        shared = None
+
+    def run(tool_call):
+        # Every worker gets its own context holding the shared frame
+        context = contextvars.copy_context()
+        context.run(_shared_dataset.set, shared)
+        return context.run(_run_tool_call, tool_call, project_id)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(CONFIGURATIONS['MAX_TOOL_WORKERS'], len(tool_calls)))) as executor:
+        results = list(executor.map(run, tool_calls))
+    visualizations = [figure for figure, _ in results if figure is not None]
+    output_messages = [message for _, message in results]
+    return {'next': "__end__" if visualizations else 'caller', 'visualization': visualizations, 'messages': output_messages}
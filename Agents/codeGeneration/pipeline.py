@@ -27,11 +27,12 @@ Classes:
 - State: A TypedDict class to represent the state of the application.
 
 Functions:
-- generate_visualizations: Generates visualizations based on the project ID.
+- generate_visualizations: Generates visualizations based on the project ID, running the designs concurrently.
 
 Variables:
 - builder: An instance of StateGraph to build the state graph.
 - graph: The compiled state graph.
+- CONFIGURATIONS: A dictionary containing the configuration of the pipeline.
 """
 import sys
 sys.path.append("C.A.S.E-Automated-Data-Analysis-By-LLMs\Agents\\")
@@ -75,18 +76,38 @@ builder.add_conditional_edges('tools',tool_brancher)
 builder.add_edge('coder',END)
 graph = builder.compile()
 
-def generate_visualizations(project_id):
+CONFIGURATIONS={
+    'MAX_CONCURRENT_DESIGNS': int(os.getenv('MAX_CONCURRENT_DESIGNS', 4)),  # designs run through the graph at once
+}
+
+def generate_visualizations(project_id, max_concurrency=None):
+    """
+    Generates visualizations for a project: the designer proposes designs and every design runs through the graph.
+
+    The designs run concurrently, at most max_concurrency at a time, so a dashboard takes about as long as
+    its slowest design. A design that fails is skipped without affecting the others.
+
+    Args:
+        project_id (str): The project's Id.
+        max_concurrency (int, optional): Most designs running at once. Default is CONFIGURATIONS['MAX_CONCURRENT_DESIGNS'].
+
+    Returns:
+        list: The visualizations, in the order of the designs.
+    """
     data_report=mainDatabase.fetch_data_report(project_id)
     response=designer_chain.invoke({'data_report':data_report})
     visualizations=[]
     print(len(response.response))
     print(response.response)
-    try:
-        for idx,design in  enumerate(response.response):
-            graph_response=graph.invoke({'project_id':str(project_id),'messages':[{"role":"human","content":str(design)}],data_report:data_report})
-            if graph_response['visualization']:
-                for viz in graph_response['visualization']:
-                    visualizations.append(viz)
-    except Exception as e:
-        print(e)
+    inputs=[{'project_id':str(project_id),'messages':[{"role":"human","content":str(design)}],'data_report':data_report}
+            for design in response.response]
+    # batch keeps the order of the inputs and returns the exception of a failed design in its place
+    graph_responses=graph.batch(inputs, config={'max_concurrency': max_concurrency or CONFIGURATIONS['MAX_CONCURRENT_DESIGNS']},
+                                return_exceptions=True)
+    for idx,graph_response in enumerate(graph_responses):
+        if isinstance(graph_response, Exception):
+            print(f"Design {idx} failed: {graph_response}")
+            continue
+        for viz in graph_response.get('visualization') or []:
+            visualizations.append(viz)
     return visualizations     
\ No newline at end of file
@@ -0,0 +1,750 @@
+"""
+plotReducers.py
+
+This module reduces a dataset to what a plot actually draws before the frame is handed to Plotly,
+so the size of the returned figure and its render time depend on what is drawn (categories,
+bins, a point budget) rather than on the number of rows.
+
+Dependencies:
+- pandas
+- numpy
+
+Usage:
+1. Call a reducer on the fetched frame inside a plotting tool and pass its result to Plotly Express.
+
+Functions:
+- aggregate: Groups rows by the plotted categories and aggregates the plotted value.
+- histogram_edges: Computes histogram bin edges with a bin rule.
+- fold_groups: Factorizes a color column, folding the groups past a cap into "Other".
+- histogram: Counts the rows of every bin (per color group) with vectorized NumPy.
+- sample_points: Draws a stratified, deterministic sample of rows within a point budget.
+- sampling_meta: Describes a sample for the figure's layout.meta.
+- lttb_indices: Picks the points of a series to keep with Largest-Triangle-Three-Buckets.
+- downsample_series: Sorts rows by x once and reduces every color series with LTTB.
+- density_grid: Counts rows on a 2D (x, y) grid, per color group, in one vectorized pass.
+- pick_dimensions: Picks the informative numeric columns of a pairplot, up to a cap.
+- hierarchy_nodes: Builds the ids, parents and values of a treemap, folding small nodes into "Other".
+- radar_profiles: Summarizes every metric per group in one groupby, one radar polygon per group.
+- box_summaries: Computes quartiles, Tukey fences and the most extreme outliers of every group.
+- kde_curves: Estimates the density of every group on a fixed grid, for violins.
+- swarm_offsets: Lays out the values of one beeswarm without overlaps with a sweep over the sorted values.
+- swarm_layout: Positions every point of a beeswarm plot, or a density strip for groups over their budget.
+
+Variables:
+- AGGREGATIONS: The aggregations supported by aggregate.
+- PROFILE_AGGREGATIONS: The aggregations supported by radar_profiles.
+"""
+import os
+import math
+import heapq
+import pandas as pd
+import numpy as np
+
+AGGREGATIONS=('sum', 'mean', 'count')
+PROFILE_AGGREGATIONS=('mean', 'median', 'normalized')
+
+CONFIGURATIONS={
+    'MAX_BINS': 500,  # heavy tails can make Freedman-Diaconis ask for millions of bins
+    'MAX_COLOR_GROUPS': 20,  # color groups drawn separately, the smaller ones are folded into "Other"
+    'MAX_DENSITY_GROUPS': 8,  # density contours drawn separately (one full grid each)
+    'POINT_BUDGET': int(os.getenv('PLOT_POINT_BUDGET', 50000)),  # points a browser draws without freezing
+    'WEBGL_THRESHOLD': 5000,  # above this many points scatter traces are drawn with WebGL
+    'OUTLIER_SHARE': 0.25,  # at most this share of the budget goes to outliers
+    'SEED': 0,
+    'POINTS_PER_SERIES': int(os.getenv('PLOT_POINTS_PER_SERIES', 2000)),  # about two points per pixel of a full-width chart
+    'DENSITY_ABOVE_POINTS': int(os.getenv('PLOT_DENSITY_ABOVE_POINTS', 1000000)),  # scatter plots switch to density above this
+    'DENSITY_GRID': 200,  # cells per axis of a density grid
+    'MAX_DIMENSIONS': 6,  # a pairplot draws every row dimensions^2 times
+    'MAX_LEAVES': 500,
+    'SUMMARY_ABOVE_ROWS': int(os.getenv('PLOT_SUMMARY_ABOVE_ROWS', 50000)),  # box and violin plots send summaries above this
+    'MAX_OUTLIERS': 100,  # outliers drawn per box or violin, the most extreme first
+    'KDE_GRID': 100,  # density values per violin
+    'KDE_OVERSAMPLING': 8,  # bins per grid cell when smoothing
+    'SWARM_GROUP_POINTS': 2000,  # a beeswarm group with more points is drawn as a density strip
+    'SWARM_MARKER_SIZE': 6,  # marker diameter in pixels
+    'SWARM_PLOT_PIXELS': (540, 360),  # approximate width and height of the plotting area
+    'SWARM_MAX_CATEGORIES': 30,  # categories of a beeswarm axis, the smaller ones are folded into "Other"
+    'SWARM_MAX_COLORS': 8,  # color groups of a beeswarm, the smaller ones are folded into "Other"
+}
+
+
+def aggregate(df, group_columns, value_column, agg='sum'):
+    """
+    Groups rows by the plotted categories (x, color, facets, ...) and aggregates the plotted value.
+
+    Plotly draws one segment per row and stacks the segments of a category, so 'sum' draws the
+    same bars (and pie slices) as the raw rows, with one row per category instead.
+
+    Args:
+        df (pd.DataFrame): The rows to plot, without missing values in the relevant columns.
+        group_columns (list): Columns identifying a bar or slice; None entries are skipped.
+        value_column (str): The column to aggregate.
+        agg (str, optional): 'sum', 'mean' or 'count'. Default is 'sum'.
+
+    Returns:
+        pd.DataFrame: One row per category, in order of first appearance, with the group columns and the aggregated value.
+    """
+    if agg not in AGGREGATIONS:
+        raise ValueError(f"Unsupported aggregation '{agg}', expected one of {AGGREGATIONS}.")
+    group_columns = [col for col in dict.fromkeys(group_columns) if col and col != value_column]
+    if not group_columns:
+        return pd.DataFrame({value_column: [df[value_column].agg(agg)]})
+    return df.groupby(group_columns, sort=False, observed=True)[value_column].agg(agg).reset_index()
+
+
+def histogram_edges(values, bins='fd'):
+    """
+    Computes equal-width histogram bin edges.
+
+    Args:
+        values (np.ndarray): Finite numeric values.
+        bins (str or int, optional): 'fd' (Freedman-Diaconis: width 2*IQR/n^(1/3)), 'sturges'
+            (log2(n)+1 bins) or a fixed number of bins. Default is 'fd'.
+
+    Returns:
+        np.ndarray: The bin edges, at most CONFIGURATIONS['MAX_BINS'] bins.
+    """
+    n = len(values)
+    low, high = (float(values.min()), float(values.max())) if n else (0.0, 1.0)
+    if low == high:
+        low, high = low-0.5, high+0.5
+    sturges = math.ceil(math.log2(max(n, 1)))+1
+    if isinstance(bins, str) and bins.isdigit():
+        bins = int(bins)
+    if isinstance(bins, int):
+        count = bins
+    elif bins == 'sturges':
+        count = sturges
+    elif bins == 'fd':
+        q25, q75 = np.percentile(values, [25, 75]) if n else (0.0, 0.0)
+        width = 2*(q75-q25)/n**(1/3) if n else 0.0
+        count = math.ceil((high-low)/width) if width > 0 else sturges
+    else:
+        raise ValueError(f"Unsupported bin rule '{bins}', expected 'fd', 'sturges' or a number of bins.")
+    count = min(max(int(count), 1), CONFIGURATIONS['MAX_BINS'])
+    return np.linspace(low, high, count+1)
+
+
+def fold_groups(values, limit=None):
+    """
+    Factorizes a color column, keeping the limit-1 largest groups and folding the rest into "Other".
+
+    Args:
+        values (pd.Series): The color of every row.
+        limit (int, optional): Maximum number of groups, "Other" included. Default is CONFIGURATIONS['MAX_COLOR_GROUPS'].
+
+    Returns:
+        tuple: (codes, groups): the group of every row (-1 for missing values) and the kept groups in
+               order of first appearance, followed by "Other" if any group was folded.
+    """
+    limit = limit or CONFIGURATIONS['MAX_COLOR_GROUPS']
+    codes, groups = pd.factorize(values, sort=False)
+    if len(groups) <= limit:
+        return codes, list(groups)
+    sizes = np.bincount(codes[codes >= 0], minlength=len(groups))
+    kept = np.sort(np.argsort(-sizes, kind='stable')[:limit-1])
+    mapping = np.full(len(groups), limit-1)
+    mapping[kept] = np.arange(limit-1)
+    return np.where(codes >= 0, mapping[codes], -1), [groups[position] for position in kept]+['Other']
+
+
+def histogram(df, x, color=None, bins='fd'):
+    """
+    Counts the rows of every bin of a numeric column, per color group, in one vectorized pass.
+
+    Every group shares the same edges, so the bars of different groups line up. Beyond
+    CONFIGURATIONS['MAX_COLOR_GROUPS'] groups the smallest are counted together as "Other", so the
+    output stays O(bins). Datetimes are binned as nanoseconds (relative to the earliest one) with
+    the same rules, and the edges are converted back to datetimes.
+
+    Args:
+        df (pd.DataFrame): The rows, without missing values in x and color.
+        x (str): The numeric or datetime column to bin.
+        color (str, optional): Column whose groups are counted separately. Default is None.
+        bins (str or int, optional): Bin rule, see histogram_edges. Default is 'fd'.
+
+    Returns:
+        pd.DataFrame: One row per group and bin: color (if any), bin_start, bin_end, x (the bin center) and count.
+    """
+    datetimes = pd.api.types.is_datetime64_any_dtype(df[x])
+    if datetimes:
+        nanoseconds = df[x].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        origin = int(nanoseconds.min()) if len(nanoseconds) else 0
+        values = (nanoseconds-origin).astype(float)
+    else:
+        values = df[x].to_numpy(dtype=float)
+    edges = histogram_edges(values, bins)
+    count = len(edges)-1
+    # The last bin includes its right edge, like np.histogram
+    index = np.clip(np.searchsorted(edges, values, side='right')-1, 0, count-1)
+    if color:
+        codes, groups = fold_groups(df[color], CONFIGURATIONS['MAX_COLOR_GROUPS'])
+    else:
+        codes, groups = np.zeros(len(values), dtype=np.int64), [None]
+    counts = np.bincount(codes*count+index, minlength=len(groups)*count)
+    centers = (edges[:-1]+edges[1:])/2
+    if datetimes:
+        timezone = getattr(df[x].dtype, 'tz', None)
+        def to_datetimes(positions):
+            converted = pd.to_datetime(origin+np.rint(positions).astype(np.int64), unit='ns', utc=timezone is not None)
+            return converted.tz_convert(timezone) if timezone is not None else converted
+        edges, centers = to_datetimes(edges), to_datetimes(centers)
+    binned = pd.DataFrame({
+        'bin_start': np.tile(edges[:-1], len(groups)),
+        'bin_end': np.tile(edges[1:], len(groups)),
+        x: np.tile(centers, len(groups)),
+        'count': counts,
+    })
+    if color:
+        binned.insert(0, color, np.repeat(np.asarray(groups, dtype=object), count))
+    return binned
+
+
+def _outlier_scores(df, columns):
+    # How far outside the 1.5*IQR fences a row is, in IQRs, over the given numeric columns (0 inside)
+    scores = np.zeros(len(df))
+    for col in columns:
+        values = df[col].to_numpy(dtype=float)
+        q25, q75 = np.percentile(values, [25, 75])
+        iqr = (q75-q25) or 1.0
+        scores = np.maximum(scores, np.maximum(q25-1.5*iqr-values, values-q75-1.5*iqr)/iqr)
+    return scores
+
+
+def sample_points(df, columns, color=None, budget=None, seed=None):
+    """
+    Draws a stratified, deterministic sample of rows within a point budget.
+
+    The rows holding the minimum and maximum of every plotted column are kept, overall and then per
+    color group (the largest groups first) while they fit in the budget, and so are outliers (beyond
+    1.5*IQR, the most extreme first, up to CONFIGURATIONS['OUTLIER_SHARE'] of the budget). The rest of the budget is split across the color
+    groups: each group first gets an equal share (all of its rows if it is smaller), so small groups
+    survive, and what is left is shared in proportion to group size.
+
+    Args:
+        df (pd.DataFrame): The rows, without missing values in the relevant columns.
+        columns (list): The plotted numeric columns (x, y, size, ...); None entries and non-numeric columns are skipped.
+        color (str, optional): Column to stratify by. Default is None.
+        budget (int, optional): Maximum number of rows. Default is CONFIGURATIONS['POINT_BUDGET'].
+        seed (int, optional): Seed of the sample. Default is CONFIGURATIONS['SEED'].
+
+    Returns:
+        pd.DataFrame: df itself if it fits in the budget, else the sampled rows in their original order.
+    """
+    budget = budget or CONFIGURATIONS['POINT_BUDGET']
+    if len(df) <= budget:
+        return df
+    rng = np.random.default_rng(CONFIGURATIONS['SEED'] if seed is None else seed)
+    columns = [col for col in dict.fromkeys(columns) if col and col != color and pd.api.types.is_numeric_dtype(df[col])]
+    codes = pd.factorize(df[color], sort=False)[0] if color else np.zeros(len(df), dtype=np.int64)
+    groups = _group_positions(codes)
+    keep = np.zeros(len(df), dtype=bool)
+
+    # Extremes of every plotted column, overall and then per group (largest groups first), within the budget
+    if columns:
+        order = np.argsort([-len(group) for group in groups], kind='stable')
+        overall, per_group = [], []
+        for col in columns:
+            values = pd.Series(df[col].to_numpy(dtype=float))
+            overall += [values.idxmin(), values.idxmax()]
+            per_group += [values.groupby(codes).idxmin().loc[order].to_numpy(), values.groupby(codes).idxmax().loc[order].to_numpy()]
+        extremes = pd.unique(np.concatenate([np.array(overall, dtype=np.int64), np.column_stack(per_group).ravel()]))
+        keep[extremes[:budget]] = True
+
+    # Outliers, the most extreme first
+    if columns:
+        scores = _outlier_scores(df, columns)
+        outliers = np.flatnonzero((scores > 0) & ~keep)
+        limit = min(int(budget*CONFIGURATIONS['OUTLIER_SHARE']), budget-int(keep.sum()))
+        if len(outliers) > limit:
+            outliers = outliers[np.argsort(-scores[outliers], kind='stable')[:limit]]
+        keep[outliers] = True
+
+    # Stratified sample of the remaining rows
+    remaining = max(budget-int(keep.sum()), 0)
+    candidates = [group[~keep[group]] for group in groups]
+    sizes = np.array([len(group) for group in candidates])
+    quotas = np.minimum(sizes, remaining//(2*len(sizes)))
+    left = remaining-quotas.sum()
+    if left > 0 and (sizes-quotas).sum() > 0:
+        shares = left*(sizes-quotas)/(sizes-quotas).sum()
+        extra = np.floor(shares).astype(int)
+        # Largest remainders get the rows lost to rounding
+        extra[np.argsort(-(shares-extra), kind='stable')[:left-extra.sum()]] += 1
+        quotas = np.minimum(sizes, quotas+extra)
+    for group, quota in zip(candidates, quotas):
+        if quota:
+            keep[rng.choice(group, size=quota, replace=False)] = True
+    return df.iloc[np.flatnonzero(keep)]
+
+
+def _group_positions(codes):
+    # Row positions of every group (increasing) from one stable sort, instead of a scan of all rows per group
+    valid = codes[codes >= 0]
+    if not len(valid):
+        return []
+    order = np.argsort(codes, kind='stable')[len(codes)-len(valid):]
+    return np.split(order, np.cumsum(np.bincount(valid))[:-1])
+
+
+def sampling_meta(total, sampled):
+    """
+    Describes a sample for the figure's layout.meta, so readers of the figure know what it shows.
+    """
+    return {'total_points': int(total), 'sampled_points': int(sampled), 'sampled': bool(sampled < total)}
+
+
+def _is_measurable(series):
+    # Numbers (not booleans), datetimes and durations have distances LTTB can compare
+    return (pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)) \
+        or pd.api.types.is_datetime64_any_dtype(series) or pd.api.types.is_timedelta64_dtype(series)
+
+
+def _measure(series):
+    # The values of a measurable series as a NumPy array LTTB can read (timezone-aware datetimes as UTC)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.to_numpy(dtype='datetime64[ns]')
+    if pd.api.types.is_timedelta64_dtype(series):
+        return series.to_numpy(dtype='timedelta64[ns]')
+    return series.to_numpy(dtype=float)
+
+
+def _as_float(values):
+    # Datetimes become nanoseconds; relative to the first value so float64 keeps their resolution
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64) or np.issubdtype(values.dtype, np.timedelta64):
+        values = values.view(np.int64)
+        return (values-values[0]).astype(float) if len(values) else values.astype(float)
+    return values.astype(float)
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Picks the points of a series to keep with Largest-Triangle-Three-Buckets.
+
+    The first and last points are kept; the points in between are split into threshold-2 buckets
+    and from every bucket the point forming the largest triangle with the previously kept point
+    and the average of the next bucket is kept, which preserves peaks, dips and the overall shape.
+
+    Args:
+        x (np.ndarray): Sorted x values (numbers or datetimes).
+        y (np.ndarray): The y values.
+        threshold (int): Number of points to keep.
+
+    Returns:
+        np.ndarray: Positions of the kept points, increasing.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x, y = _as_float(x), np.asarray(y, dtype=float)
+    every = (n-2)/(threshold-2)
+    edges = np.append((np.arange(threshold-2)*every).astype(np.int64)+1, n-1)
+    # Averages of every bucket (vectorized), then of the last point, which is the bucket after the last one
+    sizes = np.diff(edges)
+    average_x = np.append(np.add.reduceat(x[1:n-1], edges[:-1]-1)/sizes, x[-1])
+    average_y = np.append(np.add.reduceat(y[1:n-1], edges[:-1]-1)/sizes, y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n-1
+    a = 0
+    for bucket in range(threshold-2):
+        low, high = edges[bucket], edges[bucket+1]
+        next_x, next_y = average_x[bucket+1], average_y[bucket+1]
+        areas = np.abs((x[a]-next_x)*(y[low:high]-y[a])-(x[a]-x[low:high])*(next_y-y[a]))
+        a = low+int(np.argmax(areas))
+        selected[bucket+1] = a
+    return selected
+
+
+def downsample_series(df, x, y, color=None, points=None):
+    """
+    Sorts rows by x once and reduces every color series to a point budget with LTTB.
+
+    Only numeric and datetime x (with a numeric y) is reduced: other x values (categories, dates
+    kept as strings) have no distance to measure triangles with, and sorting them would reorder
+    the chart, so those rows are returned as they are.
+
+    Args:
+        df (pd.DataFrame): The rows, without missing values in the relevant columns.
+        x (str): The x column (numbers or datetimes).
+        y (str): The numeric y column.
+        color (str, optional): Column splitting the rows into series. Default is None.
+        points (int, optional): Points kept per series. Default is CONFIGURATIONS['POINTS_PER_SERIES'].
+
+    Returns:
+        pd.DataFrame: The kept rows, sorted by x within every series, or df itself when x or y cannot be reduced.
+    """
+    points = points or CONFIGURATIONS['POINTS_PER_SERIES']
+    if not (_is_measurable(df[x]) and _is_measurable(df[y]) and not pd.api.types.is_datetime64_any_dtype(df[y])):
+        return df
+    df = df.sort_values(x, kind='stable')
+    xs, ys = _measure(df[x]), _measure(df[y])
+    if not color:
+        return df.iloc[lttb_indices(xs, ys, points)]
+    codes = pd.factorize(df[color], sort=False)[0]
+    kept = [positions[lttb_indices(xs[positions], ys[positions], points)] for positions in _group_positions(codes)]
+    return df.iloc[np.concatenate(kept)] if kept else df
+
+
+def _grid_positions(values, cells):
+    # Equal-width cells over the range of the values; the last cell includes the maximum
+    low, high = float(values.min()), float(values.max())
+    if low == high:
+        low, high = low-0.5, high+0.5
+    edges = np.linspace(low, high, cells+1)
+    return np.clip(np.searchsorted(edges, values, side='right')-1, 0, cells-1), (edges[:-1]+edges[1:])/2
+
+
+def density_grid(df, x, y, color=None, cells=None):
+    """
+    Counts rows on a 2D (x, y) grid, per color group, in one vectorized pass (a grouped np.histogram2d).
+
+    Every group shares the same grid, and beyond CONFIGURATIONS['MAX_DENSITY_GROUPS'] groups the
+    smallest are counted together as "Other", so the output size depends on the grid resolution only.
+
+    Args:
+        df (pd.DataFrame): The rows, without missing values in the relevant columns.
+        x (str): The numeric x column.
+        y (str): The numeric y column.
+        color (str, optional): Column whose groups are counted separately. Default is None.
+        cells (int, optional): Cells per axis. Default is CONFIGURATIONS['DENSITY_GRID'].
+
+    Returns:
+        tuple: (x cell centers, y cell centers, groups, counts) where counts[g] is the (y, x) grid of group g
+               and groups is [None] without a color column.
+    """
+    cells = cells or CONFIGURATIONS['DENSITY_GRID']
+    x_index, x_centers = _grid_positions(df[x].to_numpy(dtype=float), cells)
+    y_index, y_centers = _grid_positions(df[y].to_numpy(dtype=float), cells)
+    if color:
+        codes, groups = fold_groups(df[color], CONFIGURATIONS['MAX_DENSITY_GROUPS'])
+    else:
+        codes, groups = np.zeros(len(df), dtype=np.int64), [None]
+    counts = np.bincount((codes*cells+y_index)*cells+x_index, minlength=len(groups)*cells*cells)
+    return x_centers, y_centers, list(groups), counts.reshape(len(groups), cells, cells)
+
+
+def pick_dimensions(df, candidates, limit=None):
+    """
+    Picks the informative numeric columns of a pairplot, in the order of candidates, up to a cap.
+
+    Non-numeric and boolean columns, constant columns and identifiers (integer columns with a
+    distinct value on every row) are skipped: they only add empty or meaningless panels.
+
+    Args:
+        df (pd.DataFrame): The rows.
+        candidates (list): Columns to consider, the preferred first.
+        limit (int, optional): Maximum number of columns. Default is CONFIGURATIONS['MAX_DIMENSIONS'].
+
+    Returns:
+        list: The picked columns.
+    """
+    limit = limit or CONFIGURATIONS['MAX_DIMENSIONS']
+    picked = []
+    for col in candidates:
+        series = df[col]
+        if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            continue
+        distinct = series.nunique()
+        if distinct <= 1 or (pd.api.types.is_integer_dtype(series) and distinct == len(series)):
+            continue
+        picked.append(col)
+        if len(picked) == limit:
+            break
+    return picked
+
+
+def _fold_level(leaves, path, level, children, aggregations):
+    # Keeps the children-1 largest children of every node at this level and relabels the others "Other"
+    keys = path[:level+1]
+    alive = leaves[leaves[path[level]].notna()]
+    nodes = alive.groupby(keys, sort=False)['__value'].sum().reset_index()
+    siblings = nodes.groupby(keys[:-1], sort=False)['__value'] if level else nodes.groupby(np.zeros(len(nodes)))['__value']
+    nodes['__fold'] = (siblings.transform('size') > children) & (siblings.rank(method='first', ascending=False) > children-1)
+    if not nodes['__fold'].any():
+        return leaves
+    folded = leaves.merge(nodes[keys+['__fold']], on=keys, how='left')['__fold'].eq(True).to_numpy()
+    leaves = leaves.copy()
+    leaves.loc[folded, path[level]] = 'Other'
+    leaves.loc[folded, path[level+1:]] = None
+    return leaves.groupby(path, sort=False, dropna=False).agg(aggregations).reset_index()
+
+
+def hierarchy_nodes(df, path, value=None, color=None, max_leaves=None):
+    """
+    Builds the nodes of a treemap (ids, labels, parents, values and colors) with one multi-level groupby.
+
+    Every level keeps the largest children of each node and folds the rest into one "Other" node,
+    with a per-level limit chosen so that the tree has at most about max_leaves leaves.
+
+    Args:
+        df (pd.DataFrame): The rows.
+        path (list): Columns of the hierarchy, from the root down. Missing labels become "(missing)".
+        value (str, optional): Column summed into node sizes; rows with a missing value are skipped. Default is None (row counts).
+        color (str, optional): Column colouring the nodes: the value-weighted mean for a numeric column, otherwise
+            the node's single value, or "(?)" when its rows disagree. Default is None.
+        max_leaves (int, optional): About how many leaves to keep. Default is CONFIGURATIONS['MAX_LEAVES'].
+
+    Returns:
+        pd.DataFrame: One row per node with 'id', 'label', 'parent', 'value' and, with a color column, color.
+    """
+    max_leaves = max_leaves or CONFIGURATIONS['MAX_LEAVES']
+    if value:
+        df = df.dropna(subset=[value])
+    leaves = df[path].astype(object).where(df[path].notna(), '(missing)').astype(str)
+    leaves['__value'] = df[value].to_numpy(dtype=float) if value else 1.0
+    numeric_color = bool(color) and pd.api.types.is_numeric_dtype(df[color])
+    if color and numeric_color:
+        colored = df[color].notna().to_numpy()
+        leaves['__weight'] = np.where(colored, leaves['__value'], 0.0)
+        leaves['__weighted_color'] = np.where(colored, leaves['__value']*df[color].fillna(0).to_numpy(dtype=float), 0.0)
+    elif color:
+        codes, categories = pd.factorize(df[color])
+        leaves['__color_low'], leaves['__color_high'] = codes, codes
+
+    aggregations = {name: ('min' if name == '__color_low' else 'max' if name == '__color_high' else 'sum')
+                    for name in leaves.columns if name.startswith('__')}
+    leaves = leaves.groupby(path, sort=False).agg(aggregations).reset_index()
+    children = max(2, int(max_leaves**(1/len(path))))
+    for level in range(len(path)):
+        leaves = _fold_level(leaves, path, level, children, aggregations)
+
+    nodes = []
+    for level in range(len(path)):
+        keys = path[:level+1]
+        level_nodes = leaves[leaves[path[level]].notna()].groupby(keys, sort=False).agg(aggregations).reset_index()
+        labels = level_nodes[keys].to_numpy(dtype=str)
+        frame = pd.DataFrame({
+            'id': ['/'.join(row) for row in labels],
+            'label': labels[:, -1],
+            'parent': ['/'.join(row[:-1]) for row in labels],
+            'value': level_nodes['__value'].to_numpy(),
+        })
+        if color and numeric_color:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                frame[color] = level_nodes['__weighted_color'].to_numpy()/level_nodes['__weight'].to_numpy()
+        elif color:
+            low, high = level_nodes['__color_low'].to_numpy(), level_nodes['__color_high'].to_numpy()
+            frame[color] = np.where((low == high) & (low >= 0), np.asarray(categories, dtype=object)[np.maximum(low, 0)], '(?)')
+        nodes.append(frame)
+    return pd.concat(nodes, ignore_index=True)
+
+
+def radar_profiles(df, group_columns, value_columns, agg='mean'):
+    """
+    Summarizes every metric per group with one groupby and melts the result, one radar polygon per group.
+
+    Args:
+        df (pd.DataFrame): The rows.
+        group_columns (list): Columns identifying a polygon; None entries are skipped.
+        value_columns (list): The numeric metrics (the angular axis).
+        agg (str, optional): 'mean', 'median', or 'normalized' (the mean rescaled per metric so that the
+            lowest group is 0 and the highest is 1, which makes metrics of different scales comparable). Default is 'mean'.
+
+    Returns:
+        pd.DataFrame: The group columns, 'Metric' and 'Value', one row per group and metric.
+    """
+    if agg not in PROFILE_AGGREGATIONS:
+        raise ValueError(f"Unsupported aggregation '{agg}', expected one of {PROFILE_AGGREGATIONS}.")
+    group_columns = [col for col in dict.fromkeys(group_columns) if col and col not in value_columns]
+    if group_columns:
+        profiles = df.groupby(group_columns, sort=False, observed=True)[value_columns].agg('median' if agg == 'median' else 'mean')
+    else:
+        profiles = df[value_columns].agg(['median' if agg == 'median' else 'mean'])
+    if agg == 'normalized':
+        low, high = profiles.min(), profiles.max()
+        # A metric equal in every group sits in the middle instead of dividing by zero
+        profiles = ((profiles-low)/(high-low).replace(0, np.nan)).fillna(0.5).where(profiles.notna())
+    return profiles.reset_index(drop=not group_columns).melt(id_vars=group_columns, value_vars=value_columns,
+                                                             var_name='Metric', value_name='Value')
+
+
+def _grouped(values, data, groups):
+    # Groups a series by the group columns (or as one group), sorted by group
+    return values.groupby([data[col] for col in groups] if groups else np.zeros(len(values), dtype=int), sort=True, observed=True)
+
+
+def box_summaries(df, y, groups, max_outliers=None):
+    """
+    Computes the box of every group: quartiles (linear interpolation), Tukey fences and the most extreme outliers.
+
+    Args:
+        df (pd.DataFrame): The rows.
+        y (str): The numeric column summarized.
+        groups (list): Columns identifying a box (x, color); None entries are skipped.
+        max_outliers (int, optional): Most outliers kept per group, the farthest from the fences first.
+            Default is CONFIGURATIONS['MAX_OUTLIERS'].
+
+    Returns:
+        pd.DataFrame: One row per group, sorted by group, with the group columns, 'count', 'mean', 'q1', 'median', 'q3',
+            'lowerfence' and 'upperfence' (the most extreme values within 1.5 IQR of the quartiles) and 'outliers' (a list).
+    """
+    max_outliers = CONFIGURATIONS['MAX_OUTLIERS'] if max_outliers is None else max_outliers
+    groups = [col for col in dict.fromkeys(groups) if col and col != y]
+    data = df[groups+[y]].dropna()
+    values = data[y].astype(float)
+    grouped = _grouped(values, data, groups)
+    summaries = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    summaries.columns = ['q1', 'median', 'q3']
+    summaries.insert(0, 'mean', grouped.mean())
+    summaries.insert(0, 'count', grouped.size())
+
+    codes = grouped.ngroup().to_numpy()
+    v = values.to_numpy()
+    iqr = (summaries['q3']-summaries['q1']).to_numpy()
+    low_limit, high_limit = summaries['q1'].to_numpy()-1.5*iqr, summaries['q3'].to_numpy()+1.5*iqr
+    distance = np.maximum(low_limit[codes]-v, v-high_limit[codes])
+    inside = distance <= 0
+    summaries['lowerfence'] = pd.Series(v[inside]).groupby(codes[inside]).min().reindex(range(len(summaries))).to_numpy()
+    summaries['upperfence'] = pd.Series(v[inside]).groupby(codes[inside]).max().reindex(range(len(summaries))).to_numpy()
+
+    outliers = [[] for _ in range(len(summaries))]
+    out = np.flatnonzero(~inside)
+    out = out[np.lexsort((-distance[out], codes[out]))]
+    rank = np.arange(len(out))-np.searchsorted(codes[out], codes[out])
+    for code, value in zip(codes[out][rank < max_outliers], v[out][rank < max_outliers]):
+        outliers[code].append(float(value))
+    summaries['outliers'] = outliers
+    return summaries.reset_index(drop=not groups).rename(columns=dict(zip([f'level_{i}' for i in range(len(groups))], groups)))
+
+
+def kde_curves(df, y, groups, grid=None):
+    """
+    Estimates the density of every group on a fixed grid with a Gaussian kernel (Silverman's bandwidth).
+
+    Values are binned finely and the bins convolved with the kernel, so a group costs
+    O(rows + grid^2) whatever its size. The grid spans the group's range plus two bandwidths.
+
+    Args:
+        df (pd.DataFrame): The rows.
+        y (str): The numeric column.
+        groups (list): Columns identifying a violin (x, color); None entries are skipped.
+        grid (int, optional): Points per curve. Default is CONFIGURATIONS['KDE_GRID'].
+
+    Returns:
+        pd.DataFrame: One row per group, sorted by group, with the group columns, 'grid' and 'density' (arrays).
+    """
+    grid = grid or CONFIGURATIONS['KDE_GRID']
+    groups = [col for col in dict.fromkeys(groups) if col and col != y]
+    data = df[groups+[y]].dropna()
+    rows = []
+    for key, values in _grouped(data[y].astype(float), data, groups):
+        v = values.to_numpy()
+        spread = v.std(ddof=1) if len(v) > 1 else 0.0
+        iqr = np.subtract(*np.percentile(v, [75, 25]))
+        sigma = min(spread, iqr/1.349) if iqr > 0 else spread
+        if sigma == 0:
+            # A single value: a flat sliver
+            points, density = np.array([v[0], v[0]]), np.ones(2)
+        else:
+            bandwidth = 0.9*sigma*len(v)**-0.2
+            low, high = v.min()-2*bandwidth, v.max()+2*bandwidth
+            # Bins several times finer than the grid; every grid value is the mean density of its cell
+            bins = grid*CONFIGURATIONS['KDE_OVERSAMPLING']
+            step = (high-low)/bins
+            counts = np.bincount(np.minimum(((v-low)/step).astype(np.int64), bins-1), minlength=bins)
+            reach = min(bins-1, int(np.ceil(4*bandwidth/step)))
+            kernel = np.exp(-0.5*(np.arange(-reach, reach+1)*step/bandwidth)**2)
+            smoothed = np.convolve(counts, kernel/kernel.sum())[reach:reach+bins]
+            density = smoothed.reshape(grid, -1).mean(axis=1)/(len(v)*step)
+            points = low+(np.arange(grid)+0.5)*(high-low)/grid
+        key = key if isinstance(key, tuple) else (key,)
+        rows.append({**dict(zip(groups, key)), 'grid': points, 'density': density})
+    return pd.DataFrame(rows, columns=groups+['grid', 'density'])
+
+
+def swarm_offsets(values, diameter, lane_width, max_lanes):
+    """
+    Lays out the values of one beeswarm: every point gets a lane, and points in a lane are at least a diameter apart.
+
+    The values are swept in sorted order. Lanes whose last point is a diameter below the current
+    value are free again (a heap of lanes keyed by that release value), and a point takes the free lane
+    nearest the centre (a heap of lane numbers), so the layout takes O(n log n).
+
+    Args:
+        values (np.ndarray): The values along the value axis.
+        diameter (float): Marker diameter in units of the value axis.
+        lane_width (float): Distance between lanes in units of the category axis.
+        max_lanes (int): Lanes that fit the slot; beyond them lanes wrap around and points overlap.
+
+    Returns:
+        np.ndarray: The offset of every value from the centre of its slot, in the order of values.
+    """
+    lanes = np.empty(len(values), dtype=np.int64)
+    free, busy, opened = [], [], 0
+    for i in np.argsort(values, kind='stable'):
+        while busy and busy[0][0] <= values[i]:
+            heapq.heappush(free, heapq.heappop(busy)[1])
+        if free:
+            lane = heapq.heappop(free)
+        else:
+            lane, opened = opened, opened+1
+        heapq.heappush(busy, (values[i]+diameter, lane))
+        lanes[i] = lane
+    # Lanes 0, 1, 2, 3, 4, ... sit at 0, +1, -1, +2, -2, ... lane widths from the centre
+    lanes %= max(1, max_lanes)
+    return np.where(lanes % 2 == 1, 1, -1)*((lanes+1)//2)*lane_width
+
+
+def swarm_layout(df, x, y, color=None, stripmode='group', limit=None):
+    """
+    Positions every point of a vertical beeswarm plot (categories on x, values on y).
+
+    Every category has a slot of width 0.8 around its index, split between the color groups when
+    stripmode is 'group' (with 'overlay' the groups share one swarm). Marker and plot sizes from
+    CONFIGURATIONS convert pixels to axis units. Groups with more than limit points get a density strip
+    (see kde_curves) instead of points. Beyond CONFIGURATIONS['SWARM_MAX_CATEGORIES'] categories the
+    smallest share one "Other" slot, so the number of swarms is bounded; fold the color column with
+    fold_groups beforehand to bound it as well.
+
+    Args:
+        df (pd.DataFrame): The rows, without missing values in x, y and color.
+        x (str): The category column.
+        y (str): The numeric column.
+        color (str, optional): Column to color points by. Default is None.
+        stripmode (str, optional): 'group' or 'overlay'. Default is 'group'.
+        limit (int, optional): Most points per swarm. Default is the smaller of CONFIGURATIONS['SWARM_GROUP_POINTS']
+            and an equal share of CONFIGURATIONS['POINT_BUDGET'].
+
+    Returns:
+        tuple: (categories, points, strips) where categories are the x labels in axis order, points has the columns
+            x, y, color and 'position' (on the numeric category axis), and strips has one row per swarm drawn as a
+            density, with 'category', 'group' (the color value, or None), 'position', 'width', 'count', 'grid' and 'density'.
+    """
+    group = color if color and stripmode == 'group' and color != x else None
+    labels = df[x].astype(str)
+    categories = [str(value) for value in np.sort(df[x].unique())] if pd.api.types.is_numeric_dtype(df[x]) else sorted(labels.unique())
+    if len(categories) > CONFIGURATIONS['SWARM_MAX_CATEGORIES']:
+        kept = set(labels.value_counts(sort=True).index[:CONFIGURATIONS['SWARM_MAX_CATEGORIES']-1])-{'Other'}
+        labels = labels.where(labels.isin(kept), 'Other')
+        categories = [category for category in categories if category in kept]+['Other']
+    colors = list(pd.unique(df[group])) if group else [None]
+    slot = 0.8/len(colors)
+    values = df[y].to_numpy(dtype=float)
+    keys = pd.DataFrame({'category': pd.Categorical(labels, categories=categories).codes,
+                         'group': pd.Categorical(df[group], categories=colors).codes if group else 0})
+    swarms = keys.groupby(['category', 'group'], sort=True).indices
+    limit = limit or min(CONFIGURATIONS['SWARM_GROUP_POINTS'], CONFIGURATIONS['POINT_BUDGET']//max(1, len(swarms)))
+
+    width, height = CONFIGURATIONS['SWARM_PLOT_PIXELS']
+    marker = CONFIGURATIONS['SWARM_MARKER_SIZE']
+    span = np.ptp(values) if len(values) else 0.0
+    diameter = (span or 1.0)*marker/height
+    lane_width = marker*len(categories)/width
+    max_lanes = max(1, int(slot/lane_width))
+
+    positions = np.full(len(df), np.nan)
+    strips = []
+    for (category, code), rows in swarms.items():
+        center = category-0.4+slot*(code+0.5)
+        if len(rows) > limit:
+            curve = kde_curves(pd.DataFrame({y: values[rows]}), y, []).iloc[0]
+            strips.append({'category': categories[category], 'group': colors[code], 'position': center, 'width': slot,
+                           'count': len(rows), 'grid': curve['grid'], 'density': curve['density']})
+        else:
+            positions[rows] = center+swarm_offsets(values[rows], diameter, lane_width, max_lanes)
+    drawn = ~np.isnan(positions)
+    points = df.loc[drawn, [col for col in dict.fromkeys([x, y, color]) if col]].assign(position=positions[drawn])
+    strips = pd.DataFrame(strips, columns=['category', 'group', 'position', 'width', 'count', 'grid', 'density'])
+    return categories, points, strips
@@ -4,9 +4,13 @@ import os
 # Add the parent directory to the sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from fastapi import APIRouter,Form,File,UploadFile
+from fastapi import APIRouter,Form,File,UploadFile,Query,HTTPException
+from fastapi.responses import Response
 from Database import mainDatabase
 from dataItems import SignUpRequest,LoginRequest
+import offload
+from typing import Literal,Optional
+import pyarrow as pa
 import json
 db_router = APIRouter()
 
@@ -23,7 +27,7 @@ async def login(body: LoginRequest):
     Returns:
         dict: JSON with login status.
     """
-    return {'data':str(mainDatabase.check_login(body.username,body.password))}
+    return {'data':str(await offload.run('login',mainDatabase.check_login,body.username,body.password))}
 
 @db_router.get('/get_id/{username}')
 async def get_id(username: str):
@@ -36,7 +40,7 @@ async def get_id(username: str):
     Returns:
         dict: JSON with user ID.
     """
-    return {'data':str(mainDatabase.get_user_id(username))}
+    return {'data':str(await offload.run('userDetails',mainDatabase.get_user_id,username))}
 
 @db_router.post('/signup')
 async def Signup(body: SignUpRequest):
@@ -49,7 +53,7 @@ async def Signup(body: SignUpRequest):
     Returns:
         dict: JSON with signup status.
     """
-    return {'data':mainDatabase.signup(
+    return {'data':await offload.run('signup',mainDatabase.signup,
                             first_name=body.first_name,
                             last_name=body.last_name,
                             email=body.email,
@@ -71,7 +75,7 @@ async def get_name(user_id: str):
         str
             First Name
     """
-    return {'data':mainDatabase.fetch_name(user_id)}
+    return {'data':await offload.run('userDetails',mainDatabase.fetch_name,user_id)}
 
 
 @db_router.get('/get_username/{user_id}')
@@ -87,7 +91,7 @@ async def get_username(user_id: str):
         str
             Username
     """
-    return {'data':mainDatabase.fetch_username(user_id)}
+    return {'data':await offload.run('userDetails',mainDatabase.fetch_username,user_id)}
 
 @db_router.get('/get_email/{user_id}')
 async def get_email(user_id: str):
@@ -102,7 +106,7 @@ async def get_email(user_id: str):
         str
             Username
     """
-    return {'data':mainDatabase.fetch_email(user_id)}
+    return {'data':await offload.run('userDetails',mainDatabase.fetch_email,user_id)}
 
 
 
@@ -111,14 +115,14 @@ async def upload_file(file: UploadFile = File(...), user_id: str = Form(...), na
     """
     API endpoint to receive and save uploaded files.
     """
-    mainDatabase.create_project(name,user_id,file)
+    await offload.run('createProject',mainDatabase.create_project,name,user_id,file)
 
 @db_router.get("/readProjects/{user_id}")
 async def readProjects(user_id:str):
     """
     API endpoint to receive and save uploaded files.
     """
-    return json.dumps({'data':mainDatabase.read_projects(user_id)})
+    return await offload.run('readProjects',lambda:json.dumps({'data':mainDatabase.read_projects(user_id)}))
 
 
 @db_router.get("/projectDetails/{project_id}")
@@ -126,4 +130,122 @@ async def getProject(project_id:str):
     """
     API endpoint to receive and save uploaded files.
     """
-    return json.dumps({'data':mainDatabase.get_project(project_id)})
\ No newline at end of file
+    return await offload.run('projectDetails',lambda:json.dumps({'data':mainDatabase.get_project(project_id)}))
+
+
+@db_router.get("/projects/{project_id}")
+async def getProjectMetadata(project_id:str):
+    """
+    Endpoint to fetch the details of a project without its dataset.
+
+    Args:
+        project_id (str): The project's Id.
+
+    Returns:
+        dict: JSON with the name, date, number of rows and column types of the project.
+    """
+    try:
+        details=await offload.run('projectMetadata',mainDatabase.get_project_metadata,project_id)
+    except mainDatabase.MigrationRequired:
+        # Converting a legacy CSV dataset is heavy work, so it runs on the heavy pool once
+        details=await offload.run('projectMigration',mainDatabase.get_project_metadata,project_id,True)
+    if details is None:
+        raise HTTPException(status_code=404,detail="Project not found.")
+    return {'data':details}
+
+
+@db_router.get("/projects/{project_id}/rows")
+async def getProjectRows(project_id:str,
+                         offset:int=Query(0,ge=0),
+                         limit:int=Query(100,ge=1,le=10000),
+                         columns:Optional[str]=None,
+                         format:Literal['json','arrow']='json'):
+    """
+    Endpoint to fetch one window of rows of a project's dataset.
+
+    Args:
+        project_id (str): The project's Id.
+        offset (int): Index of the first row.
+        limit (int): Maximum number of rows (at most 10000).
+        columns (str, optional): Comma separated columns to return. Default is every column.
+        format (str): 'json' for {"data": {"columns", "data"}, "offset", "total_rows"},
+                      'arrow' for an Arrow IPC stream with the total in the X-Total-Rows header.
+
+    Returns:
+        Response: The window of rows.
+    """
+    result=await offload.run('projectRows',_serialize_window,project_id,offset,limit,columns,format)
+    if result is None:
+        raise HTTPException(status_code=404,detail="The project has no dataset.")
+    content,media_type,total_rows=result
+    return Response(content=content,media_type=media_type,
+                    headers={'X-Offset':str(offset),'X-Total-Rows':str(total_rows)})
+
+
+def _serialize_window(project_id,offset,limit,columns,format):
+    # Reading and serializing both block, so both run on the offload pool
+    result=mainDatabase.fetch_rows(project_id,offset,limit,columns.split(',') if columns else None)
+    if result is None:
+        return None
+    window,total_rows=result
+
+    if format=='arrow':
+        sink=pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink,window.schema) as writer:
+            writer.write_table(window)
+        return sink.getvalue().to_pybytes(),"application/vnd.apache.arrow.stream",total_rows
+
+    # The page is serialized once, straight into the response body
+    page=window.to_pandas().to_json(orient='split',index=False,date_format='iso')
+    return '{"data":%s,"offset":%d,"total_rows":%d}' % (page,offset,total_rows),"application/json",total_rows
+
+
+@db_router.get("/projects/{project_id}/report")
+async def getProjectReport(project_id:str,
+                           sections:Optional[str]=None,
+                           columns:Optional[str]=None):
+    """
+    Endpoint to fetch sections of a project's data report.
+
+    Args:
+        project_id (str): The project's Id.
+        sections (str, optional): Comma separated sections, e.g. "General Info". Default is every section.
+        columns (str, optional): Comma separated columns whose "Feature Details" to return. Default is every column.
+
+    Returns:
+        dict: JSON with the requested sections.
+    """
+    report=await offload.run('projectReport',mainDatabase.fetch_data_report_sections,project_id,
+                                                   sections.split(',') if sections else None,
+                                                   columns.split(',') if columns else None)
+    if report is None:
+        raise HTTPException(status_code=404,detail="The project has no dataset.")
+    return {'data':report}
+
+
+@db_router.post("/projects/{project_id}/report")
+async def generateProjectReport(project_id:str):
+    """
+    Endpoint to (re)build the data report of a project, e.g. for projects uploaded before reports were built at ingestion.
+
+    Args:
+        project_id (str): The project's Id.
+
+    Returns:
+        dict: JSON confirming the report was written.
+    """
+    report_path=await offload.run('generateReport',mainDatabase.generate_data_report,project_id)
+    if report_path is None:
+        raise HTTPException(status_code=404,detail="The project has no dataset.")
+    return {'data':{'generated':True}}
+
+
+@db_router.get("/metrics/offload")
+async def getOffloadMetrics():
+    """
+    Endpoint to monitor the offload pools.
+
+    Returns:
+        dict: JSON with the queue depth of every pool and the waiting, running and completed calls of every endpoint.
+    """
+    return {'data':offload.metrics()}
@@ -4,8 +4,15 @@ This file is the main router for the FastAPI application. It includes the databa
 from fastapi import FastAPI, APIRouter
 from databaseEndpoints import db_router
 from visualizationEndpoints import viz_router
+from Database import datasetCache, datasetStorage
 import uvicorn
 
+# Opt-in (DATASET_CACHE_COPY_ON_WRITE=1): pandas copy-on-write lets the dataset cache hand out
+# shallow copies, but it changes chained-assignment and inplace semantics for every pandas user
+# in this process, including the code generated and run by the coder agent. Memory-mapped arrow
+# storage requires it, otherwise every request would deep-copy the shared mapped dataset.
+datasetCache.enable_copy_on_write(required=datasetStorage.CONFIGURATIONS['FORMAT'] == 'arrow')
+
 app = FastAPI()
 
 app.include_router(db_router, prefix="")
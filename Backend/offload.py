@@ -0,0 +1,131 @@
+"""
+offload.py
+
+This module runs the blocking work of the API handlers (pandas and pyarrow I/O, bcrypt, SQLite)
+off the event loop, so one slow request does not stall every other request.
+
+Work runs on dedicated, size-bounded thread pools: a "light" pool for short account lookups and
+password checks and a "heavy" pool for uploads, dataset reads and reports, so heavy work can never
+take the threads light endpoints need. Each endpoint also has a concurrency limit; requests over
+the limit wait on an asyncio semaphore (without holding a thread), and the number of waiting and
+running requests of every endpoint is tracked for monitoring.
+
+Dependencies:
+- asyncio
+- concurrent.futures
+
+Usage:
+1. In an async handler, call `await offload.run('endpointName', blocking_function, *args)`.
+2. Call metrics() to read the queue depths and timings.
+
+Functions:
+- run: Runs a blocking call on the pool of an endpoint, within the endpoint's concurrency limit.
+- metrics: Returns the queue depth and timing counters of every pool and endpoint.
+
+Variables:
+- CONFIGURATIONS: A dictionary containing the pool sizes and the endpoint limits.
+"""
+import os
+import time
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+CONFIGURATIONS={
+    'POOL_SIZES': {
+        'light': int(os.getenv('OFFLOAD_LIGHT_WORKERS', 8)),
+        'heavy': int(os.getenv('OFFLOAD_HEAVY_WORKERS', 4)),
+    },
+    # endpoint -> (pool, maximum concurrent calls)
+    'ENDPOINT_LIMITS': {
+        'login': ('light', 8),
+        'signup': ('light', 4),
+        'userDetails': ('light', 8),
+        'createProject': ('heavy', 2),
+        'readProjects': ('light', 4),
+        'projectDetails': ('heavy', 2),
+        'projectMetadata': ('light', 4),
+        'projectMigration': ('heavy', 2),  # first metadata read of a legacy CSV project
+        'projectRows': ('heavy', 4),
+        'projectReport': ('heavy', 2),
+        'generateReport': ('heavy', 1),  # profiles a whole dataset
+    },
+    'DEFAULT_LIMIT': ('light', 4),
+}
+
+_pools = {name: ThreadPoolExecutor(max_workers=size, thread_name_prefix=f"offload-{name}")
+          for name, size in CONFIGURATIONS['POOL_SIZES'].items()}
+_semaphores = {}
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+def _endpoint_state(endpoint):
+    # Semaphores are created on first use, inside the running event loop
+    if endpoint not in _semaphores:
+        pool, limit = CONFIGURATIONS['ENDPOINT_LIMITS'].get(endpoint, CONFIGURATIONS['DEFAULT_LIMIT'])
+        _semaphores[endpoint] = (pool, asyncio.Semaphore(limit))
+        with _metrics_lock:
+            _metrics[endpoint] = {'pool': pool, 'limit': limit, 'waiting': 0, 'running': 0, 'max_waiting': 0,
+                                  'completed': 0, 'failed': 0, 'wait_seconds': 0.0, 'run_seconds': 0.0}
+    return _semaphores[endpoint]
+
+
+def _count(endpoint, **changes):
+    with _metrics_lock:
+        counters = _metrics[endpoint]
+        for name, change in changes.items():
+            counters[name] += change
+        counters['max_waiting'] = max(counters['max_waiting'], counters['waiting'])
+
+
+async def run(endpoint, function, *args, **kwargs):
+    """
+    Runs a blocking call on the pool of an endpoint, within the endpoint's concurrency limit.
+
+    Args:
+        endpoint (str): Name of the endpoint, a key of CONFIGURATIONS['ENDPOINT_LIMITS'].
+        function (callable): The blocking function.
+        *args, **kwargs: Its arguments.
+
+    Returns:
+        The result of the call; exceptions raised by the call are raised here.
+    """
+    pool, semaphore = _endpoint_state(endpoint)
+    queued_at = time.perf_counter()
+    _count(endpoint, waiting=1)
+    # Counters are released in finally blocks: a client disconnecting cancels the task with
+    # asyncio.CancelledError, which is not an Exception and would leave them incremented
+    try:
+        await semaphore.acquire()
+    finally:
+        _count(endpoint, waiting=-1)
+    try:
+        started_at = time.perf_counter()
+        _count(endpoint, running=1, wait_seconds=started_at-queued_at)
+        outcome = 'failed'
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(_pools[pool], functools.partial(function, *args, **kwargs))
+            outcome = 'completed'
+        finally:
+            _count(endpoint, running=-1, run_seconds=time.perf_counter()-started_at, **{outcome: 1})
+    finally:
+        semaphore.release()
+    return result
+
+
+def metrics():
+    """
+    Returns the queue depth and timing counters of every pool and endpoint.
+
+    Returns:
+        dict: {'pools': {pool: {'size', 'queued'}}, 'endpoints': {endpoint: counters}}. 'queued' counts
+              calls submitted to the pool and not yet started; an endpoint's 'waiting' counts requests
+              waiting for its concurrency limit.
+    """
+    with _metrics_lock:
+        endpoints = {endpoint: dict(counters) for endpoint, counters in _metrics.items()}
+    pools = {name: {'size': CONFIGURATIONS['POOL_SIZES'][name], 'queued': pool._work_queue.qsize()}
+             for name, pool in _pools.items()}
+    return {'pools': pools, 'endpoints': endpoints}
@@ -0,0 +1,83 @@
+"""
+blobStore.py
+
+This module stores uploaded datasets once per distinct content.
+
+An upload is streamed to disk while it is hashed with SHA-256, and the file is kept under
+its content hash. Projects reference the hash instead of owning a copy, so uploading the
+same dataset twice stores it once, and everything derived from a dataset (parsed frames,
+Parquet copies, data reports) can be keyed on the hash and reused across projects.
+
+Dependencies:
+- hashlib
+
+Usage:
+1. Call store_stream with the blob directory and the uploaded file object to get its content hash.
+2. Call blob_path with the blob directory and the hash to locate the stored file.
+
+Functions:
+- store_stream: Streams a file object into the store and returns its content hash.
+- blob_path: Returns the path of the blob with the given content hash.
+- hash_file: Returns the content hash of a file on disk.
+
+Variables:
+- CONFIGURATIONS: A dictionary containing the configuration of the store.
+"""
+import os
+import hashlib
+import threading
+
+CONFIGURATIONS={
+    'CHUNK_SIZE': 1024*1024,
+}
+
+
+def blob_path(directory, content_hash, extension='.csv'):
+    """
+    Returns the path of the blob with the given content hash.
+    """
+    return os.path.join(directory, f"{content_hash}{extension}")
+
+
+def hash_file(path):
+    """
+    Returns the SHA-256 hex digest of a file, reading it in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(CONFIGURATIONS['CHUNK_SIZE']), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_stream(directory, fileobj, extension='.csv'):
+    """
+    Streams a file object into the store, hashing it on the way.
+
+    The content is written to a temporary file and renamed to its hash once complete,
+    so a blob path only ever points to a complete file. If a blob with the same hash
+    already exists the temporary file is discarded.
+
+    Args:
+        directory (str): Directory of the blobs.
+        fileobj (file-like): The binary stream to store, e.g. UploadFile.file.
+        extension (str, optional): Extension of the stored file. Default is '.csv'.
+
+    Returns:
+        str: The SHA-256 hex digest of the content.
+    """
+    os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f".upload.{os.getpid()}.{threading.get_ident()}.tmp")
+    digest = hashlib.sha256()
+    try:
+        with open(temp_path, 'wb') as buffer:
+            for chunk in iter(lambda: fileobj.read(CONFIGURATIONS['CHUNK_SIZE']), b''):
+                digest.update(chunk)
+                buffer.write(chunk)
+        content_hash = digest.hexdigest()
+        if not os.path.exists(blob_path(directory, content_hash, extension)):
+            os.replace(temp_path, blob_path(directory, content_hash, extension))
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return content_hash
@@ -0,0 +1,152 @@
+"""
+correlationEngine.py
+
+This module computes the Pearson correlation matrix of the numeric columns of a dataset once per
+dataset version and serves bounded slices of it (the strongest pairs, or the most correlated
+columns in clustered order) for the correlation heatmap.
+
+The dataset is read in blocks of rows; every block is reduced to pairwise-complete sums with
+matrix products (see dataProfiler.correlation_sums), so missing values only exclude the pairs
+they belong to and memory stays bounded by one block, however many rows there are.
+Matrices are kept in a small LRU keyed by dataset and version.
+
+Dependencies:
+- numpy
+- pyarrow
+
+Usage:
+1. Call get_correlation(source, version, parquet_path) to get the (cached) matrix of a dataset.
+2. Call top_pairs or select_columns and seriation_order to pick the slice to draw.
+
+Functions:
+- compute_correlation: Computes the correlation matrix of the numeric columns of a Parquet dataset.
+- get_correlation: Returns the correlation matrix of a dataset version, computing it on a miss.
+- top_pairs: Returns the k most strongly correlated column pairs.
+- rank_columns: Ranks columns by how correlated they are with the others.
+- select_columns: Returns the columns most correlated with the others.
+- seriation_order: Orders columns so that correlated columns sit next to each other.
+
+Variables:
+- CONFIGURATIONS: A dictionary containing the configuration of the engine.
+"""
+import threading
+from collections import OrderedDict
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from Database import dataProfiler
+
+CONFIGURATIONS={
+    'BLOCK_ROWS': 100000,
+    'MAX_CACHED_MATRICES': 8,
+}
+
+_cache=OrderedDict()  # (source, version) -> (columns, matrix)
+_cache_lock=threading.Lock()
+
+
+def compute_correlation(parquet_path):
+    """
+    Computes the pairwise-complete Pearson correlation matrix of the numeric columns of a Parquet dataset.
+
+    Args:
+        parquet_path (str): Path of the Parquet dataset.
+
+    Returns:
+        tuple: (list of numeric columns, k x k matrix with NaN where a pair has fewer than two rows or no variance)
+    """
+    parquet_file = pq.ParquetFile(parquet_path)
+    schema = parquet_file.schema_arrow
+    columns = [field.name for field in schema if pa.types.is_integer(field.type) or pa.types.is_floating(field.type)]
+    sums = None
+    if columns:
+        for batch in parquet_file.iter_batches(batch_size=CONFIGURATIONS['BLOCK_ROWS'], columns=columns):
+            block_sums = dataProfiler.correlation_sums(batch.to_pandas().to_numpy(dtype=float))
+            # The first block is the accumulator, so later blocks are merged around its column means
+            sums = block_sums if sums is None else dataProfiler.merge_correlation_sums(sums, block_sums)
+    if sums is None:
+        sums = dataProfiler.correlation_sums(np.empty((0, len(columns))))
+    return columns, dataProfiler.correlation_from_sums(sums)
+
+
+def get_correlation(source, version, parquet_path):
+    """
+    Returns the correlation matrix of a dataset version, computing it on a miss.
+
+    Args:
+        source (hashable): Identifies the dataset, e.g. its dataset key.
+        version (hashable): Changes whenever the dataset changes, e.g. the file mtime and size.
+        parquet_path (str): Path of the Parquet dataset, read on a miss.
+
+    Returns:
+        tuple: (list of numeric columns, matrix); the matrix is shared and must not be modified.
+    """
+    key = (source, version)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    result = compute_correlation(parquet_path)
+    result[1].setflags(write=False)
+    with _cache_lock:
+        # Older versions of the same dataset will not be asked for again
+        for stale in [k for k in _cache if k[0] == source]:
+            del _cache[stale]
+        _cache[key] = result
+        while len(_cache) > CONFIGURATIONS['MAX_CACHED_MATRICES']:
+            _cache.popitem(last=False)
+    return result
+
+
+def top_pairs(columns, matrix, k=20):
+    """
+    Returns the k column pairs with the strongest correlation (largest absolute value).
+
+    Returns:
+        list: (column, column, correlation) tuples, strongest first.
+    """
+    rows, cols = np.triu_indices(len(columns), k=1)
+    strengths = np.abs(matrix[rows, cols])
+    valid = np.flatnonzero(~np.isnan(strengths))
+    if len(valid) > k:
+        valid = valid[np.argpartition(-strengths[valid], k-1)[:k]]
+    valid = valid[np.argsort(-strengths[valid], kind='stable')]
+    return [(columns[rows[i]], columns[cols[i]], float(matrix[rows[i], cols[i]])) for i in valid]
+
+
+def rank_columns(matrix):
+    """
+    Returns the positions of the columns, most correlated with the others first
+    (largest sum of squared correlations with the other columns).
+    """
+    squared = np.nan_to_num(matrix)**2
+    np.fill_diagonal(squared, 0.0)
+    return np.argsort(-squared.sum(axis=1), kind='stable')
+
+
+def select_columns(matrix, max_columns):
+    """
+    Returns the positions of the max_columns columns most correlated with the others, in their original order.
+    """
+    if len(matrix) <= max_columns:
+        return np.arange(len(matrix))
+    return np.sort(rank_columns(matrix)[:max_columns])
+
+
+def seriation_order(matrix):
+    """
+    Orders columns so that strongly correlated columns sit next to each other.
+
+    Columns are sorted by the Fiedler vector of the graph whose edge weights are the absolute
+    correlations (spectral seriation), which places tightly correlated groups in contiguous blocks.
+
+    Returns:
+        np.ndarray: Positions of the columns in display order.
+    """
+    if len(matrix) < 3:
+        return np.arange(len(matrix))
+    weights = np.abs(np.nan_to_num(matrix))
+    np.fill_diagonal(weights, 0.0)
+    laplacian = np.diag(weights.sum(axis=1))-weights
+    _, vectors = np.linalg.eigh(laplacian)
+    return np.argsort(vectors[:, 1], kind='stable')
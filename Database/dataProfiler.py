@@ -0,0 +1,659 @@
+"""
+dataProfiler.py
+
+This module builds the data report (Database/dataReports/data_report_{key}.json) that the
+designer and coder agents read: general info, per-feature details, correlations and
+numeric-categorical relationships.
+
+The dataset is read from its Parquet copy one row group at a time. Every row group is reduced
+to mergeable aggregates (per column, per categorical/numeric column pair, and the correlation
+sums of the numeric columns), row groups are spread across a process pool, and the aggregates
+are merged into the report. Memory stays bounded by a row group plus the aggregates.
+
+Exact aggregates are value counts: unique counts, percentiles, mean and standard deviation all
+come out exactly as pandas would compute them on the full column. A column (or a group of a
+numeric column) whose counts grow past CONFIGURATIONS['MAX_EXACT_VALUES'] distinct values
+switches to sketches, so memory is bounded by that budget and not by cardinality.
+
+For datasets too large to count exactly, the approximate mode fills unique counts, percentiles,
+outlier bounds and value distributions from mergeable sketches (see sketches.py). Every
+estimated field is listed with its error bound under "Approximation Error Bounds".
+
+Given a state directory, the aggregates of every column chunk are stored under the chunk's
+fingerprint (see profileStore.py). Profiling a dataset with appended rows or a few changed
+columns then only computes the aggregates of the new or changed chunks.
+
+Dependencies:
+- pandas
+- numpy
+- pyarrow
+- msgpack
+- concurrent.futures
+
+Usage:
+1. Call profile_dataset with the path of a Parquet dataset to get the report as a dictionary.
+
+Functions:
+- profile_dataset: Builds the data report of a Parquet dataset.
+- profile_row_group: Builds (or loads) the mergeable aggregates of one row group.
+- merge_row_group_aggregates: Merges the aggregates of two row groups.
+
+Variables:
+- CONFIGURATIONS: A dictionary containing the configuration of the profiler.
+"""
+import os
+import math
+import collections
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from Database import sketches, profileStore
+
+CONFIGURATIONS={
+    'MAX_WORKERS': int(os.getenv('PROFILER_MAX_WORKERS', os.cpu_count() or 1)),
+    'MIN_ROWS_FOR_POOL': 200000,  # smaller datasets are profiled in-process, the pool would cost more than it saves
+    'MAX_DISTRIBUTION_VALUES': 20,  # values listed in "Value Distribution"
+    'MAX_CATEGORIES': 20,  # categorical columns with more distinct values are left out of the relationships
+    'MODE': os.getenv('PROFILER_MODE', 'auto'),  # 'exact', 'approximate' or 'auto'
+    'APPROXIMATE_ABOVE_ROWS': 5000000,  # 'auto' switches to sketches above this many rows
+    'HLL_PRECISION': 14,  # 2^14 registers: 0.81% relative standard error on unique counts
+    'KLL_K': 200,
+    'KLL_RANK_ERROR': 0.0165,  # normalized rank error of KLL with k=200 (99% confidence)
+    'FREQUENT_ITEMS_CAPACITY': 1000,
+    'MAX_STORED_VALUES': 200000,  # row-group aggregates counting more distinct values are recomputed instead of stored
+    'MAX_EXACT_VALUES': int(os.getenv('PROFILER_MAX_EXACT_VALUES', 100000)),  # distinct values counted per column before switching to sketches
+}
+
+PERCENTILES={'25th Percentile': 0.25, '50th Percentile': 0.5, '75th Percentile': 0.75}
+
+
+def _to_builtin(value):
+    # JSON cannot carry numpy scalars or NaN
+    if isinstance(value, dict):
+        return {str(k): _to_builtin(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_builtin(v) for v in value]
+    if isinstance(value, (np.bool_, bool)):
+        return bool(value)
+    if isinstance(value, (np.integer,)):
+        return int(value)
+    if isinstance(value, (np.floating, float)):
+        return None if math.isnan(value) or math.isinf(value) else float(value)
+    return value
+
+
+def _column_kind(arrow_type):
+    if pa.types.is_boolean(arrow_type):
+        return 'bool'
+    if pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type):
+        return 'numeric'
+    return 'categorical'
+
+
+def _pandas_dtype(arrow_type):
+    return str(pa.schema([pa.field('c', arrow_type)]).empty_table().to_pandas()['c'].dtype)
+
+
+def _value_at_ranks(values, cumulative_counts, ranks):
+    # values are sorted; the value at 0-based rank r is the first one whose cumulative count exceeds r
+    return values[np.searchsorted(cumulative_counts, ranks, side='right')]
+
+
+def numeric_summary(value_counts):
+    """
+    Computes the descriptive statistics of a numeric column from its value counts.
+
+    Percentiles use linear interpolation between the closest ranks, like pandas.
+
+    Args:
+        value_counts (pd.Series): Count of every non-missing value.
+
+    Returns:
+        dict: "Descriptive Statistics" and "Outliers" sections of the report.
+    """
+    value_counts = value_counts[value_counts > 0].sort_index()
+    values = value_counts.index.to_numpy(dtype=float)
+    counts = value_counts.to_numpy(dtype=float)
+    n = counts.sum()
+    if n == 0:
+        return {'Descriptive Statistics': {}, 'Outliers': {}}
+    mean = (values*counts).sum()/n
+    std = math.sqrt((((values-mean)**2)*counts).sum()/(n-1)) if n > 1 else float('nan')
+
+    cumulative_counts = np.cumsum(counts)
+    quantiles = {}
+    for name, q in PERCENTILES.items():
+        position = (n-1)*q
+        lower = math.floor(position)
+        low_value, high_value = _value_at_ranks(values, cumulative_counts, [lower, min(lower+1, n-1)])
+        quantiles[name] = low_value+(position-lower)*(high_value-low_value)
+
+    iqr = quantiles['75th Percentile']-quantiles['25th Percentile']
+    return {
+        'Descriptive Statistics': {
+            'Mean': mean,
+            'Median': quantiles['50th Percentile'],
+            'Standard Deviation': std,
+            'Min': values[0],
+            'Max': values[-1],
+            **quantiles,
+        },
+        'Outliers': {
+            'Lower Bound': quantiles['25th Percentile']-1.5*iqr,
+            'Upper Bound': quantiles['75th Percentile']+1.5*iqr,
+        },
+    }
+
+
+def feature_details(kind, dtype, value_counts, missing):
+    """
+    Builds the "Feature Details" entry of a column from its value counts.
+
+    Args:
+        kind (str): 'numeric', 'bool' or 'categorical'.
+        dtype (str): The pandas dtype of the column.
+        value_counts (pd.Series): Count of every non-missing value.
+        missing (int): Number of missing values.
+
+    Returns:
+        dict: The feature details of the column.
+    """
+    details = {
+        'Column Description': None,  # written by the LLM layer, the data alone cannot tell
+        'Data Type': dtype,
+        'Unique Values Count': int((value_counts > 0).sum()),
+        'Missing Values': int(missing),
+    }
+    if kind == 'numeric':
+        details.update(numeric_summary(value_counts))
+    elif kind == 'bool':
+        details['Boolean Statistics'] = {
+            'Count True': int(value_counts.get(True, 0)),
+            'Count False': int(value_counts.get(False, 0)),
+        }
+    else:
+        distribution = value_counts[value_counts > 0].sort_values(ascending=False, kind='stable')
+        details['Value Distribution'] = {str(k): int(v) for k, v in distribution.head(CONFIGURATIONS['MAX_DISTRIBUTION_VALUES']).items()}
+        details['Mode'] = str(distribution.index[0]) if len(distribution) else None
+    return details
+
+
+def _aggregate_tag(mode):
+    # Stored aggregates are only reused with the settings they were built with
+    if mode == 'exact':
+        return 'exact'
+    # v2: numbers are hashed as float64, states hashed before that would count integers twice
+    return f"approximate-v2-{CONFIGURATIONS['HLL_PRECISION']}-{CONFIGURATIONS['KLL_K']}-{CONFIGURATIONS['FREQUENT_ITEMS_CAPACITY']}"
+
+
+def _non_missing(series, kind):
+    values = series.dropna()
+    # Categories are reported as strings; counting them as strings keeps stored aggregates plain
+    return values.astype(str) if kind == 'categorical' else values
+
+
+def _sketched_counts(counts, kind):
+    # The approximate aggregate of counted values, for columns that outgrow the exact budget
+    distinct = sketches.HyperLogLog(CONFIGURATIONS['HLL_PRECISION'])
+    distinct.update(counts.index.to_numpy())
+    if kind == 'numeric':
+        values = sketches.NumericSketch(CONFIGURATIONS['KLL_K'])
+        values.update_counts(counts.index.to_numpy(dtype=float), counts.to_numpy())
+    else:
+        values = sketches.FrequentItems(CONFIGURATIONS['FREQUENT_ITEMS_CAPACITY'])
+        values.update_counts(counts)
+    return {'distinct': distinct, 'values': values}
+
+
+def _numeric_counts_sketch(counts):
+    sketch = sketches.NumericSketch(CONFIGURATIONS['KLL_K'])
+    sketch.update_counts(counts.index.to_numpy(dtype=float), counts.to_numpy())
+    return sketch
+
+
+def column_aggregate(series, kind, mode):
+    """
+    Builds the mergeable aggregate of one chunk of a column.
+
+    Exact aggregates hold the count of every value; approximate ones hold a HyperLogLog and a
+    NumericSketch (numeric columns) or FrequentItems summary (categorical columns). Boolean
+    columns always hold their counts, and exact aggregates with more than
+    CONFIGURATIONS['MAX_EXACT_VALUES'] distinct values are approximate ones.
+    """
+    values = _non_missing(series, kind)
+    aggregate = {'missing': len(series)-len(values)}
+    if mode == 'exact' or kind == 'bool':
+        aggregate['counts'] = values.value_counts()
+        if kind != 'bool' and len(aggregate['counts']) > CONFIGURATIONS['MAX_EXACT_VALUES']:
+            aggregate.update(_sketched_counts(aggregate.pop('counts'), kind))
+        return aggregate
+    aggregate['distinct'] = sketches.HyperLogLog(CONFIGURATIONS['HLL_PRECISION'])
+    aggregate['distinct'].update(values.to_numpy())
+    if kind == 'numeric':
+        aggregate['values'] = sketches.NumericSketch(CONFIGURATIONS['KLL_K'])
+        aggregate['values'].update(values.to_numpy())
+    else:
+        aggregate['values'] = sketches.FrequentItems(CONFIGURATIONS['FREQUENT_ITEMS_CAPACITY'])
+        aggregate['values'].update(values)
+    return aggregate
+
+
+def merge_column_aggregates(aggregate, other, kind=None):
+    """
+    Merges the aggregate of another chunk of the same column into aggregate.
+
+    Counts merged with a sketch, or grown past CONFIGURATIONS['MAX_EXACT_VALUES'] distinct values
+    (kind is then needed to pick the sketches), are turned into sketches.
+    """
+    aggregate['missing'] += other['missing']
+    if 'counts' in aggregate and 'counts' in other:
+        aggregate['counts'] = aggregate['counts'].add(other['counts'], fill_value=0)
+        if kind in ('numeric', 'categorical') and len(aggregate['counts']) > CONFIGURATIONS['MAX_EXACT_VALUES']:
+            aggregate.update(_sketched_counts(aggregate.pop('counts'), kind))
+        return aggregate
+    if 'counts' in aggregate:
+        aggregate.update(_sketched_counts(aggregate.pop('counts'), 'numeric' if isinstance(other['values'], sketches.NumericSketch) else 'categorical'))
+    if 'counts' in other:
+        other = {**other, **_sketched_counts(other['counts'], 'numeric' if isinstance(aggregate['values'], sketches.NumericSketch) else 'categorical')}
+    aggregate['distinct'].merge(other['distinct'])
+    aggregate['values'].merge(other['values'])
+    return aggregate
+
+
+def pair_aggregate(categories, numbers, mode):
+    """
+    Builds the mergeable aggregate of one chunk of a numeric column grouped by a categorical column.
+
+    Returns:
+        dict or None: {group: value counts (exact) or NumericSketch (approximate)}, or None when the chunk
+        alone has more than CONFIGURATIONS['MAX_CATEGORIES'] groups (the pair is then left out of the report).
+    """
+    frame = pd.DataFrame({'group': categories, 'value': numbers}).dropna(subset=['group'])
+    if frame['group'].nunique() > CONFIGURATIONS['MAX_CATEGORIES']:
+        return None
+    groups = {}
+    for group, values in frame.groupby('group', sort=False)['value']:
+        values = values.dropna()
+        if mode == 'exact':
+            groups[group] = values.value_counts()
+            if len(groups[group]) > CONFIGURATIONS['MAX_EXACT_VALUES']:
+                groups[group] = _numeric_counts_sketch(groups[group])
+        else:
+            groups[group] = sketches.NumericSketch(CONFIGURATIONS['KLL_K'])
+            groups[group].update(values.to_numpy())
+    return groups
+
+
+def merge_pair_aggregates(groups, other):
+    """
+    Merges the aggregate of another chunk of the same column pair into groups.
+    """
+    if groups is None or other is None:
+        return None
+    for group, aggregate in other.items():
+        if group not in groups:
+            groups[group] = aggregate
+        elif isinstance(aggregate, pd.Series) and isinstance(groups[group], pd.Series):
+            groups[group] = groups[group].add(aggregate, fill_value=0)
+            if len(groups[group]) > CONFIGURATIONS['MAX_EXACT_VALUES']:
+                groups[group] = _numeric_counts_sketch(groups[group])
+        else:
+            # Counts meeting a sketch become a sketch
+            if isinstance(groups[group], pd.Series):
+                groups[group] = _numeric_counts_sketch(groups[group])
+            groups[group].merge(_numeric_counts_sketch(aggregate) if isinstance(aggregate, pd.Series) else aggregate)
+    return groups if len(groups) <= CONFIGURATIONS['MAX_CATEGORIES'] else None
+
+
+def correlation_sums(values):
+    """
+    Builds the pairwise-complete Pearson sums of one chunk of the numeric columns.
+
+    Values are shifted by the chunk's column means to keep the sums well conditioned;
+    the shift is kept with the sums so that chunks with different shifts can be merged.
+
+    Args:
+        values (np.ndarray): The chunk, one column per numeric column, NaN for missing values.
+
+    Returns:
+        dict: n, sx, sxx, sxy matrices (k x k) and the shift (k).
+    """
+    k = values.shape[1]
+    present = (~np.isnan(values)).sum(axis=0)
+    shift = np.where(present > 0, np.nansum(values, axis=0)/np.maximum(present, 1), 0.0)
+    sums = {name: np.zeros((k, k)) for name in ('n', 'sx', 'sxx', 'sxy')}
+    accumulate_correlation_sums(sums, values-shift)
+    sums['shift'] = shift
+    return sums
+
+
+def _recenter_correlation_sums(sums, shift):
+    # Sums over (x - a) rewritten as sums over (x - b): x - b = (x - a) + d with d = a - b
+    d = sums['shift']-shift
+    n, sx = sums['n'], sums['sx']
+    sums['sxy'] = sums['sxy']+d[None, :]*sx+d[:, None]*sx.T+n*np.outer(d, d)
+    sums['sxx'] = sums['sxx']+2*d[:, None]*sx+n*(d**2)[:, None]
+    sums['sx'] = sx+n*d[:, None]
+    sums['shift'] = shift
+
+
+def merge_correlation_sums(sums, other):
+    """
+    Merges the sums of another chunk of the same numeric columns into sums.
+    """
+    # Columns sums has no values for yet take the shift of the chunk that brings them; recentring
+    # their (all zero) sums is exact, and every later chunk is then merged around a real location
+    empty = np.diag(sums['n']) == 0
+    if empty.any():
+        _recenter_correlation_sums(sums, np.where(empty, other['shift'], sums['shift']))
+    other = dict(other)
+    _recenter_correlation_sums(other, sums['shift'])
+    for name in ('n', 'sx', 'sxx', 'sxy'):
+        sums[name] = sums[name]+other[name]
+    return sums
+
+
+def accumulate_correlation_sums(sums, values):
+    """
+    Adds one chunk of (shifted) values to the pairwise-complete correlation sums.
+
+    Entry (i, j) of every matrix only counts rows where both column i and column j are present.
+    """
+    mask = ~np.isnan(values)
+    filled = np.where(mask, values, 0.0)
+    weights = mask.astype(float)
+    sums['n'] += weights.T @ weights
+    sums['sx'] += filled.T @ weights  # sum of column i over rows where j is present
+    sums['sxx'] += (filled**2).T @ weights
+    sums['sxy'] += filled.T @ filled
+
+
+def correlation_from_sums(sums):
+    """
+    Turns accumulated sums into a Pearson correlation matrix; pairs with fewer than two rows are NaN.
+    """
+    n, sx, sxx, sxy = sums['n'], sums['sx'], sums['sxx'], sums['sxy']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = n*sxy-sx*sx.T
+        variance_x = n*sxx-sx**2
+        variance_y = variance_x.T
+        correlation = covariance/np.sqrt(variance_x*variance_y)
+    correlation[n < 2] = np.nan
+    correlation = np.clip(correlation, -1.0, 1.0)
+    diagonal = np.diag(variance_x) > 0
+    correlation[np.diag_indices_from(correlation)] = np.where(diagonal, 1.0, np.nan)
+    return correlation
+
+
+def _encode(value):
+    # Aggregates as plain msgpack values: Series, arrays and sketches are tagged dictionaries
+    if isinstance(value, pd.Series):
+        return {'__series__': [value.index.tolist(), value.to_numpy().tolist()]}
+    if isinstance(value, np.ndarray):
+        return {'__array__': [list(value.shape), value.astype(float).tobytes()]}
+    if isinstance(value, (sketches.HyperLogLog, sketches.FrequentItems, sketches.NumericSketch)):
+        return {'__sketch__': [type(value).__name__, value.to_state()]}
+    if isinstance(value, dict):
+        return {key: _encode(item) for key, item in value.items()}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        if '__series__' in value:
+            index, values = value['__series__']
+            return pd.Series(values, index=index, dtype=float)
+        if '__array__' in value:
+            shape, data = value['__array__']
+            return np.frombuffer(data, dtype=float).reshape(shape).copy()
+        if '__sketch__' in value:
+            name, state = value['__sketch__']
+            return getattr(sketches, name).from_state(state)
+        return {key: _decode(item) for key, item in value.items()}
+    return value
+
+
+def _stored_values(aggregate):
+    # Number of counted values held by an aggregate, to keep near-unique columns out of the store
+    if isinstance(aggregate, pd.Series):
+        return len(aggregate)
+    if isinstance(aggregate, dict):
+        return sum(_stored_values(item) for item in aggregate.values())
+    return 0
+
+
+def profile_row_group(parquet_path, row_group, mode, state_directory=None):
+    """
+    Builds the mergeable aggregates of one row group: one per column, one per categorical/numeric
+    column pair, and the correlation sums of the numeric columns.
+
+    With a state directory, every aggregate is looked up under the fingerprints of the column chunks it
+    is built from, and only the missing ones are computed (reading only the columns they need) and stored.
+
+    Args:
+        parquet_path (str): Path of the Parquet dataset.
+        row_group (int): Index of the row group.
+        mode (str): 'exact' or 'approximate'.
+        state_directory (str, optional): Directory of the profileStore. Default is None (nothing is stored).
+
+    Returns:
+        dict: {('column', c): ..., ('pair', categorical, numeric): ..., ('correlation',): ...}
+    """
+    parquet_file = pq.ParquetFile(parquet_path)
+    schema = parquet_file.schema_arrow
+    kinds = {column: _column_kind(schema.field(column).type) for column in schema.names}
+    numeric_columns = [c for c, kind in kinds.items() if kind == 'numeric']
+    categorical_columns = [c for c, kind in kinds.items() if kind == 'categorical']
+    sources = {('column', c): [c] for c in schema.names}
+    sources.update({('pair', c, n): [c, n] for c in categorical_columns for n in numeric_columns})
+    sources[('correlation',)] = numeric_columns
+
+    aggregates, state_keys = {}, {}
+    if state_directory is not None:
+        fingerprints = profileStore.column_chunk_fingerprints(parquet_path, row_group)
+        tag = _aggregate_tag(mode)
+        for key, columns in sources.items():
+            state_keys[key] = profileStore.combine_fingerprints(tag, *key[:1], *[fingerprints[c] for c in columns])
+            state = profileStore.load(state_directory, state_keys[key])
+            if state is not None:
+                aggregates[key] = _decode(state['aggregate'])
+
+    missing_keys = [key for key in sources if key not in aggregates]
+    if not missing_keys:
+        return aggregates
+    columns = [c for c in schema.names if any(c in sources[key] for key in missing_keys)]
+    chunk = parquet_file.read_row_group(row_group, columns=columns).to_pandas()
+    for key in missing_keys:
+        if key[0] == 'column':
+            aggregate = column_aggregate(chunk[key[1]], kinds[key[1]], mode)
+        elif key[0] == 'pair':
+            aggregate = pair_aggregate(_non_missing(chunk[key[1]], 'categorical'), chunk[key[2]], mode)
+        else:
+            aggregate = correlation_sums(chunk[numeric_columns].to_numpy(dtype=float))
+        aggregates[key] = aggregate
+        if state_keys and _stored_values(aggregate) <= CONFIGURATIONS['MAX_STORED_VALUES']:
+            profileStore.save(state_directory, state_keys[key], {'aggregate': _encode(aggregate)})
+    return aggregates
+
+
+def merge_row_group_aggregates(aggregates, other, kinds=None):
+    """
+    Merges the aggregates of another row group of the same dataset into aggregates.
+
+    kinds ({column: 'numeric', 'bool' or 'categorical'}) lets column counts that outgrow the exact budget switch to sketches.
+    """
+    for key, aggregate in other.items():
+        if key not in aggregates:
+            aggregates[key] = aggregate
+        elif key[0] == 'column':
+            merge_column_aggregates(aggregates[key], aggregate, (kinds or {}).get(key[1]))
+        elif key[0] == 'pair':
+            aggregates[key] = merge_pair_aggregates(aggregates[key], aggregate)
+        else:
+            merge_correlation_sums(aggregates[key], aggregate)
+    return aggregates
+
+
+def _describe_counts(value_counts):
+    # The statistics of DataFrame.describe, from value counts
+    statistics = numeric_summary(value_counts)['Descriptive Statistics']
+    nan = float('nan')
+    return {'count': float(value_counts.sum()), 'mean': statistics.get('Mean', nan),
+            'std': statistics.get('Standard Deviation', nan), 'min': statistics.get('Min', nan),
+            '25%': statistics.get('25th Percentile', nan), '50%': statistics.get('50th Percentile', nan),
+            '75%': statistics.get('75th Percentile', nan), 'max': statistics.get('Max', nan)}
+
+
+def _numeric_sketch_summary(sketch):
+    q1, median, q3 = sketch.quantile_sketch.quantiles(list(PERCENTILES.values()))
+    return {'count': sketch.n, 'mean': sketch.mean if sketch.n else float('nan'), 'std': sketch.std(),
+            'min': sketch.min if sketch.n else float('nan'), '25%': q1, '50%': median, '75%': q3,
+            'max': sketch.max if sketch.n else float('nan')}
+
+
+def approximate_feature_details(kind, dtype, aggregate):
+    """
+    Builds the "Feature Details" entry of a column from its approximate aggregate.
+
+    Fields that are estimates are listed, with their error bound, under "Approximation Error Bounds".
+    """
+    if kind == 'bool':
+        return feature_details(kind, dtype, aggregate['counts'], aggregate['missing'])
+    details = {
+        'Column Description': None,
+        'Data Type': dtype,
+        'Unique Values Count': aggregate['distinct'].estimate(),
+        'Missing Values': int(aggregate['missing']),
+    }
+    error_bounds = {'Unique Values Count': f"relative standard error {1.04/math.sqrt(2**CONFIGURATIONS['HLL_PRECISION']):.2%} (HyperLogLog)"}
+    if kind == 'numeric':
+        summary = _numeric_sketch_summary(aggregate['values'])
+        if summary['count'] == 0:
+            details.update({'Descriptive Statistics': {}, 'Outliers': {}})
+        else:
+            iqr = summary['75%']-summary['25%']
+            details['Descriptive Statistics'] = {
+                'Mean': summary['mean'],
+                'Median': summary['50%'],
+                'Standard Deviation': summary['std'],
+                'Min': summary['min'],
+                'Max': summary['max'],
+                '25th Percentile': summary['25%'],
+                '50th Percentile': summary['50%'],
+                '75th Percentile': summary['75%'],
+            }
+            details['Outliers'] = {'Lower Bound': summary['25%']-1.5*iqr, 'Upper Bound': summary['75%']+1.5*iqr}
+            rank_error = f"rank error within {CONFIGURATIONS['KLL_RANK_ERROR']:.2%} of the requested percentile (KLL, 99% confidence)"
+            error_bounds.update({'Median': rank_error, 'Percentiles': rank_error,
+                                 'Outliers': 'computed from the approximate 25th and 75th percentiles'})
+    else:
+        distribution = aggregate['values'].counts.sort_values(ascending=False, kind='stable')
+        details['Value Distribution'] = {str(k): int(v) for k, v in distribution.head(CONFIGURATIONS['MAX_DISTRIBUTION_VALUES']).items()}
+        details['Mode'] = str(distribution.index[0]) if len(distribution) else None
+        error_bounds.update({'Value Distribution': f"counts are underestimated by at most {int(aggregate['values'].error_bound())} (Misra-Gries)",
+                             'Mode': 'most frequent value of the approximate distribution'})
+    details['Approximation Error Bounds'] = error_bounds
+    return details
+
+
+def _run(executor, in_flight, function, *iterables):
+    # Results are yielded in order. executor.map would submit every call at once and hold every result
+    # that finishes ahead of the merge, so at most in_flight calls are submitted ahead of it instead
+    if executor is None:
+        yield from map(function, *iterables)
+        return
+    pending = collections.deque()
+    try:
+        for args in zip(*iterables):
+            pending.append(executor.submit(function, *args))
+            if len(pending) >= in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def profile_dataset(parquet_path, max_workers=None, mode=None, state_directory=None):
+    """
+    Builds the data report of a Parquet dataset.
+
+    Args:
+        parquet_path (str): Path of the Parquet dataset.
+        max_workers (int, optional): Size of the process pool. Default is CONFIGURATIONS['MAX_WORKERS'].
+        mode (str, optional): 'exact', 'approximate' (mergeable sketches), or 'auto'
+            (approximate above CONFIGURATIONS['APPROXIMATE_ABOVE_ROWS'] rows). Default is CONFIGURATIONS['MODE'].
+        state_directory (str, optional): Directory of the profileStore. When given, the aggregates of
+            unchanged column chunks are reused and only new or changed ones are computed.
+
+    Returns:
+        dict: The report, with the same sections as the reports the agents read.
+    """
+    parquet_file = pq.ParquetFile(parquet_path)
+    schema = parquet_file.schema_arrow
+    columns = schema.names
+    kinds = {column: _column_kind(schema.field(column).type) for column in columns}
+    numeric_columns = [c for c in columns if kinds[c] == 'numeric']
+    num_rows = parquet_file.metadata.num_rows
+    num_row_groups = parquet_file.metadata.num_row_groups
+    max_workers = max_workers or CONFIGURATIONS['MAX_WORKERS']
+    mode = mode or CONFIGURATIONS['MODE']
+    if mode == 'auto':
+        mode = 'approximate' if num_rows > CONFIGURATIONS['APPROXIMATE_ABOVE_ROWS'] else 'exact'
+
+    aggregates = {('column', c): column_aggregate(pd.Series([], dtype=object), kinds[c], mode) for c in columns}
+    aggregates[('correlation',)] = correlation_sums(np.empty((0, len(numeric_columns))))
+    executor = None
+    if max_workers > 1 and num_rows >= CONFIGURATIONS['MIN_ROWS_FOR_POOL']:
+        # Spawned workers: the server forking with its thread pools running could copy held locks
+        executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        for row_group_aggregates in _run(executor, 2*max_workers, profile_row_group, [parquet_path]*num_row_groups, range(num_row_groups),
+                                         [mode]*num_row_groups, [state_directory]*num_row_groups):
+            merge_row_group_aggregates(aggregates, row_group_aggregates, kinds)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    details = {}
+    for column in columns:
+        dtype = _pandas_dtype(schema.field(column).type)
+        aggregate = aggregates[('column', column)]
+        if 'counts' in aggregate:
+            details[column] = feature_details(kinds[column], dtype, aggregate['counts'], aggregate['missing'])
+        else:
+            details[column] = approximate_feature_details(kinds[column], dtype, aggregate)
+
+    relationships = {}
+    for key, groups in aggregates.items():
+        if key[0] != 'pair' or groups is None or details[key[1]]['Unique Values Count'] > CONFIGURATIONS['MAX_CATEGORIES']:
+            continue
+        summaries = {group: _describe_counts(aggregate) if isinstance(aggregate, pd.Series) else _numeric_sketch_summary(aggregate)
+                     for group, aggregate in sorted(groups.items())}
+        relationships[f"{key[1]} -> {key[2]}"] = {statistic: {group: summary[statistic] for group, summary in summaries.items()}
+                                                  for statistic in ('count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max')}
+
+    correlation = correlation_from_sums(aggregates[('correlation',)])
+    dtype_counts = pd.Series([column_details['Data Type'] for column_details in details.values()]).value_counts()
+    report = {
+        'General Info': {
+            'Number of Rows': num_rows,
+            'Number of Columns': len(columns),
+            'Missing Data Summary': {column: column_details['Missing Values'] for column, column_details in details.items()},
+            'Feature Types Summary': dtype_counts.to_dict(),
+        },
+        'Feature Details': details,
+        'Correlations': {a: {b: correlation[i, j] for j, b in enumerate(numeric_columns)} for i, a in enumerate(numeric_columns)},
+        'Numeric-Categorical Relationships': relationships,
+        'Dataset Insights': {
+            'Overall Trends': None,
+            'Clusters or Groups': None,
+        },
+    }
+    return _to_builtin(report)
@@ -0,0 +1,184 @@
+"""
+datasetCache.py
+
+This module keeps parsed project datasets in memory so that repeated reads of the same
+file (one per design and one per retry during a /visualization run) do not parse it again.
+
+The cache is a bounded LRU keyed by a source (e.g. the project id) and a version
+(e.g. the file mtime and size). Eviction is driven by the in-memory byte size of the
+cached frames, and every caller receives its own handout of the cached frame so that
+tool-side mutations (`dropna`, `df["all"] = ...`, `fillna`) cannot corrupt the cached copy.
+
+Handouts are deep copies unless pandas copy-on-write is enabled, in which case a shallow copy
+is just as safe and costs nothing. Copy-on-write is process-wide and changes the semantics of
+chained assignment and `inplace=` on column views for every pandas user in the process
+(including generated code run by the coder agent), so this module never turns it on by itself:
+an application opts in at startup with enable_copy_on_write() (see Backend/mainRouter.py,
+DATASET_CACHE_COPY_ON_WRITE=1). Memory-mapped (arrow) storage requires it, since a deep copy
+would give every request a private copy of the mapped dataset.
+
+Dependencies:
+- pandas
+- threading
+- collections
+
+Usage:
+1. Optionally call enable_copy_on_write() once at application startup.
+2. Create a DatasetCache with a memory cap.
+3. Call get(source, version, loader) where loader parses the dataset on a miss.
+
+Classes:
+- DatasetCache: A thread-safe, byte-bounded LRU cache of DataFrames.
+
+Functions:
+- enable_copy_on_write: Turns on pandas copy-on-write for the process, if configured.
+
+Variables:
+- CONFIGURATIONS: A dictionary containing the configuration of the cache.
+"""
+import os
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+CONFIGURATIONS={
+    'MAX_BYTES': int(os.getenv('DATASET_CACHE_MAX_BYTES', 512*1024*1024)),
+    'COPY_ON_WRITE': os.getenv('DATASET_CACHE_COPY_ON_WRITE', '0') == '1',  # applied by enable_copy_on_write
+}
+
+
+def enable_copy_on_write(required=False):
+    """
+    Turns on pandas copy-on-write for the whole process when CONFIGURATIONS['COPY_ON_WRITE'] is set.
+
+    With copy-on-write a shallow copy is a safe handout: the first write to a shared column copies
+    it instead of modifying the cached frame. Call it once, at application startup, before any
+    frame is created; it changes pandas semantics for all code in the process.
+
+    Args:
+        required (bool, optional): Turn it on even if not configured, e.g. for memory-mapped datasets. Default is False.
+
+    Returns:
+        bool: Whether copy-on-write is enabled.
+    """
+    if CONFIGURATIONS['COPY_ON_WRITE'] or required:
+        pd.set_option('mode.copy_on_write', True)
+    return bool(pd.get_option('mode.copy_on_write'))
+
+
+class DatasetCache:
+    """
+    A least recently used cache of parsed DataFrames bounded by their size in bytes.
+
+    Attributes:
+        max_bytes (int): Memory cap of the cache.
+        current_bytes (int): Bytes currently held by the cache.
+        hits (int): Number of lookups served from the cache.
+        misses (int): Number of lookups that had to call the loader.
+        evictions (int): Number of entries dropped to respect the memory cap.
+    """
+
+    def __init__(self, max_bytes=CONFIGURATIONS['MAX_BYTES']):
+        self.max_bytes=max_bytes
+        self.current_bytes=0
+        self.hits=0
+        self.misses=0
+        self.evictions=0
+        self._entries=OrderedDict()  # source -> (version, dataframe, size in bytes)
+        self._lock=threading.Lock()
+        self._loading_locks={}  # source -> [lock, number of threads loading or waiting]
+
+    def get(self, source, version, loader):
+        """
+        Returns a handout of the cached frame for source, loading it on a miss.
+
+        Args:
+            source (hashable): What the frame is read from, e.g. the project id.
+            version (hashable): Identifies the content of the source, e.g. (mtime, size).
+                A different version replaces the cached entry of the same source.
+            loader (callable): Called without arguments to produce the DataFrame on a miss.
+
+        Returns:
+            pd.DataFrame: A frame that the caller may freely mutate, or whatever the loader returned if it is not a DataFrame.
+        """
+        df=self._lookup(source, version)
+        if df is not None:
+            return self._handout(df)
+
+        # Only one thread loads a given source; concurrent callers wait and then hit.
+        # The lock of a source lives only while someone is loading or waiting for it.
+        with self._lock:
+            loading=self._loading_locks.setdefault(source, [threading.Lock(), 0])
+            loading[1]+=1
+        try:
+            with loading[0]:
+                # A waiter served by another thread's load counts as a hit.
+                df=self._lookup(source, version)
+                if df is not None:
+                    return self._handout(df)
+                with self._lock:
+                    self.misses+=1
+                df=loader()
+                if isinstance(df, pd.DataFrame):
+                    self._store(source, version, df)
+                    return self._handout(df)
+                return df
+        finally:
+            with self._lock:
+                loading[1]-=1
+                if loading[1] == 0:
+                    del self._loading_locks[source]
+
+    def invalidate(self, source=None):
+        """
+        Drops the entry of one source, or every entry if source is None.
+        """
+        with self._lock:
+            if source is None:
+                self._entries.clear()
+                self.current_bytes=0
+            elif source in self._entries:
+                self.current_bytes-=self._entries.pop(source)[2]
+
+    def stats(self):
+        """
+        Returns the counters of the cache as a dictionary.
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'current_bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def _lookup(self, source, version):
+        with self._lock:
+            entry=self._entries.get(source)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(source)
+            self.hits+=1
+            return entry[1]
+
+    def _store(self, source, version, df):
+        size=int(df.memory_usage(index=True, deep=True).sum())
+        with self._lock:
+            if source in self._entries:
+                self.current_bytes-=self._entries.pop(source)[2]
+            if size > self.max_bytes:
+                return
+            while self._entries and self.current_bytes+size > self.max_bytes:
+                _, (_, _, evicted_size)=self._entries.popitem(last=False)
+                self.current_bytes-=evicted_size
+                self.evictions+=1
+            self._entries[source]=(version, df, size)
+            self.current_bytes+=size
+
+    @staticmethod
+    def _handout(df):
+        if pd.get_option('mode.copy_on_write'):
+            return df.copy(deep=False)
+        return df.copy(deep=True)
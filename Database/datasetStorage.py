@@ -0,0 +1,248 @@
+"""
+datasetStorage.py
+
+This module stores project datasets in a columnar format (Parquet) so that they are parsed
+from text only once, at ingestion, and so that readers can load only the columns they need.
+
+With DATASET_STORAGE_FORMAT=arrow each dataset additionally gets an uncompressed Arrow IPC
+file that is read through a memory map. Readers then get views backed by the OS page cache:
+several uvicorn workers serving the same dataset share one physical copy, and a warm read
+does no parsing or decompression.
+
+Dependencies:
+- pyarrow
+- pandas
+
+Usage:
+1. Call convert_csv_to_parquet once when a dataset is uploaded (or lazily on first read).
+2. Call read_parquet with a list of columns to read a projection of the dataset.
+3. In arrow mode, call convert_parquet_to_arrow once per dataset and read it with read_arrow.
+
+Functions:
+- convert_csv_to_parquet: Converts a CSV file into a Parquet file, streaming it in blocks.
+- read_parquet: Reads the requested columns of a Parquet dataset into a DataFrame.
+- select_columns: Resolves the requested columns against the columns the dataset has.
+- read_parquet_rows: Reads a window of rows of a Parquet dataset, touching only the row groups it overlaps.
+- read_parquet_schema: Returns the number of rows and the column types of a Parquet dataset without reading its data.
+- convert_parquet_to_arrow: Converts a Parquet file into an uncompressed Arrow IPC file.
+- arrow_is_contiguous: Returns whether an Arrow IPC file holds a single record batch.
+- read_arrow: Reads the requested columns of an Arrow IPC file through a memory map.
+
+Variables:
+- CONFIGURATIONS: A dictionary containing the configuration of the storage.
+"""
+import os
+import threading
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+CONFIGURATIONS={
+    'BLOCK_SIZE': 64*1024*1024,  # bytes of CSV parsed per block while converting
+    'COMPRESSION': 'zstd',
+    'FORMAT': os.getenv('DATASET_STORAGE_FORMAT', 'parquet'),  # 'parquet' or 'arrow' (memory-mapped)
+}
+
+
+def convert_csv_to_parquet(csv_path, parquet_path):
+    """
+    Converts a CSV file into a Parquet file.
+
+    The CSV is streamed block by block so that ingestion memory does not grow with the file.
+    Column types are inferred from the first block; if a later block does not fit them the
+    whole file is parsed with pandas instead, which infers types over every row.
+    The Parquet file is written under a temporary name and renamed so readers never see a partial file.
+
+    Args:
+        csv_path (str): Path of the CSV file.
+        parquet_path (str): Path of the Parquet file to create.
+    """
+    os.makedirs(os.path.dirname(parquet_path) or '.', exist_ok=True)
+    temp_path = f"{parquet_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        try:
+            # Empty strings are missing values, as they are for pandas.read_csv
+            reader = pa_csv.open_csv(csv_path, read_options=pa_csv.ReadOptions(block_size=CONFIGURATIONS['BLOCK_SIZE']),
+                                     convert_options=pa_csv.ConvertOptions(strings_can_be_null=True))
+            with pq.ParquetWriter(temp_path, reader.schema, compression=CONFIGURATIONS['COMPRESSION']) as writer:
+                for batch in reader:
+                    writer.write_batch(batch)
+        except pa.ArrowInvalid:
+            table = pa.Table.from_pandas(pd.read_csv(csv_path), preserve_index=False)
+            pq.write_table(table, temp_path, compression=CONFIGURATIONS['COMPRESSION'])
+        os.replace(temp_path, parquet_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def select_columns(parquet_path, columns):
+    """
+    Resolves the requested columns against the schema of a Parquet dataset.
+
+    None entries and duplicates are dropped, and columns the dataset does not have are skipped
+    so that callers can report them the same way they do for a full frame.
+
+    Args:
+        parquet_path (str): Path of the Parquet file.
+        columns (list or None): The requested columns, None for all of them.
+
+    Returns:
+        tuple or None: The columns to read, in the requested order, or None for all of them.
+    """
+    if columns is None:
+        return None
+    available = set(pq.read_schema(parquet_path).names)
+    selected = []
+    for col in columns:
+        if col is not None and col in available and col not in selected:
+            selected.append(col)
+    return tuple(selected)
+
+
+def read_parquet(parquet_path, columns=None):
+    """
+    Reads a Parquet dataset into a DataFrame.
+
+    Args:
+        parquet_path (str): Path of the Parquet file.
+        columns (list, optional): Columns to read. Default is None (read every column).
+
+    Returns:
+        pd.DataFrame: The dataset, restricted to the requested columns.
+    """
+    table = pq.read_table(parquet_path, columns=list(columns) if columns is not None else None)
+    return table.to_pandas()
+
+
+def read_parquet_rows(parquet_path, offset, limit, columns=None):
+    """
+    Reads the rows [offset, offset + limit) of a Parquet dataset.
+
+    Only the row groups that overlap the window are read, so the cost depends on the
+    page size and not on the size of the dataset.
+
+    Args:
+        parquet_path (str): Path of the Parquet file.
+        offset (int): Index of the first row to read.
+        limit (int): Maximum number of rows to read.
+        columns (list, optional): Columns to read. Default is None (read every column).
+
+    Returns:
+        pyarrow.Table: The requested window.
+    """
+    parquet_file = pq.ParquetFile(parquet_path)
+    columns = list(columns) if columns is not None else None
+    row_groups = []
+    first_row_of_window = None
+    group_start = 0
+    for index in range(parquet_file.metadata.num_row_groups):
+        group_rows = parquet_file.metadata.row_group(index).num_rows
+        group_end = group_start + group_rows
+        if group_end > offset and group_start < offset + limit:
+            if first_row_of_window is None:
+                first_row_of_window = offset - group_start
+            row_groups.append(index)
+        group_start = group_end
+
+    if not row_groups:
+        empty_table = parquet_file.schema_arrow.empty_table()
+        return empty_table.select(columns) if columns is not None else empty_table
+    table = parquet_file.read_row_groups(row_groups, columns=columns)
+    return table.slice(first_row_of_window, limit)
+
+
+def read_parquet_schema(parquet_path):
+    """
+    Returns the number of rows and the column types of a Parquet dataset from its footer.
+
+    Args:
+        parquet_path (str): Path of the Parquet file.
+
+    Returns:
+        tuple: (number of rows, dict of column name to pandas dtype name)
+    """
+    parquet_file = pq.ParquetFile(parquet_path)
+    empty_frame = parquet_file.schema_arrow.empty_table().to_pandas()
+    dtypes = {name: str(dtype) for name, dtype in empty_frame.dtypes.items()}
+    return parquet_file.metadata.num_rows, dtypes
+
+
+def convert_parquet_to_arrow(parquet_path, arrow_path):
+    """
+    Converts a Parquet file into an uncompressed Arrow IPC file holding a single record batch.
+
+    Every column is written as one contiguous chunk: pandas can only take a zero-copy view of a
+    single-chunk column, and would otherwise concatenate the chunks into a private copy per reader.
+    String and binary columns are stored with 64-bit offsets so that one chunk can hold more than 2 GB.
+    Columns are converted one at a time and spilled to memory-mapped temporary files, so the
+    conversion holds about one column in memory rather than the whole dataset twice.
+    The file is written under a temporary name and renamed, and is never modified afterwards,
+    so it is safe to memory map it from several processes.
+
+    Args:
+        parquet_path (str): Path of the Parquet file.
+        arrow_path (str): Path of the Arrow IPC file to create.
+    """
+    os.makedirs(os.path.dirname(arrow_path) or '.', exist_ok=True)
+    temp_path = f"{arrow_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    parquet_file = pq.ParquetFile(parquet_path)
+    schema = pa.schema([field.with_type(pa.large_string()) if pa.types.is_string(field.type)
+                        else field.with_type(pa.large_binary()) if pa.types.is_binary(field.type) else field
+                        for field in parquet_file.schema_arrow])
+    column_paths = [f"{temp_path}.{position}" for position in range(len(schema))]
+    try:
+        columns = []
+        for field, column_path in zip(schema, column_paths):
+            column = parquet_file.read(columns=[field.name]).column(0).cast(field.type).combine_chunks()
+            _write_batch(column_path, pa.schema([field]), [column])
+            del column
+            with pa.memory_map(column_path, 'r') as source:
+                columns.append(pa.ipc.open_file(source).get_batch(0).column(0))
+        _write_batch(temp_path, schema, columns)
+        del columns
+        os.replace(temp_path, arrow_path)
+    finally:
+        for path in [temp_path, *column_paths]:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _write_batch(path, schema, columns):
+    # One record batch, so every column of the file is a single chunk
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, schema) as writer:
+            writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=schema))
+
+
+def arrow_is_contiguous(arrow_path):
+    """
+    Returns whether an Arrow IPC file holds a single record batch (files written before
+    convert_parquet_to_arrow wrote contiguous columns hold one per row group).
+    """
+    with pa.memory_map(arrow_path, 'r') as source:
+        return pa.ipc.open_file(source).num_record_batches <= 1
+
+
+def read_arrow(arrow_path, columns=None):
+    """
+    Reads an Arrow IPC file through a memory map.
+
+    The Arrow buffers point into the mapped file. Numeric and boolean columns without missing
+    values are handed to pandas as views of those buffers; other columns (strings, columns with
+    nulls) are converted, since pandas needs its own representation for them.
+
+    Args:
+        arrow_path (str): Path of the Arrow IPC file.
+        columns (list, optional): Columns to read. Default is None (read every column).
+
+    Returns:
+        pd.DataFrame: The dataset, restricted to the requested columns.
+    """
+    with pa.memory_map(arrow_path, 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    if columns is not None:
+        table = table.select(list(columns))
+    # split_blocks keeps one block per column so pandas does not consolidate (copy) the views
+    return table.to_pandas(split_blocks=True)
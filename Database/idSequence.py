@@ -0,0 +1,125 @@
+"""
+idSequence.py
+
+This module allocates IDs and appends records to CSV tables safely when several threads,
+processes or uvicorn workers write at the same time.
+
+Each table has a small sequence file next to it holding the last allocated ID. Allocating an
+ID and appending the new row happen under one exclusive file lock, so IDs are unique, rows are
+appended in ID order, and an insert costs O(1) instead of re-reading the whole table.
+
+Dependencies:
+- fcntl (POSIX) or msvcrt (Windows)
+
+Usage:
+1. Call append_with_next_id(csv_path, id_column, make_row) to insert a row.
+
+Classes:
+- FileLock: An exclusive, cross-process lock held on a lock file.
+
+Functions:
+- append_with_next_id: Allocates the next ID of a table and appends the row built for it.
+"""
+import os
+import csv
+import time
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+class FileLock:
+    """
+    An exclusive lock on a lock file, shared by every thread and process that uses the same path.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with _thread_locks_guard:
+            self._thread_lock = _thread_locks.setdefault(os.path.abspath(path), threading.Lock())
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        try:
+            self._file = open(self.path, 'a+b')
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            else:
+                self._file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        # LK_LOCK gives up after ~10 seconds; keep waiting like flock does
+                        time.sleep(0.05)
+        except Exception:
+            if self._file is not None:
+                self._file.close()
+            self._thread_lock.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._thread_lock.release()
+
+
+def _last_id_in_table(csv_path, id_column):
+    # Only used once per table, to seed a sequence file that does not exist yet
+    if not os.path.exists(csv_path):
+        return 0
+    with open(csv_path, newline='', encoding='utf-8') as file:
+        ids = [int(row[id_column]) for row in csv.DictReader(file) if row.get(id_column)]
+    return max(ids, default=0)
+
+
+def append_with_next_id(csv_path, id_column, make_row):
+    """
+    Allocates the next ID of a CSV table and appends the row built for it.
+
+    Args:
+        csv_path (str): Path of the CSV table.
+        id_column (str): Name of the ID column, used to seed the sequence from an existing table.
+        make_row (callable): Called with the new ID, returns the list of values to append.
+
+    Returns:
+        int: The allocated ID.
+    """
+    sequence_path = csv_path + '.seq'
+    with FileLock(csv_path + '.lock'):
+        if os.path.exists(sequence_path):
+            with open(sequence_path, 'r', encoding='utf-8') as file:
+                last_id = int(file.read().strip() or 0)
+        else:
+            last_id = _last_id_in_table(csv_path, id_column)
+        new_id = last_id + 1
+
+        # The sequence is advanced before the row is written: a crash in between leaves a gap, never a duplicate
+        temp_path = sequence_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            file.write(str(new_id))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, sequence_path)
+
+        with open(csv_path, mode='a', newline='', encoding='utf-8') as file:
+            csv.writer(file).writerow(make_row(new_id))
+            file.flush()
+            os.fsync(file.fileno())
+    return new_id
@@ -1,58 +1,52 @@
 import pandas as pd
 from datetime import datetime
 import bcrypt
-import shutil
-import csv
 import os
-import json
+from Database import datasetCache
+from Database import datasetStorage
+from Database import userStore
+from Database import idSequence
+from Database import blobStore
+from Database import dataProfiler
+from Database import reportStore
+from Database import correlationEngine
+from sqlalchemy.exc import IntegrityError
 
-user_directory=r'Database\Users\users.csv' #temp until we create a real database
+user_directory=r'Database\Users\users.csv' #legacy, imported into the user store on first use
 project_directory=r'Database\Projects\projects.csv' #temp until we create a real database
 raw_datasets_directory=r'Database\rawDatasets'
 processed_datasets_directory=r'Database\processedDatasets'
+parquet_datasets_directory=r'Database\parquetDatasets'
 data_reports_directory=r'Database\dataReports'
+profile_states_directory=r'Database\profileStates' # per column-chunk aggregates reused across report refreshes
+
+dataset_cache=datasetCache.DatasetCache(datasetCache.CONFIGURATIONS['MAX_BYTES'])
+_dataset_keys={} # project_id -> dataset key; project rows are append-only so this never goes stale
+_contiguous_arrow_files={} # arrow path -> (mtime, size) of the version known to hold a single record batch
 
 def check_login(username,password):
-    df=pd.read_csv(user_directory)
-    row=df[(df['username'] == username)]
-    if row.shape[0] > 0:
-        return bcrypt.checkpw(password.encode(), row.password.values[0].encode())
+    user=userStore.get_user_by_username(username)
+    if user is not None:
+        return bcrypt.checkpw(password.encode(), user['password'].encode())
     
 def get_user_id(username):
-    df=pd.read_csv(user_directory)
-
-    return str(df[df['username']==username]['user_id'].values[0])
+    return str(userStore.get_user_by_username(username)['user_id'])
 
 
 def delete_user(user_id):
-    df=pd.read_csv(user_directory)
-    # Drop rows where the 'user_id' column is equal to user_id
-    df = df[df['user_id'] != user_id]
-    df.to_csv(user_directory,index=False)
+    userStore.delete_user(user_id)
 
 def change_user_data(user_id,email,first_name,last_name,username,password):
-    df=pd.read_csv(user_directory)
-    df.loc[df['user_id'] == user_id, ['email', 'first_name','last_name','username','password']]\
-    = [email,first_name,last_name,username,password]
-    df.to_csv(user_directory,index=False)
+    userStore.update_user(user_id,email=email,first_name=first_name,last_name=last_name,username=username,password=password)
 
 def add_user(email, first_name, last_name, username, password):
-    df=pd.read_csv(user_directory)
-    if len(df)>0:
-        ID=int(df.user_id.tail(1).values[0])+1
-    else:
-        ID=1
-    with open(user_directory, mode='a', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow([ID,email,first_name,last_name,username,password]) 
+    return userStore.insert_user(email,first_name,last_name,username,password)
 
 def username_exist(username):
-    df=pd.read_csv(user_directory)
-    return df[(df['username'] == username)].shape[0] > 0
+    return userStore.username_exists(username)
 
 def email_exist(email):
-    df=pd.read_csv(user_directory)
-    return df[(df['email'] == email)].shape[0] > 0
+    return userStore.email_exists(email)
 
 def signup(email, first_name, last_name, username, password):
     if email_exist(email):
@@ -61,37 +55,71 @@ def signup(email, first_name, last_name, username, password):
         return "Username already exists."
     else:
         hashed_password = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
-        add_user(email,first_name,last_name,username,hashed_password)
+        try:
+            add_user(email,first_name,last_name,username,hashed_password)
+        except IntegrityError:
+            # Another signup took the username or email between the checks and the insert
+            return "Username or email already exists."
         return "Signup successful!"
 
 def fetch_name(user_id):
-    df=pd.read_csv(user_directory)
-    return df[df['user_id'].astype(str)==user_id]['first_name'].values[0]
+    return userStore.get_user_by_id(user_id)['first_name']
 
 def fetch_username(user_id):
-    df=pd.read_csv(user_directory)
-    return df[df['user_id'].astype(str)==str(user_id)]['username'].values[0]
+    return userStore.get_user_by_id(user_id)['username']
 
 def fetch_email(user_id):
-    df=pd.read_csv(user_directory)
-    return df[df['user_id'].astype(str)==user_id]['email'].values[0]
+    return userStore.get_user_by_id(user_id)['email']
 
 def create_project(name,user_id,uploaded_file):
-    df=pd.read_csv(project_directory)
-    if len(df)>0:
-        ID=int(df.project_id.tail(1).values[0])+1
-    else:
-        ID=1
     current_date = datetime.now().strftime("%d-%m-%Y")
 
-    with open(project_directory, mode='a', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow([ID,user_id,name,current_date])
-    
-    file_path = raw_datasets_directory+f"raw_dataset_{ID}.csv"
+    # The upload is stored once per distinct content and the project references it by hash
+    content_hash = blobStore.store_stream(raw_datasets_directory, uploaded_file.file)
+
+    # IDs come from a lock-protected sequence so concurrent uploads never share one
+    ID=idSequence.append_with_next_id(project_directory,'project_id',lambda ID: [ID,user_id,name,current_date,content_hash])
+
+    # Parse the upload once into the columnar copy every later read uses; a re-uploaded dataset already has one
+    parquet_path = os.path.join(parquet_datasets_directory, f"dataset_{content_hash}.parquet")
+    if not os.path.exists(parquet_path):
+        datasetStorage.convert_csv_to_parquet(blobStore.blob_path(raw_datasets_directory, content_hash), parquet_path)
 
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(uploaded_file.file, buffer)    
+    # The data report is built at ingestion, reads never profile; a re-uploaded dataset already has one
+    if not os.path.exists(_report_path(content_hash)):
+        generate_data_report(ID)
+
+def get_dataset_key(project_id):
+    """
+    Returns the key under which the dataset of a project and everything derived from it are stored.
+
+    Projects reference their upload by content hash, so projects with the same dataset share a key
+    (and its Parquet copy, cached frames and data report). Projects created before uploads were
+    content-addressed use 'project_{id}'.
+
+    Args:
+        project_id (str): The project's Id.
+
+    Returns:
+        str or None: The dataset key, or None if the project does not exist.
+    """
+    project_id = str(project_id)
+    if project_id not in _dataset_keys:
+        df = pd.read_csv(project_directory, dtype=str)
+        project = df[df['project_id'] == project_id]
+        if project.shape[0] == 0:
+            return None
+        content_hash = project['content_hash'].values[0] if 'content_hash' in df.columns else None
+        _dataset_keys[project_id] = content_hash if isinstance(content_hash, str) and content_hash else f"project_{project_id}"
+    return _dataset_keys[project_id]
+
+def _raw_dataset_path(project_id):
+    dataset_key = get_dataset_key(project_id)
+    if dataset_key is None:
+        return None
+    if dataset_key.startswith('project_'):
+        return os.path.join(raw_datasets_directory, f"raw_dataset_{project_id}.csv")
+    return blobStore.blob_path(raw_datasets_directory, dataset_key)
 
 def read_projects(user_id):
     df = pd.read_csv(project_directory)
@@ -117,8 +145,8 @@ def get_project(project_id):
     }
     
     # Get raw dataset
-    raw_dataset_path = os.path.join(raw_datasets_directory, f"raw_dataset_{project_id}.csv")
-    if os.path.exists(raw_dataset_path):
+    raw_dataset_path = _raw_dataset_path(project_id)
+    if raw_dataset_path and os.path.exists(raw_dataset_path):
         raw_dataset = pd.read_csv(raw_dataset_path)
         project_details['raw_dataset'] = raw_dataset.to_json()
     else:
@@ -135,20 +163,200 @@ def get_project(project_id):
     return project_details
 
 
-def fetch_dataset(project_id):
-    raw_dataset_path = raw_datasets_directory+r"\raw_dataset_{}.csv".format(project_id)
-    if os.path.exists(raw_dataset_path):
-        raw_dataset = pd.read_csv(raw_dataset_path)
-        return raw_dataset
+def fetch_dataset(project_id, columns=None):
+    """
+    Reads the dataset of a project.
+
+    Args:
+        project_id (str): The project's Id.
+        columns (list, optional): Only read these columns. None entries and columns the dataset
+            does not have are skipped. Default is None (read every column).
+
+    Returns:
+        pd.DataFrame or None: The dataset, or None if the project has no dataset.
+    """
+    parquet_path = _parquet_path(project_id)
+    if parquet_path is None:
+        return None
+
+    selected_columns = datasetStorage.select_columns(parquet_path, columns)
+    if datasetStorage.CONFIGURATIONS['FORMAT'] == 'arrow':
+        # Without copy-on-write every handout would be a deep, private copy of the mapped dataset
+        if not pd.get_option('mode.copy_on_write'):
+            raise RuntimeError("DATASET_STORAGE_FORMAT=arrow needs pandas copy-on-write, call datasetCache.enable_copy_on_write(required=True) at startup")
+        source_path = _arrow_path(project_id, parquet_path)
+        loader = lambda: datasetStorage.read_arrow(source_path, selected_columns)
     else:
+        source_path = parquet_path
+        loader = lambda: datasetStorage.read_parquet(parquet_path, selected_columns)
+    # Parsed frames are shared through the cache by every project with the same dataset
+    stat = os.stat(source_path)
+    return dataset_cache.get((get_dataset_key(project_id), selected_columns), (stat.st_mtime_ns, stat.st_size), loader)
+
+class MigrationRequired(Exception):
+    """Raised when a legacy project has no Parquet copy yet and the caller did not allow migrating it."""
+
+
+def _parquet_path(project_id, migrate=True):
+    dataset_key = get_dataset_key(project_id)
+    if dataset_key is None:
+        return None
+    parquet_path = os.path.join(parquet_datasets_directory, f"dataset_{dataset_key}.parquet")
+    if not os.path.exists(parquet_path):
+        # Projects created before the columnar storage are migrated the first time they are read
+        raw_dataset_path = _raw_dataset_path(project_id)
+        if not os.path.exists(raw_dataset_path):
+            return None
+        if not migrate:
+            raise MigrationRequired(project_id)
+        datasetStorage.convert_csv_to_parquet(raw_dataset_path, parquet_path)
+    return parquet_path
+
+def _arrow_path(project_id, parquet_path):
+    # The memory-mapped copy is derived from the Parquet one the first time it is needed
+    arrow_path = os.path.join(parquet_datasets_directory, f"dataset_{get_dataset_key(project_id)}.arrow")
+    # Copies written one record batch per row group cannot be shared zero-copy and are rewritten once;
+    # a version of the file that was checked is not opened again
+    version = _file_version(arrow_path)
+    if version is None or _contiguous_arrow_files.get(arrow_path) != version:
+        if version is None or not datasetStorage.arrow_is_contiguous(arrow_path):
+            datasetStorage.convert_parquet_to_arrow(parquet_path, arrow_path)
+            version = _file_version(arrow_path)
+        _contiguous_arrow_files[arrow_path] = version
+    return arrow_path
+
+def _file_version(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
         return None
+    return stat.st_mtime_ns, stat.st_size
+
+def fetch_correlation(project_id):
+    """
+    Returns the correlation matrix of the numeric columns of a project's dataset.
+
+    The matrix is computed once per dataset version and shared by every project with the same dataset.
+
+    Args:
+        project_id (str): The project's Id.
+
+    Returns:
+        tuple or None: (list of numeric columns, matrix), or None if the project has no dataset.
+    """
+    parquet_path = _parquet_path(project_id)
+    if parquet_path is None:
+        return None
+    stat = os.stat(parquet_path)
+    return correlationEngine.get_correlation(get_dataset_key(project_id), (stat.st_mtime_ns, stat.st_size), parquet_path)
+
+def get_project_metadata(project_id, migrate=False):
+    """
+    Returns the details of a project without reading its dataset.
+
+    Args:
+        project_id (str): The project's Id.
+        migrate (bool, optional): Convert a legacy CSV dataset to Parquet if it has no Parquet copy yet. Default is False.
+
+    Returns:
+        dict or None: name, date, number of rows, and the columns with their types (None if the project has
+            no dataset), or None if there is no such project.
+
+    Raises:
+        MigrationRequired: If the dataset still has to be converted and migrate is False.
+    """
+    df = pd.read_csv(project_directory, dtype=str)
+    matches = df[df['project_id'] == str(project_id)]
+    if matches.empty:
+        return None
+    project = matches.iloc[0]
+    project_details = {
+        'name': project['name'],
+        'date': project['date'],
+        'num_rows': None,
+        'columns': None,
+        'has_processed_dataset': os.path.exists(os.path.join(processed_datasets_directory, f"processed_dataset_{project_id}.csv")),
+    }
+    parquet_path = _parquet_path(project_id, migrate)
+    if parquet_path is not None:
+        # Row count and column types come from the Parquet footer
+        project_details['num_rows'], project_details['columns'] = datasetStorage.read_parquet_schema(parquet_path)
+    return project_details
+
+def fetch_rows(project_id, offset=0, limit=100, columns=None):
+    """
+    Reads one window of rows of a project's dataset.
+
+    Args:
+        project_id (str): The project's Id.
+        offset (int, optional): Index of the first row. Default is 0.
+        limit (int, optional): Maximum number of rows. Default is 100.
+        columns (list, optional): Only read these columns; unknown columns are skipped. Default is None (every column).
+
+    Returns:
+        tuple or None: (pyarrow.Table with the window, total number of rows), or None if the project has no dataset.
+    """
+    parquet_path = _parquet_path(project_id)
+    if parquet_path is None:
+        return None
+    num_rows, _ = datasetStorage.read_parquet_schema(parquet_path)
+    window = datasetStorage.read_parquet_rows(parquet_path, offset, limit, datasetStorage.select_columns(parquet_path, columns))
+    return window, num_rows
+
+def generate_data_report(project_id):
+    """
+    Profiles the dataset of a project and stores its data report under the project's dataset key.
+
+    Args:
+        project_id (str): The project's Id.
+
+    Returns:
+        str or None: Path of the written report, or None if the project has no dataset.
+    """
+    parquet_path = _parquet_path(project_id)
+    if parquet_path is None:
+        return None
+    report = dataProfiler.profile_dataset(parquet_path, state_directory=profile_states_directory)
+    report_path = _report_path(get_dataset_key(project_id))
+    reportStore.write_report(report_path, report)
+    return report_path
+
+def _report_path(dataset_key):
+    return os.path.join(data_reports_directory, f"data_report_{dataset_key}.msgpack")
+
+def _data_report_path(project_id):
+    # Reports are stored per dataset key; older reports were stored as JSON, per dataset key or per project id
+    report_path = _report_path(get_dataset_key(project_id))
+    if os.path.exists(report_path):
+        return report_path
+    for json_path in (os.path.join(data_reports_directory, f"data_report_{get_dataset_key(project_id)}.json"),
+                      data_reports_directory+r"\data_report_{}.json".format(project_id)):
+        if os.path.exists(json_path):
+            reportStore.import_json_report(json_path, report_path)
+            return report_path
+    # Reports are written at ingestion or by an explicit generate_data_report, never as a side effect of a read
+    return None
 
 def fetch_data_report(project_id):
-    raw_data_report_path = data_reports_directory+r"\data_report_{}.json".format(project_id)
-    if os.path.exists(raw_data_report_path):
-        with open(raw_data_report_path, 'r', encoding='utf-8') as file:
-            json_content = json.load(file)
-            json_string = json.dumps(json_content)
-            return json_string
+    report_path = _data_report_path(project_id)
+    if report_path and os.path.exists(report_path):
+        return reportStore.read_json(report_path)
     else:
         return None
+
+def fetch_data_report_sections(project_id, sections=None, columns=None):
+    """
+    Fetches some sections of a project's data report without decoding the rest of it.
+
+    Args:
+        project_id (str): The project's Id.
+        sections (list, optional): Sections to return, e.g. ['General Info']. Default is every section.
+        columns (list, optional): Columns whose "Feature Details" to return. Default is every column.
+
+    Returns:
+        dict or None: {section: content}, or None if the project has no dataset.
+    """
+    report_path = _data_report_path(project_id)
+    if report_path and os.path.exists(report_path):
+        return reportStore.read_sections(report_path, sections, columns)
+    return None
@@ -0,0 +1,111 @@
+"""
+profileStore.py
+
+This module keeps the intermediate aggregates of the data profiler (value counts, sketches,
+correlation sums) so that a report refresh only recomputes what changed.
+
+Aggregates are computed per column chunk (one column of one Parquet row group) and stored under
+a fingerprint of that chunk: a hash of its encoded bytes as written in the Parquet file. Hashing
+the stored bytes is much cheaper than decoding and profiling them, and equal bytes mean equal
+values. When rows are appended to a dataset the earlier row groups keep their fingerprints,
+and when a few columns change the chunks of the other columns do; their aggregates are loaded
+from the store and only the new or changed chunks are profiled.
+
+Aggregates are stored as msgpack files, content-addressed, so datasets sharing row groups
+(e.g. two versions of the same upload in different projects) share them as well.
+
+Dependencies:
+- msgpack
+- pyarrow
+
+Functions:
+- column_chunk_fingerprints: Returns the fingerprint of every column chunk of a row group.
+- combine_fingerprints: Returns one fingerprint for several fingerprints.
+- load: Loads a stored aggregate, or returns None.
+- save: Stores an aggregate.
+
+Variables:
+- CONFIGURATIONS: A dictionary containing the configuration of the store.
+"""
+import os
+import hashlib
+import threading
+import msgpack
+import pyarrow.parquet as pq
+
+CONFIGURATIONS={
+    'READ_SIZE': 4*1024*1024,
+}
+
+
+def column_chunk_fingerprints(parquet_path, row_group):
+    """
+    Returns the fingerprint of every column chunk of a row group, hashing the encoded bytes without decoding them.
+
+    Args:
+        parquet_path (str): Path of the Parquet dataset.
+        row_group (int): Index of the row group.
+
+    Returns:
+        dict: {column: hex digest}; a digest changes whenever the values (or the type) of the chunk change.
+    """
+    parquet_file = pq.ParquetFile(parquet_path)
+    schema = parquet_file.schema_arrow
+    row_group_metadata = parquet_file.metadata.row_group(row_group)
+    fingerprints = {}
+    with open(parquet_path, 'rb') as file:
+        for column in schema.names:
+            chunk = row_group_metadata.column(schema.get_field_index(column))
+            start = chunk.data_page_offset
+            if chunk.has_dictionary_page and chunk.dictionary_page_offset is not None:
+                start = min(start, chunk.dictionary_page_offset)
+            digest = hashlib.blake2b(digest_size=20)
+            digest.update(f"{schema.field(column).type}|{chunk.num_values}|{chunk.compression}|".encode())
+            file.seek(start)
+            remaining = chunk.total_compressed_size
+            while remaining > 0:
+                data = file.read(min(remaining, CONFIGURATIONS['READ_SIZE']))
+                if not data:
+                    break
+                digest.update(data)
+                remaining -= len(data)
+            fingerprints[column] = digest.hexdigest()
+    return fingerprints
+
+
+def combine_fingerprints(*parts):
+    """
+    Returns one fingerprint for several fingerprints (or other strings), in order.
+    """
+    return hashlib.blake2b('|'.join(parts).encode(), digest_size=20).hexdigest()
+
+
+def _state_path(directory, key):
+    # Two-character fan-out keeps directories small
+    return os.path.join(directory, key[:2], f"{key}.msgpack")
+
+
+def load(directory, key):
+    """
+    Loads the aggregate stored under a key.
+
+    Returns:
+        The stored value, or None if there is none.
+    """
+    path = _state_path(directory, key)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as file:
+        return msgpack.unpackb(file.read(), raw=False, strict_map_key=False)
+
+
+def save(directory, key, state):
+    """
+    Stores an aggregate (numbers, strings, bytes, lists and dictionaries) under a key.
+    """
+    path = _state_path(directory, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(msgpack.packb(state, use_bin_type=True))
+    os.replace(temp_path, path)
@@ -0,0 +1,132 @@
+"""
+reportStore.py
+
+This module stores data reports in a compact binary form and serves whole reports or slices of them.
+
+A report is written as msgpack with every section (and every column of "Feature Details")
+packed separately, so reading one section, or the details of a few columns, only decodes those
+bytes. Stored reports are kept in a bounded in-memory LRU keyed by path and file version, together
+with the JSON text of the whole report once it has been asked for, so repeated reads parse nothing.
+
+Dependencies:
+- msgpack
+- json
+
+Usage:
+1. Call write_report(path, report) to store a report.
+2. Call read_sections(path, sections, columns) for a slice, or read_json(path) for the whole report as JSON text.
+
+Functions:
+- write_report: Stores a report.
+- import_json_report: Stores a report read from a JSON report file.
+- read_sections: Returns some sections of a report, optionally limited to some columns.
+- read_json: Returns a whole report as JSON text.
+
+Variables:
+- CONFIGURATIONS: A dictionary containing the configuration of the store.
+- FEATURE_DETAILS: Name of the per-column section.
+"""
+import os
+import json
+import threading
+from collections import OrderedDict
+import msgpack
+
+CONFIGURATIONS={
+    'MAX_CACHED_REPORTS': 64,
+}
+
+FEATURE_DETAILS='Feature Details'
+
+_cache=OrderedDict()  # path -> (version, {section: packed bytes}, JSON text or None)
+_cache_lock=threading.Lock()
+
+
+def _version(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def write_report(path, report):
+    """
+    Stores a report, packing every section and every column of "Feature Details" separately.
+
+    Args:
+        path (str): Path of the report file.
+        report (dict): The report.
+    """
+    packed = {}
+    for section, content in report.items():
+        if section == FEATURE_DETAILS and isinstance(content, dict):
+            packed[section] = {column: msgpack.packb(details, use_bin_type=True) for column, details in content.items()}
+        else:
+            packed[section] = msgpack.packb(content, use_bin_type=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(msgpack.packb(packed, use_bin_type=True))
+    os.replace(temp_path, path)
+
+
+def import_json_report(json_path, path):
+    """
+    Stores the report of a JSON report file (the format reports used to be written in).
+    """
+    with open(json_path, 'r', encoding='utf-8') as file:
+        write_report(path, json.load(file))
+
+
+def _load(path):
+    # Returns the cache entry of a report, reading the file only if it changed since it was cached
+    version = _version(path)
+    with _cache_lock:
+        entry = _cache.get(path)
+        if entry is not None and entry[0] == version:
+            _cache.move_to_end(path)
+            return entry
+    with open(path, 'rb') as file:
+        packed = msgpack.unpackb(file.read(), raw=False)
+    entry = (version, packed, None)
+    with _cache_lock:
+        _cache[path] = entry
+        _cache.move_to_end(path)
+        while len(_cache) > CONFIGURATIONS['MAX_CACHED_REPORTS']:
+            _cache.popitem(last=False)
+    return entry
+
+
+def _unpack(packed, section, columns=None):
+    content = packed[section]
+    if isinstance(content, dict):
+        selected = content if columns is None else [column for column in columns if column in content]
+        return {column: msgpack.unpackb(content[column], raw=False) for column in selected}
+    return msgpack.unpackb(content, raw=False)
+
+
+def read_sections(path, sections=None, columns=None):
+    """
+    Returns some sections of a stored report.
+
+    Args:
+        path (str): Path of the report file.
+        sections (list, optional): Names of the sections to return. Default is every section.
+        columns (list, optional): Columns whose "Feature Details" to return. Default is every column.
+
+    Returns:
+        dict: {section: content} for the requested sections the report has.
+    """
+    _, packed, _ = _load(path)
+    sections = list(packed) if sections is None else [section for section in sections if section in packed]
+    return {section: _unpack(packed, section, columns) for section in sections}
+
+
+def read_json(path):
+    """
+    Returns a whole stored report as JSON text, serializing it only once per version of the file.
+    """
+    version, packed, text = _load(path)
+    if text is None:
+        text = json.dumps({section: _unpack(packed, section) for section in packed})
+        with _cache_lock:
+            if path in _cache and _cache[path][0] == version:
+                _cache[path] = (version, packed, text)
+    return text
@@ -0,0 +1,324 @@
+"""
+sketches.py
+
+This module contains mergeable summaries ("sketches") used to profile datasets that are too
+large to count exactly. Every sketch can be updated chunk by chunk and two sketches built on
+different chunks (or in different worker processes) can be merged into the sketch of the union.
+to_state/from_state turn a sketch into plain values (numbers, bytes, lists) and back, so sketches
+can be stored and merged with sketches built later.
+
+Error bounds:
+- HyperLogLog (distinct count): relative standard error 1.04/sqrt(2^p), i.e. 0.81% for p=14.
+- QuantileSketch (KLL quantiles): normalized rank error about 1.65% for k=200 with 99% confidence;
+  a returned percentile is an actual value whose rank is within that fraction of the requested rank.
+- FrequentItems (Misra-Gries heavy hitters): every reported count is an underestimate by at most
+  n/(capacity+1), and every value more frequent than that is reported.
+- NumericSketch: count, mean, standard deviation, min and max are exact; percentiles are KLL quantiles.
+
+Dependencies:
+- numpy
+- pandas
+
+Classes:
+- HyperLogLog: Estimates the number of distinct values.
+- QuantileSketch: Estimates quantiles (KLL compactors).
+- FrequentItems: Tracks the most frequent values (Misra-Gries).
+- NumericSketch: Exact moments and extremes plus a QuantileSketch.
+"""
+import math
+import numpy as np
+import pandas as pd
+
+
+def _hash_values(values):
+    # Stable 64-bit hashes (same value -> same hash in every process), vectorized. Numbers are hashed
+    # as float64 (and -0.0 as 0.0): an integer column reads as int64 from chunks without missing values
+    # and as float64 from chunks with some, and 3 must hash the same from both
+    values = np.asarray(values)
+    if values.dtype.kind in 'iuf':
+        values = values.astype(np.float64)+0.0
+    return pd.util.hash_array(values)
+
+
+class HyperLogLog:
+    """
+    A HyperLogLog distinct-count sketch with 2^p one-byte registers.
+
+    Relative standard error: 1.04/sqrt(2^p) (0.81% for the default p=14, 16 KB of registers).
+    """
+
+    def __init__(self, p=14):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def update(self, values):
+        """
+        Adds an array of non-missing values.
+        """
+        if len(values) == 0:
+            return
+        hashes = _hash_values(values)
+        index = (hashes >> np.uint64(64-self.p)).astype(np.int64)
+        remainder = hashes & np.uint64((1 << (64-self.p))-1)
+        # frexp gives the exact bit length of integers below 2^53; the rank is the position of the first 1 bit
+        _, bit_length = np.frexp(remainder.astype(np.float64))
+        rank = (64-self.p-bit_length+1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        """
+        Merges another sketch with the same p into this one.
+        """
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def to_state(self):
+        return {'p': self.p, 'registers': self.registers.tobytes()}
+
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(state['p'])
+        sketch.registers = np.frombuffer(state['registers'], dtype=np.uint8).copy()
+        return sketch
+
+    def estimate(self):
+        """
+        Returns the estimated number of distinct values.
+        """
+        m = len(self.registers)
+        alpha = 0.7213/(1+1.079/m)
+        raw = alpha*m*m/np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5*m and zeros > 0:
+            # Linear counting is more accurate for small cardinalities
+            return int(round(m*math.log(m/zeros)))
+        return int(round(raw))
+
+
+class QuantileSketch:
+    """
+    A KLL quantile sketch.
+
+    Items live in levels; an item at level h stands for 2^h input values. When a level grows past
+    its capacity it is sorted and every other item (from a random offset) is promoted to the next
+    level. Capacities shrink geometrically (factor 2/3) below the top level, so the sketch holds
+    O(k) items. Normalized rank error is about 1.65% for k=200 with 99% confidence.
+    """
+
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels)-level-1
+        return max(8, int(math.ceil(self.k*(2/3)**depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level+1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays at this level so no weight is lost
+                kept = items[-1:] if len(items) % 2 else items[:0]
+                pairs = items[:len(items)-len(kept)]
+                promoted = pairs[self._rng.integers(2)::2]
+                self.levels[level] = kept
+                self.levels[level+1] = np.concatenate([self.levels[level+1], promoted])
+            level += 1
+
+    def update(self, values):
+        """
+        Adds an array of non-missing numeric values.
+        """
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def update_counts(self, values, counts):
+        """
+        Adds distinct values with their counts: a value counted c times is stored at the levels of
+        the set bits of c, which stands for exactly c values.
+        """
+        values, remaining = np.asarray(values, dtype=float), np.asarray(counts, dtype=np.int64)
+        self.n += int(remaining.sum())
+        level = 0
+        while remaining.any():
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], values[(remaining & 1) == 1]])
+            remaining = remaining >> 1
+            level += 1
+        self._compress()
+
+    def merge(self, other):
+        """
+        Merges another sketch into this one.
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantiles(self, qs):
+        """
+        Returns the estimated quantiles for the given fractions (NaN if the sketch is empty).
+        """
+        if self.n == 0:
+            return [float('nan')]*len(qs)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items_at_level), 2.0**level) for level, items_at_level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        items, cumulative_weights = items[order], np.cumsum(weights[order])
+        positions = np.searchsorted(cumulative_weights, np.asarray(qs)*cumulative_weights[-1], side='left')
+        return items[np.minimum(positions, len(items)-1)].tolist()
+
+    def to_state(self):
+        return {'k': self.k, 'n': self.n, 'levels': [items.astype(float).tobytes() for items in self.levels]}
+
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(state['k'])
+        sketch.n = state['n']
+        sketch.levels = [np.frombuffer(items, dtype=float).copy() for items in state['levels']]
+        return sketch
+
+
+class FrequentItems:
+    """
+    A Misra-Gries heavy-hitters summary keeping at most `capacity` values.
+
+    Reported counts underestimate the true counts by at most n/(capacity+1).
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.n = 0
+        self.counts = pd.Series(dtype=float)
+
+    def _add_counts(self, counts, n):
+        self.n += n
+        self.counts = self.counts.add(counts, fill_value=0)
+        if len(self.counts) > self.capacity:
+            # Subtracting the (capacity+1)-th largest count keeps the summary mergeable and bounded
+            threshold = self.counts.nlargest(self.capacity+1).iloc[-1]
+            self.counts = self.counts[self.counts > threshold]-threshold
+
+    def update(self, values):
+        """
+        Adds a pandas Series of non-missing values.
+        """
+        self._add_counts(values.value_counts(), len(values))
+
+    def update_counts(self, counts):
+        """
+        Adds a pandas Series of counts indexed by value.
+        """
+        self._add_counts(counts, int(counts.sum()))
+
+    def merge(self, other):
+        """
+        Merges another summary into this one.
+        """
+        self._add_counts(other.counts, other.n)
+        return self
+
+    def error_bound(self):
+        """
+        Returns the largest possible undercount of any reported value.
+        """
+        return self.n/(self.capacity+1)
+
+    def to_state(self):
+        return {'capacity': self.capacity, 'n': self.n,
+                'values': self.counts.index.tolist(), 'counts': self.counts.to_numpy(dtype=float).tolist()}
+
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls(state['capacity'])
+        sketch.n = state['n']
+        sketch.counts = pd.Series(state['counts'], index=state['values'], dtype=float)
+        return sketch
+
+
+class NumericSketch:
+    """
+    Exact count, mean, variance (Chan's parallel formula), min and max, plus a QuantileSketch.
+    """
+
+    def __init__(self, k=200):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+        self.quantile_sketch = QuantileSketch(k)
+
+    def _combine(self, n, mean, m2, minimum, maximum):
+        if n == 0:
+            return
+        total = self.n+n
+        delta = mean-self.mean
+        self.mean += delta*n/total
+        self.m2 += m2+delta*delta*self.n*n/total
+        self.n = total
+        self.min = min(self.min, minimum)
+        self.max = max(self.max, maximum)
+
+    def update(self, values):
+        """
+        Adds an array of non-missing numeric values.
+        """
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        mean = values.mean()
+        self._combine(len(values), mean, ((values-mean)**2).sum(), values.min(), values.max())
+        self.quantile_sketch.update(values)
+
+    def update_counts(self, values, counts):
+        """
+        Adds distinct numeric values with their counts.
+        """
+        values, counts = np.asarray(values, dtype=float), np.asarray(counts, dtype=float)
+        present = counts > 0
+        values, counts = values[present], counts[present]
+        if len(values) == 0:
+            return
+        n = counts.sum()
+        mean = (values*counts).sum()/n
+        self._combine(int(n), mean, (counts*(values-mean)**2).sum(), values.min(), values.max())
+        self.quantile_sketch.update_counts(values, counts.astype(np.int64))
+
+    def merge(self, other):
+        """
+        Merges another sketch into this one.
+        """
+        self._combine(other.n, other.mean, other.m2, other.min, other.max)
+        self.quantile_sketch.merge(other.quantile_sketch)
+        return self
+
+    def std(self):
+        return math.sqrt(self.m2/(self.n-1)) if self.n > 1 else float('nan')
+
+    def to_state(self):
+        return {'n': self.n, 'mean': self.mean, 'm2': self.m2, 'min': self.min, 'max': self.max,
+                'quantile_sketch': self.quantile_sketch.to_state()}
+
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls()
+        sketch.n, sketch.mean, sketch.m2 = state['n'], state['mean'], state['m2']
+        sketch.min, sketch.max = state['min'], state['max']
+        sketch.quantile_sketch = QuantileSketch.from_state(state['quantile_sketch'])
+        return sketch
@@ -0,0 +1,191 @@
+"""
+userStore.py
+
+This module keeps user accounts in an embedded SQLite database accessed through SQLAlchemy.
+user_id is the primary key and username and email have unique indexes, so lookups are
+index seeks and updates or deletes touch a single row instead of rewriting a CSV file.
+
+Dependencies:
+- sqlalchemy
+- csv
+
+Usage:
+1. The database is created on first use; if Database/Users/users.csv exists at that point
+   its accounts are imported once. Creation and import run under a lock file, so several
+   workers starting together do not import twice.
+2. Use the query functions (get_user_by_username, get_user_by_id, ...) from mainDatabase.
+
+Functions:
+- import_users_csv: Imports the accounts of a users CSV file into the database.
+- get_user_by_username: Returns the account with the given username.
+- get_user_by_id: Returns the account with the given user id.
+- username_exists: Checks whether a username is taken.
+- email_exists: Checks whether an email is taken.
+- insert_user: Adds an account and returns its new user id.
+- update_user: Updates the fields of one account.
+- delete_user: Deletes one account.
+
+Variables:
+- CONFIGURATIONS: A dictionary containing the configuration of the store.
+- users: The SQLAlchemy table of user accounts.
+"""
+import os
+import csv
+import threading
+from sqlalchemy import (create_engine, event, MetaData, Table, Column, Integer, String,
+                        select, insert, update, delete, func)
+from Database import idSequence
+
+CONFIGURATIONS={
+    'DATABASE_PATH': os.getenv('USER_DATABASE_PATH', os.path.join('Database', 'Users', 'users.db')),
+    'LEGACY_CSV_PATH': os.path.join('Database', 'Users', 'users.csv'),
+    'BUSY_TIMEOUT_MS': 5000,
+}
+
+metadata = MetaData()
+
+users = Table(
+    'users', metadata,
+    Column('user_id', Integer, primary_key=True, autoincrement=True),
+    Column('email', String, nullable=False, unique=True, index=True),
+    Column('first_name', String),
+    Column('last_name', String),
+    Column('username', String, nullable=False, unique=True, index=True),
+    Column('password', String, nullable=False),
+    sqlite_autoincrement=True,
+)
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers run while a writer commits; busy_timeout makes concurrent writers wait instead of failing
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA busy_timeout={CONFIGURATIONS['BUSY_TIMEOUT_MS']}")
+    cursor.close()
+
+
+def get_engine():
+    """
+    Returns the engine of the user database, creating the database on first use.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            database_path = CONFIGURATIONS['DATABASE_PATH']
+            os.makedirs(os.path.dirname(database_path) or '.', exist_ok=True)
+            # Workers starting together create the database and import the legacy accounts one at a time;
+            # a worker that finds the database created waits here until the import is done
+            with idSequence.FileLock(f"{database_path}.lock"):
+                is_new = not os.path.exists(database_path)
+                engine = create_engine(f"sqlite:///{database_path}")
+                event.listen(engine, 'connect', _set_sqlite_pragmas)
+                metadata.create_all(engine)
+                if is_new and os.path.exists(CONFIGURATIONS['LEGACY_CSV_PATH']):
+                    import_users_csv(CONFIGURATIONS['LEGACY_CSV_PATH'], engine)
+            _engine = engine
+        return _engine
+
+
+def import_users_csv(csv_path, engine=None):
+    """
+    Imports the accounts of a users CSV file (user_id,email,first_name,lastname,username,password).
+
+    Accounts whose user_id, username or email is already in the database are skipped, so running
+    it twice (or from two processes) is harmless.
+
+    Args:
+        csv_path (str): Path of the CSV file.
+        engine (Engine, optional): Engine to import into. Default is the store's engine.
+
+    Returns:
+        int: Number of imported accounts.
+    """
+    engine = engine or get_engine()
+    with open(csv_path, newline='', encoding='utf-8') as file:
+        rows = [
+            {
+                'user_id': int(row['user_id']),
+                'email': row['email'],
+                'first_name': row['first_name'],
+                'last_name': row.get('last_name', row.get('lastname')),
+                'username': row['username'],
+                'password': row['password'],
+            }
+            for row in csv.DictReader(file)
+        ]
+    if not rows:
+        return 0
+    with engine.begin() as connection:
+        return connection.execute(insert(users).prefix_with('OR IGNORE'), rows).rowcount
+
+
+def get_user_by_username(username):
+    """
+    Returns the account with the given username as a dictionary, or None.
+    """
+    with get_engine().connect() as connection:
+        row = connection.execute(select(users).where(users.c.username == username)).mappings().first()
+    return dict(row) if row else None
+
+
+def get_user_by_id(user_id):
+    """
+    Returns the account with the given user id as a dictionary, or None.
+    """
+    with get_engine().connect() as connection:
+        row = connection.execute(select(users).where(users.c.user_id == int(user_id))).mappings().first()
+    return dict(row) if row else None
+
+
+def username_exists(username):
+    """
+    Checks whether an account with the given username exists.
+    """
+    with get_engine().connect() as connection:
+        return connection.execute(select(func.count()).where(users.c.username == username)).scalar() > 0
+
+
+def email_exists(email):
+    """
+    Checks whether an account with the given email exists.
+    """
+    with get_engine().connect() as connection:
+        return connection.execute(select(func.count()).where(users.c.email == email)).scalar() > 0
+
+
+def insert_user(email, first_name, last_name, username, password):
+    """
+    Adds an account and returns its user id.
+
+    Raises:
+        sqlalchemy.exc.IntegrityError: If the username or email is already taken.
+    """
+    with get_engine().begin() as connection:
+        result = connection.execute(insert(users).values(email=email, first_name=first_name, last_name=last_name,
+                                                         username=username, password=password))
+        return result.inserted_primary_key[0]
+
+
+def update_user(user_id, **fields):
+    """
+    Updates the given fields of one account.
+    """
+    with get_engine().begin() as connection:
+        connection.execute(update(users).where(users.c.user_id == int(user_id)).values(**fields))
+
+
+def delete_user(user_id):
+    """
+    Deletes one account.
+    """
+    with get_engine().begin() as connection:
+        connection.execute(delete(users).where(users.c.user_id == int(user_id)))
+
+
+if __name__ == "__main__":
+    import sys
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else CONFIGURATIONS['LEGACY_CSV_PATH']
+    print(f"Imported {import_users_csv(csv_path)} users from {csv_path}")
@@ -28,6 +28,7 @@ class Projects:
         self.projects=databaseRequests.read_projects(st.session_state.user_id)
         self.max_columns = 3
         self.columns = None
+        self.page_size = 1000  # rows of the dataset fetched per page
     
     def new_project_clicked(self):
         st.session_state["newProject"] = True
@@ -52,7 +53,7 @@ class Projects:
         st.session_state['Visualization']=True
 
     def selectedProject(self):
-        project=databaseRequests.get_project_details(st.session_state['Project'])
+        project=databaseRequests.get_project_metadata(st.session_state['Project'])
         with st.columns(19)[-1]:
             st.markdown("""
                 <style>
@@ -114,11 +115,21 @@ class Projects:
         tabs=st.tabs(['Raw Dataset','Processed Dataset','Insights','Visualizations','AutoML'])
         with tabs[0]:
             with st.container(border=True):
-                st.dataframe(pd.read_json(StringIO(project['raw_dataset'])),use_container_width=True,)
+                self.datasetPage(project)
         
         with tabs[3]:
             self.visualizationsPage()
     
+    def datasetPage(self,project):
+        # Only the page being looked at is fetched from the backend
+        if not project['num_rows']:
+            st.write('This project has no dataset.')
+            return
+        pages = -(-project['num_rows'] // self.page_size)
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key='dataset_page')
+        rows,_ = databaseRequests.fetch_rows(st.session_state['Project'], offset=(page-1)*self.page_size, limit=self.page_size)
+        st.dataframe(rows,use_container_width=True,)
+
     def projectOverview(self):
         st.title("My Projects")
         for idx,(project_id, project_data) in enumerate(self.projects.items()):
@@ -1,6 +1,7 @@
 import requests
 import streamlit as st
 import json
+import pandas as pd
 
 url = 'http://127.0.0.1:8000'
 def check_login(username,password):
@@ -107,3 +108,46 @@ def get_project_details(project_id):
      project=json.loads(response.json())['data']
      return project
 
+def get_project_metadata(project_id):
+     """
+     Gets the details of a project (name, date, number of rows, column types) without its dataset.
+
+     Parameters
+     ----------
+     project_id : str
+         The project's id.
+
+     Returns
+     -------
+     dict
+         The project details.
+     """
+     response=requests.get(url+f'/projects/{str(project_id)}')
+     return response.json()['data']
+
+def fetch_rows(project_id,offset=0,limit=100,columns=None):
+     """
+     Gets one window of rows of a project's dataset.
+
+     Parameters
+     ----------
+     project_id : str
+         The project's id.
+     offset : int
+         Index of the first row.
+     limit : int
+         Maximum number of rows.
+     columns : list, optional
+         Only return these columns.
+
+     Returns
+     -------
+     tuple
+         (pd.DataFrame with the rows, total number of rows in the dataset)
+     """
+     params={'offset':offset,'limit':limit}
+     if columns:
+          params['columns']=','.join(columns)
+     response=requests.get(url+f'/projects/{str(project_id)}/rows',params=params).json()
+     page=response['data']
+     return pd.DataFrame(page['data'],columns=page['columns']),response['total_rows']
@@ -0,0 +1,20 @@
+import numpy as np
+import pandas as pd
+from Database import correlationEngine
+
+
+def test_compute_correlation_matches_pandas_on_offset_columns(tmp_path, monkeypatch):
+    rng = np.random.default_rng(1)
+    b = rng.normal(size=25000)
+    df = pd.DataFrame({
+        'ts': 1.7e9+rng.normal(size=len(b))*1000+b*700,
+        'b': b,
+        'c': 1e8+b,
+        'id': np.arange(len(b))+10**9,
+    })
+    parquet_path = str(tmp_path/'offset.parquet')
+    df.to_parquet(parquet_path)
+    monkeypatch.setitem(correlationEngine.CONFIGURATIONS, 'BLOCK_ROWS', 4000)
+    columns, matrix = correlationEngine.compute_correlation(parquet_path)
+    # pandas itself drifts by ~1e-7 on the 1e9 offsets; before the fix these pairs were NaN
+    np.testing.assert_allclose(matrix, df[columns].corr().to_numpy(), atol=1e-6)
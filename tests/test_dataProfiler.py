@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+import pandas as pd
+from Database import dataProfiler
+
+
+def _offset_frame(rows=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    b = rng.normal(size=rows)
+    return pd.DataFrame({
+        'ts': 1.7e9+rng.normal(size=rows)*1000+b*700,
+        'b': b,
+        'c': 1e8+b,
+        'd': np.where(rng.random(rows) < 0.1, np.nan, 3e9+rng.normal(size=rows)*50+b*20),
+    })
+
+
+def test_merged_correlation_sums_match_pandas_on_offset_columns():
+    df = _offset_frame()
+    sums = dataProfiler.correlation_sums(np.empty((0, df.shape[1])))
+    for start in range(0, len(df), 3000):
+        dataProfiler.merge_correlation_sums(sums, dataProfiler.correlation_sums(df.iloc[start:start+3000].to_numpy(dtype=float)))
+    expected = df.corr().to_numpy()
+    np.testing.assert_allclose(dataProfiler.correlation_from_sums(sums), expected, atol=1e-9)
+
+
+def test_profile_correlations_match_pandas_on_offset_columns(tmp_path):
+    df = _offset_frame()
+    parquet_path = str(tmp_path/'offset.parquet')
+    df.to_parquet(parquet_path, row_group_size=3000)
+    report = dataProfiler.profile_dataset(parquet_path, max_workers=1, mode='exact')
+    correlations = pd.DataFrame(report['Correlations']).loc[df.columns, df.columns].to_numpy(dtype=float)
+    np.testing.assert_allclose(correlations, df.corr().to_numpy(), atol=1e-9)
+
+
+def test_exact_profile_switches_high_cardinality_columns_to_sketches(tmp_path, monkeypatch):
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({
+        'unique': rng.normal(size=30000),
+        'small': rng.integers(0, 10, size=30000).astype(float),
+        'name': [f"n{i}" for i in rng.integers(0, 25000, size=30000)],
+        'group': rng.choice(['a', 'b'], size=30000),
+    })
+    parquet_path = str(tmp_path/'wide.parquet')
+    df.to_parquet(parquet_path, row_group_size=4000)
+    monkeypatch.setitem(dataProfiler.CONFIGURATIONS, 'MAX_EXACT_VALUES', 5000)
+    report = dataProfiler.profile_dataset(parquet_path, max_workers=1, mode='exact')
+
+    details = report['Feature Details']
+    assert 'Approximation Error Bounds' not in details['small']
+    assert details['small']['Descriptive Statistics']['Mean'] == pytest.approx(df['small'].mean())
+    for column in ('unique', 'name'):
+        assert 'Approximation Error Bounds' in details[column]
+        assert details[column]['Unique Values Count'] == pytest.approx(df[column].nunique(), rel=0.05)
+    statistics = details['unique']['Descriptive Statistics']
+    assert statistics['Mean'] == pytest.approx(df['unique'].mean())
+    assert statistics['Standard Deviation'] == pytest.approx(df['unique'].std())
+    assert statistics['Median'] == pytest.approx(df['unique'].median(), abs=0.05)
+    assert report['Numeric-Categorical Relationships']['group -> unique']['mean']['a'] == pytest.approx(df[df.group == 'a']['unique'].mean())
+
+
+def test_process_pool_profile_matches_in_process_profile(tmp_path, monkeypatch):
+    df = _offset_frame()
+    parquet_path = str(tmp_path/'offset.parquet')
+    df.to_parquet(parquet_path, row_group_size=5000)
+    monkeypatch.setitem(dataProfiler.CONFIGURATIONS, 'MIN_ROWS_FOR_POOL', 0)
+    pooled = dataProfiler.profile_dataset(parquet_path, max_workers=2, mode='exact')
+    assert pooled == dataProfiler.profile_dataset(parquet_path, max_workers=1, mode='exact')
+
+
+def test_unique_count_of_integers_read_from_chunks_with_and_without_nulls(tmp_path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    values = np.random.default_rng(3).integers(0, 20000, size=100000)
+    # Every other row group has a missing value, so its chunk of the column reads as float64
+    missing = np.arange(100000) % 10000 == 5000
+    parquet_path = str(tmp_path/'ints.parquet')
+    pq.write_table(pa.table({'ids': pa.array(values, mask=missing)}), parquet_path, row_group_size=5000)
+    details = dataProfiler.profile_dataset(parquet_path, max_workers=1, mode='approximate')['Feature Details']['ids']
+    relative_error = 1.04/np.sqrt(2**dataProfiler.CONFIGURATIONS['HLL_PRECISION'])
+    assert details['Unique Values Count'] == pytest.approx(len(np.unique(values[~missing])), rel=3*relative_error)
+
+
+def test_distinct_sketch_merges_int_and_float_chunks_of_the_same_values():
+    from Database import sketches
+    values = np.arange(100000)
+    merged = sketches.HyperLogLog(14)
+    merged.update(values)
+    floats = sketches.HyperLogLog(14)
+    floats.update(values.astype(float))
+    assert merged.merge(floats).estimate() == pytest.approx(100000, rel=3*1.04/np.sqrt(2**14))
+
+
+@pytest.mark.parametrize('mode', ['exact', 'approximate'])
+def test_report_keeps_the_general_info_schema(tmp_path, mode):
+    parquet_path = str(tmp_path/'offset.parquet')
+    _offset_frame(rows=2000).to_parquet(parquet_path)
+    report = dataProfiler.profile_dataset(parquet_path, max_workers=1, mode=mode)
+    assert list(report) == ['General Info', 'Feature Details', 'Correlations', 'Numeric-Categorical Relationships', 'Dataset Insights']
+    assert list(report['General Info']) == ['Number of Rows', 'Number of Columns', 'Missing Data Summary', 'Feature Types Summary']
+
+
+def test_pool_results_are_submitted_a_bounded_number_ahead_of_the_merge():
+    from concurrent.futures import ThreadPoolExecutor
+    submitted = []
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        ahead = [len(submitted)-i for i, _ in enumerate(dataProfiler._run(executor, 4, lambda i: submitted.append(i) or i, range(50)))]
+    assert max(ahead) <= 4
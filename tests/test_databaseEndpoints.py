@@ -0,0 +1,48 @@
+import os
+import sys
+import pandas as pd
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# The server runs from Backend/, whose modules import each other by name
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Backend')))
+from Database import mainDatabase
+from databaseEndpoints import db_router
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    projects_path = str(tmp_path/'projects.csv')
+    pd.DataFrame({'project_id': ['1'], 'name': ['sales'], 'date': ['2024-01-01']}).to_csv(projects_path, index=False)
+    monkeypatch.setattr(mainDatabase, 'project_directory', projects_path)
+    monkeypatch.setattr(mainDatabase, 'get_dataset_key', lambda project_id: None)
+    app = FastAPI()
+    app.include_router(db_router)
+    return TestClient(app)
+
+
+def test_project_metadata_of_an_unknown_project_is_not_found(client):
+    assert client.get('/projects/2').status_code == 404
+    response = client.get('/projects/1')
+    assert response.status_code == 200
+    assert response.json()['data']['name'] == 'sales'
+
+
+def test_reading_a_missing_report_does_not_profile(client, tmp_path, monkeypatch):
+    pd.DataFrame({'a': [1.0, 2.0, 3.0]}).to_parquet(str(tmp_path/'dataset_k.parquet'))
+    (tmp_path/'reports').mkdir()
+    monkeypatch.setattr(mainDatabase, 'get_dataset_key', lambda project_id: 'k')
+    monkeypatch.setattr(mainDatabase, 'parquet_datasets_directory', str(tmp_path))
+    monkeypatch.setattr(mainDatabase, 'data_reports_directory', str(tmp_path/'reports'))
+    monkeypatch.setattr(mainDatabase, 'profile_states_directory', None)
+    profiled = []
+    profile_dataset = mainDatabase.dataProfiler.profile_dataset
+    monkeypatch.setattr(mainDatabase.dataProfiler, 'profile_dataset', lambda *args, **kwargs: profiled.append(args) or profile_dataset(*args, **kwargs))
+
+    assert client.get('/projects/1/report').status_code == 404
+    assert profiled == []
+    assert client.post('/projects/1/report').status_code == 200
+    assert len(profiled) == 1
+    report = client.get('/projects/1/report', params={'sections': 'General Info'}).json()['data']
+    assert report['General Info']['Number of Rows'] == 3
@@ -0,0 +1,47 @@
+import os
+import sys
+import subprocess
+import threading
+import numpy as np
+import pandas as pd
+from Database import datasetCache
+
+
+def test_import_leaves_copy_on_write_alone():
+    # A fresh interpreter, so the option is not the one this process may have set
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    script = ("import pandas as pd; before = pd.get_option('mode.copy_on_write'); "
+              "from Database import datasetCache; print(before, pd.get_option('mode.copy_on_write'))")
+    environment = {**os.environ, 'DATASET_CACHE_COPY_ON_WRITE': '1'}
+    output = subprocess.run([sys.executable, '-c', script], cwd=root, env=environment, capture_output=True, text=True, check=True)
+    before, after = output.stdout.split()
+    assert before == after
+
+
+def test_handouts_are_deep_copies_without_copy_on_write():
+    cached = pd.DataFrame({'a': [1.0, 2.0], 'b': ['x', 'y']})
+    with pd.option_context('mode.copy_on_write', False):
+        handout = datasetCache.DatasetCache._handout(cached)
+    for column in cached:
+        assert not np.shares_memory(handout[column].to_numpy(), cached[column].to_numpy())
+
+
+def test_handouts_do_not_change_the_cached_frame():
+    cache = datasetCache.DatasetCache(10**8)
+    load = lambda: pd.DataFrame({'a': [1.0, None, 3.0]})
+    handout = cache.get('source', 1, load)
+    handout.fillna({'a': 0.0}, inplace=True)
+    handout.loc[0, 'a'] = 9.0
+    assert cache.get('source', 1, load)['a'].isna().sum() == 1
+    assert cache.get('source', 1, load).loc[0, 'a'] == 1.0
+
+
+def test_loading_locks_are_released():
+    cache = datasetCache.DatasetCache(10**8)
+    threads = [threading.Thread(target=cache.get, args=(('source', columns), 1, lambda: pd.DataFrame({'a': [1]})))
+               for columns in range(50) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache._loading_locks == {}
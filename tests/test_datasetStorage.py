@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+from Database import datasetStorage
+
+
+def test_arrow_columns_are_mapped_views_for_multi_row_group_datasets(tmp_path):
+    df = pd.DataFrame({'a': np.arange(40000, dtype=np.int64), 'b': np.linspace(0, 1, 40000), 'name': ['x']*40000})
+    parquet_path, arrow_path = str(tmp_path/'data.parquet'), str(tmp_path/'data.arrow')
+    df.to_parquet(parquet_path, row_group_size=10000)
+    datasetStorage.convert_parquet_to_arrow(parquet_path, arrow_path)
+
+    read = datasetStorage.read_arrow(arrow_path)
+    pd.testing.assert_frame_equal(read, df)
+    # A copy would be writeable; views of the memory map are not
+    assert not read['a'].to_numpy().flags.writeable
+    assert not read['b'].to_numpy().flags.writeable
+
+
+def _arrow_project(tmp_path, monkeypatch):
+    from Database import mainDatabase
+    df = pd.DataFrame({'a': np.arange(40000, dtype=np.int64), 'b': np.linspace(0, 1, 40000)})
+    df.to_parquet(str(tmp_path/'dataset_k.parquet'), row_group_size=10000)
+    monkeypatch.setitem(datasetStorage.CONFIGURATIONS, 'FORMAT', 'arrow')
+    monkeypatch.setattr(mainDatabase, 'parquet_datasets_directory', str(tmp_path))
+    monkeypatch.setattr(mainDatabase, 'get_dataset_key', lambda project_id: 'k')
+    monkeypatch.setattr(mainDatabase, 'dataset_cache', mainDatabase.datasetCache.DatasetCache(10**8))
+    return mainDatabase
+
+
+def test_arrow_handouts_share_the_mapped_dataset(tmp_path, monkeypatch):
+    mainDatabase = _arrow_project(tmp_path, monkeypatch)
+    with pd.option_context('mode.copy_on_write', True):
+        first, second = mainDatabase.fetch_dataset('p'), mainDatabase.fetch_dataset('p')
+        assert np.shares_memory(first['a'].to_numpy(), second['a'].to_numpy())
+        assert not first['a'].to_numpy().flags.writeable
+        first.loc[0, 'a'] = -1
+        assert mainDatabase.fetch_dataset('p').loc[0, 'a'] == 0
+
+
+def test_arrow_storage_requires_copy_on_write(tmp_path, monkeypatch):
+    mainDatabase = _arrow_project(tmp_path, monkeypatch)
+    with pd.option_context('mode.copy_on_write', False):
+        with pytest.raises(RuntimeError):
+            mainDatabase.fetch_dataset('p')
+
+
+def test_arrow_file_is_checked_once_per_version(tmp_path, monkeypatch):
+    mainDatabase = _arrow_project(tmp_path, monkeypatch)
+    datasetStorage.convert_parquet_to_arrow(str(tmp_path/'dataset_k.parquet'), str(tmp_path/'dataset_k.arrow'))
+    checks = []
+    monkeypatch.setattr(datasetStorage, 'arrow_is_contiguous', lambda path: checks.append(path) or True)
+    with pd.option_context('mode.copy_on_write', True):
+        for columns in (None, ['a'], ['b']):
+            mainDatabase.fetch_dataset('p', columns)
+    assert len(checks) == 1
@@ -0,0 +1,34 @@
+import csv
+import multiprocessing
+from Database import idSequence
+
+PROCESSES = 8
+INSERTS = 100
+
+
+def _insert_rows(csv_path, worker):
+    for index in range(INSERTS):
+        idSequence.append_with_next_id(csv_path, 'id', lambda new_id: [new_id, worker, index])
+
+
+def test_concurrent_processes_get_unique_ordered_ids(tmp_path):
+    csv_path = str(tmp_path/'table.csv')
+    with open(csv_path, 'w', newline='', encoding='utf-8') as file:
+        csv.writer(file).writerow(['id', 'worker', 'index'])
+
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=_insert_rows, args=(csv_path, worker)) for worker in range(PROCESSES)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(timeout=120)
+        assert process.exitcode == 0
+
+    with open(csv_path, newline='', encoding='utf-8') as file:
+        rows = list(csv.DictReader(file))
+    ids = [int(row['id']) for row in rows]
+    assert ids == list(range(1, PROCESSES*INSERTS+1))
+    # Every worker's rows were appended in the order it inserted them
+    for worker in range(PROCESSES):
+        indexes = [int(row['index']) for row in rows if row['worker'] == str(worker)]
+        assert indexes == list(range(INSERTS))
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import plotly.io
+import pytest
+from Database import mainDatabase
+from Agents.codeGeneration import maintools, plotReducers
+
+
+@pytest.fixture
+def high_cardinality_dataset(monkeypatch):
+    rng = np.random.default_rng(0)
+    rows = 200000
+    df = pd.DataFrame({'x': rng.normal(size=rows), 'y': rng.normal(size=rows),
+                       'c': rng.integers(0, 300, rows).astype(str), 'k': rng.choice(list('abc'), rows)})
+    monkeypatch.setattr(mainDatabase, 'fetch_dataset', lambda project_id, columns=None: df[[c for c in dict.fromkeys(columns) if c]])
+    return df
+
+
+def test_density_payload_is_bounded_for_a_high_cardinality_color(high_cardinality_dataset):
+    figure = maintools.create_scatter_plot.invoke({'x': 'x', 'y': 'y', 'color': 'c', 'render': 'density',
+                                                   'density_style': 'contour', 'project_id': 'p'})
+    groups = plotReducers.CONFIGURATIONS['MAX_DENSITY_GROUPS']
+    assert len(figure['data']) == groups
+    assert figure['data'][-1]['name'] == 'Other'
+    assert figure['layout']['meta']['groups'] == groups
+    cells = plotReducers.CONFIGURATIONS['DENSITY_GRID']**2
+    assert len(plotly.io.to_json(figure)) < groups*cells*30
+
+
+@pytest.mark.parametrize('x', ['x', 'k'])
+def test_histogram_payload_is_bounded_for_a_high_cardinality_color(high_cardinality_dataset, x):
+    figure = maintools.create_histogram.invoke({'x': x, 'color': 'c', 'project_id': 'p'})
+    groups = plotReducers.CONFIGURATIONS['MAX_COLOR_GROUPS']
+    assert len(figure['data']) == groups
+    assert 'Other' in [trace['name'] for trace in figure['data']]
+    # Every row is still counted, in its own group or in "Other"
+    assert sum(sum(trace['y']) for trace in figure['data']) == len(high_cardinality_dataset)
+
+
+@pytest.mark.parametrize('x, color', [('k', 'c'), ('c', 'k')])
+def test_swarm_traces_are_bounded_and_meta_counts_every_row(high_cardinality_dataset, x, color):
+    figure = maintools.create_swarm_plot.invoke({'x': x, 'y': 'y', 'color': color, 'project_id': 'p'})
+    meta = figure['layout']['meta']
+    assert meta['categories'] <= plotReducers.CONFIGURATIONS['SWARM_MAX_CATEGORIES']
+    assert meta['color_groups'] <= plotReducers.CONFIGURATIONS['SWARM_MAX_COLORS']
+    # One trace of points and at most one of density strips per color group
+    assert len(figure['data']) <= 2*meta['color_groups']
+    assert meta['drawn_points']+meta['strip_points'] == meta['total_points'] == len(high_cardinality_dataset)
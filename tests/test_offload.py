@@ -0,0 +1,30 @@
+import asyncio
+import threading
+from Backend import offload
+
+
+def test_cancelled_requests_release_their_counters():
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(offload.run('cancelTest', release.wait, 5))
+        await asyncio.sleep(0.05)
+        waiting = [asyncio.ensure_future(offload.run('cancelTest', release.wait, 5)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        counters = offload.metrics()['endpoints']['cancelTest']
+        assert (counters['running'], counters['waiting']) == (1, 3)
+        for task in [running, *waiting]:
+            task.cancel()
+        await asyncio.gather(running, *waiting, return_exceptions=True)
+        release.set()
+        # The concurrency slot is free again
+        assert await offload.run('cancelTest', lambda: 'done') == 'done'
+
+    offload.CONFIGURATIONS['ENDPOINT_LIMITS']['cancelTest'] = ('light', 1)
+    try:
+        asyncio.run(scenario())
+    finally:
+        del offload.CONFIGURATIONS['ENDPOINT_LIMITS']['cancelTest']
+    counters = offload.metrics()['endpoints']['cancelTest']
+    assert (counters['running'], counters['waiting']) == (0, 0)
+    assert (counters['completed'], counters['failed']) == (1, 1)
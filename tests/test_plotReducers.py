@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+import pandas as pd
+from Agents.codeGeneration import plotReducers
+
+
+def _grouped_frame(rows=50000, groups=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'x': rng.normal(size=rows), 'y': rng.normal(size=rows), 'c': rng.integers(0, groups, rows)})
+
+
+def test_sample_points_stays_within_the_budget_with_many_groups():
+    df = _grouped_frame()
+    sample = plotReducers.sample_points(df, ['x', 'y'], 'c', budget=1000)
+    assert len(sample) == 1000
+    for col in ['x', 'y']:
+        assert {df[col].idxmin(), df[col].idxmax()} <= set(sample.index)
+
+
+def test_sample_points_keeps_every_group_extreme_when_they_fit():
+    df = _grouped_frame(rows=20000, groups=10)
+    sample = plotReducers.sample_points(df, ['x', 'y'], 'c', budget=500)
+    assert len(sample) == 500
+    for col in ['x', 'y']:
+        assert set(df.groupby('c')[col].idxmin()) <= set(sample.index)
+        assert set(df.groupby('c')[col].idxmax()) <= set(sample.index)
+
+
+def test_downsample_series_reduces_every_group_in_x_order():
+    df = _grouped_frame(rows=20000, groups=10)
+    reduced = plotReducers.downsample_series(df, 'x', 'y', 'c', points=50)
+    assert reduced.groupby('c').size().eq(50).all()
+    assert reduced.groupby('c')['x'].apply(lambda x: x.is_monotonic_increasing).all()
+
+
+@pytest.mark.filterwarnings('error::FutureWarning')
+def test_hierarchy_folding_keeps_the_leaf_budget_without_warnings():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'a': rng.choice(list('abcdefghij'), 5000),
+                       'b': rng.choice([f'x{i}' for i in range(200)]+[None], 5000), 'v': rng.random(5000)})
+    nodes = plotReducers.hierarchy_nodes(df, ['a', 'b'], 'v', max_leaves=50)
+    assert len(nodes) <= 60
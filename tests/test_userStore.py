@@ -0,0 +1,36 @@
+import csv
+import multiprocessing
+from Database import userStore
+
+PROCESSES = 6
+ACCOUNTS = 200
+
+
+def _start_worker(database_path, csv_path, barrier):
+    userStore.CONFIGURATIONS.update(DATABASE_PATH=database_path, LEGACY_CSV_PATH=csv_path)
+    barrier.wait()
+    userStore.get_user_by_username('user0')
+
+
+def test_workers_starting_together_import_legacy_users_once(tmp_path):
+    csv_path = str(tmp_path/'users.csv')
+    with open(csv_path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['user_id', 'email', 'first_name', 'lastname', 'username', 'password'])
+        writer.writerows([[i, f'user{i}@example.com', 'First', 'Last', f'user{i}', 'hash'] for i in range(1, ACCOUNTS+1)])
+
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(PROCESSES)
+    workers = [context.Process(target=_start_worker, args=(str(tmp_path/'users.db'), csv_path, barrier)) for _ in range(PROCESSES)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(timeout=120)
+        assert process.exitcode == 0
+
+    userStore.CONFIGURATIONS.update(DATABASE_PATH=str(tmp_path/'users.db'), LEGACY_CSV_PATH=csv_path)
+    engine = userStore.create_engine(f"sqlite:///{tmp_path/'users.db'}")
+    with engine.connect() as connection:
+        assert connection.execute(userStore.select(userStore.func.count()).select_from(userStore.users)).scalar() == ACCOUNTS
+    # Importing again skips every account instead of failing on the unique indexes
+    assert userStore.import_users_csv(csv_path, engine) == 0